@@ -1,31 +1,69 @@
-from flask import Flask, render_template
-from models import db, DateAlias
-from routes import todo_bp, ensure_today_todo_file
-from config import Config
+import os
 
-app = Flask(__name__)
-app.config.from_object(Config)
+from flask import Flask, Response, render_template
+from models import db, DateAlias, todo_manager
+from routes import todo_bp, ensure_today_todo_file
+from config import get_config
+from services.connection_pool import configure_pools
+from services.metrics import render_metrics
+from services.rollover_scheduler import start_rollover_scheduler
+from services.sqlite_tuning import format_pragmas, install_sqlalchemy_pragmas
+from services.storage_engine import PER_DAY_MAX_LISTS
 
-# 修改数据库URI为新数据库
-import os
 instance_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
-os.makedirs(instance_dir, exist_ok=True)  # 确保instance目录存在
-db_path = os.path.join(instance_dir, 'todos_new.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 
-db.init_app(app)
+# 结转线程每个进程只启动一个（create_app 可能被调用多次）
+_rollover_thread = None
 
-# 注册 API 蓝图
-app.register_blueprint(todo_bp)
 
-# 主页路由只负责提供 HTML 页面
-# JavaScript 会通过 API /api/todos 获取数据
-@app.route('/')
-def index():
-    return render_template('index.html')
+def create_app(config_name=None):
+    """创建应用；app.py（调试）和 app.pyw（开机运行）共用
 
-if __name__ == '__main__':
-     
+    config_name 为 development / production / testing，不传时取环境变量 APP_CONFIG。
+    """
+    app_config = get_config(config_name)
+    app = Flask(__name__)
+    app.config.from_object(app_config)
+    app.config['CONFIG_NAME'] = app_config.__name__
+
+    # 修改数据库URI为新数据库
+    os.makedirs(instance_dir, exist_ok=True)  # 确保instance目录存在
+    db_path = os.path.join(instance_dir, 'todos_new.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['PROFILE_DIR'] = os.path.join(instance_dir, 'profiles')
+
+    db.init_app(app)
+
+    # SQLAlchemy 的连接与连接池中的连接使用同一组调优参数
+    with app.app_context():
+        install_sqlalchemy_pragmas(db.engine, app_config.SQLITE_PRAGMAS)
+    configure_pools(app.config)
+
+    # 注册 API 蓝图（SQL 跟踪和按需分析在 routes.py 中挂上，按这里的配置开关）
+    app.register_blueprint(todo_bp)
+
+    # 可选：每天午夜自动结转未完成任务
+    global _rollover_thread
+    if app_config.ROLLOVER_AT_MIDNIGHT and _rollover_thread is None:
+        _rollover_thread = start_rollover_scheduler(
+            todo_manager, app_config.ROLLOVER_DAYS, app_config.ROLLOVER_MOVE)
+
+    # 主页路由只负责提供 HTML 页面
+    # JavaScript 会通过 API /api/todos 获取数据
+    @app.route('/')
+    def index():
+        return render_template('index.html')
+
+    # Prometheus 抓取接口
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    return app
+
+
+def run(app, port):
+    """创建数据库表、今天的列表，然后启动开发服务器"""
     # 自动创建测试数据（最近一周的7个表）
     from create_test_data import create_test_data
 
@@ -33,13 +71,24 @@ if __name__ == '__main__':
     with app.app_context():
         db.create_all()
         print("数据库表已创建")
-    
+
+    print(f"SQLite 配置 ({app.config['CONFIG_NAME']}): {format_pragmas(todo_manager.pool.active_pragmas())}")
+    list_count = len(todo_manager.get_todo_counts())
+    if todo_manager.engine.name == 'per_day' and list_count > PER_DAY_MAX_LISTS:
+        print(f"提示: 每日表引擎下已有 {list_count} 个列表，schema 越大新建列表和新连接越慢，"
+              f"建议运行 migrate_storage.py 迁移到 single_table")
+
     # 确保今天的todo文件存在
     ensure_today_todo_file()
-   
+
     # create_test_data()
 
-    # 临时调试，端口是 5990
-    # 开机运行，端口是 5995
-    app.run(debug=True, port=5990)
+    app.run(debug=True, port=port)
+
 
+app = create_app()
+
+if __name__ == '__main__':
+    # 临时调试，端口是 5990
+    # 开机运行（app.pyw），端口是 5995
+    run(app, 5990)
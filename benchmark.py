@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+DailyTodoManager / DatabaseService 微基准测试
+
+按 (存储引擎, 列表数, 列表长度) 组合逐项计时，结果输出为 JSON；
+与保存的基线比较，中位数变慢超过容差的项会列出并以退出码 1 结束。
+
+    python benchmark.py                                  # 默认规模，有基线时自动比较
+    python benchmark.py --tables 10 100 1000 10000 --rows 10 1000
+    python benchmark.py --only get_todo_counts copy_list   # 只跑部分项
+    python benchmark.py --save-baseline                  # 把本次结果保存为基线
+    python benchmark.py -o results.json --tolerance 0.5
+
+基线默认保存在 instance/ 下（不提交），因为耗时只在同一台机器上可比。
+每日表引擎下 SQLite 建表/建触发器的耗时随表数增长，准备 10,000 个每日表需要很长时间，
+所以默认只到 1,000；同一 (引擎, 列表数) 的数据库只准备一次，再复制给各个列表长度使用。
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from models import DailyTodoManager
+from services.database_service import DatabaseService
+from services.storage_engine import get_engine
+
+DEFAULT_BASELINE = os.path.join('instance', 'benchmark_baseline.json')
+
+# 每个背景列表的任务数（列表数达到 10,000 时总行数仍然可控）
+BACKGROUND_ROWS = 3
+TARGET_DATE = '2099-12-31'
+FIRST_DATE = date(2000, 1, 1)
+
+# 变慢不到这个绝对值（微秒）时不算回归，避免极快操作的计时抖动
+NOISE_FLOOR_US = 20.0
+
+
+def _populate_background(manager, count):
+    """创建 count 个背景列表，每个 BACKGROUND_ROWS 条任务"""
+    with manager.transaction():
+        for i in range(count):
+            list_id = (FIRST_DATE + timedelta(days=i)).isoformat()
+            manager.import_todos(list_id, ({'content': f"背景任务 {n}"} for n in range(BACKGROUND_ROWS)))
+
+
+def _populate_target(manager, rows):
+    """创建被测的目标列表，每三条任务中一条已完成"""
+    manager.import_todos(TARGET_DATE, (
+        {'content': f"任务 {n}", 'completed': n % 3 == 0} for n in range(rows)
+    ))
+
+
+def _clone(source_path, target_path):
+    """用 SQLite 在线备份复制数据库文件（包括 WAL 中尚未写回的内容）"""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def _cold(manager):
+    """清空进程内的读缓存和列表目录，下一次读取会访问数据库"""
+    manager._read_cache.clear()
+    manager._reset_catalog()
+
+
+def _benchmarks(manager, service, rows):
+    """返回 [(名称, 每次调用的函数, 每次调用前的准备函数或None, 最大次数)]"""
+    first_id = manager.get_todos_for_date(TARGET_DATE, limit=1)[0]['id'] if rows else None
+    table, where, params = manager.engine.scoped(TARGET_DATE)
+    state = {'copies': 0, 'completed': False}
+
+    def toggle():
+        state['completed'] = not state['completed']
+        manager.update_todo(TARGET_DATE, first_id, completed=state['completed'])
+
+    def copy_list():
+        state['copies'] += 1
+        manager.copy_list(TARGET_DATE, f"copy-bench-{state['copies']:06d}")
+
+    def copy_todo():
+        # 与 POST /api/todos/<id>/copy 相同：读出原任务再追加一条
+        original = manager.get_todo(TARGET_DATE, first_id)
+        manager.add_todo_returning(TARGET_DATE, original['content'])
+
+    def clear_cache():
+        manager._read_cache.clear()
+
+    return [
+        ('get_todos_for_date', lambda: manager.get_todos_for_date(TARGET_DATE), None, None),
+        ('get_todos_for_date_uncached', lambda: manager.get_todos_for_date(TARGET_DATE), clear_cache, None),
+        ('get_todo_counts', manager.get_todo_counts, None, None),
+        ('get_todo_counts_uncached', manager.get_todo_counts, clear_cache, None),
+        ('get_available_dates', manager.get_available_dates, None, None),
+        ('get_available_dates_uncached', manager.get_available_dates, lambda: _cold(manager), None),
+        ('update_todo', toggle, None, None),
+        ('add_todo', lambda: manager.add_todo(TARGET_DATE, "新任务"), None, 500),
+        ('copy_todo', copy_todo, None, 500),
+        # 每次复制都会新建一个列表，次数少一些
+        ('copy_list', copy_list, None, 50),
+        ('db_service_query', lambda: service.execute_query(
+            f"SELECT id, content, completed FROM {table} {where} ORDER BY order_num, id", tuple(params)
+        ), None, None),
+    ]
+
+
+def _time(func, setup, min_time, min_iterations, max_iterations):
+    """重复调用直到累计 min_time 秒（至少 min_iterations 次），返回每次的耗时（秒）"""
+    func()  # 预热
+    samples = []
+    total = 0.0
+    while (total < min_time or len(samples) < min_iterations) and len(samples) < max_iterations:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+    return samples
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        'iterations': len(samples),
+        'median_us': round(statistics.median(ordered) * 1e6, 2),
+        'mean_us': round(statistics.fmean(ordered) * 1e6, 2),
+        'p95_us': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 2),
+        'min_us': round(ordered[0] * 1e6, 2),
+    }
+
+
+def prepare_background(engine_name, tables, workdir):
+    """准备含 tables-1 个背景列表的模板数据库，返回路径"""
+    db_path = os.path.join(workdir, f"{engine_name}-{tables}.db")
+    manager = DailyTodoManager(db_path, engine=get_engine(engine_name))
+    start = time.perf_counter()
+    _populate_background(manager, tables - 1)
+    manager.pool.close_all()
+    print(f"[{engine_name} tables={tables}] 准备背景列表 {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+    return db_path
+
+
+def run_case(engine_name, tables, rows, args, template_path):
+    """复制模板数据库、创建目标列表，跑完所有基准项"""
+    db_path = f"{template_path[:-len('.db')]}-{rows}.db"
+    _clone(template_path, db_path)
+    manager = DailyTodoManager(db_path, engine=get_engine(engine_name))
+    service = DatabaseService(db_path)
+    _populate_target(manager, rows)
+    print(f"[{engine_name} tables={tables} rows={rows}]", file=sys.stderr)
+
+    results = []
+    for name, func, setup, limit in _benchmarks(manager, service, rows):
+        if args.only and name not in args.only:
+            continue
+        if rows == 0 and name in ('update_todo', 'copy_todo'):
+            continue
+        samples = _time(func, setup, args.min_time, args.min_iterations,
+                        min(limit or args.max_iterations, args.max_iterations))
+        result = dict(name=name, engine=engine_name, tables=tables, rows=rows, **_summary(samples))
+        results.append(result)
+        print(f"  {name:<30} median {result['median_us']:>10.1f}us  p95 {result['p95_us']:>10.1f}us"
+              f"  n={result['iterations']}", file=sys.stderr)
+    manager.pool.close_all()
+    return results
+
+
+def _key(result):
+    return (result['name'], result['engine'], result['tables'], result['rows'])
+
+
+def compare(results, baseline, tolerance):
+    """返回回归项 [(结果, 基线中位数)]：中位数超过基线 (1 + tolerance) 倍且超出噪声下限"""
+    previous = {_key(item): item for item in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None:
+            continue
+        limit = max(old['median_us'] * (1 + tolerance), old['median_us'] + NOISE_FLOOR_US)
+        if result['median_us'] > limit:
+            regressions.append((result, old['median_us']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DailyTodoManager / DatabaseService 微基准测试")
+    parser.add_argument('--engines', nargs='+', default=['per_day', 'single_table'],
+                        choices=['per_day', 'single_table'], help="存储引擎")
+    parser.add_argument('--tables', nargs='+', type=int, default=[10, 100, 1000],
+                        help="列表（每日表）数量")
+    parser.add_argument('--rows', nargs='+', type=int, default=[10, 1000], help="被测列表的任务数")
+    parser.add_argument('--only', nargs='+', help="只运行这些基准项")
+    parser.add_argument('--min-time', type=float, default=0.2, help="每项至少累计计时的秒数")
+    parser.add_argument('--min-iterations', type=int, default=5)
+    parser.add_argument('--max-iterations', type=int, default=2000)
+    parser.add_argument('-o', '--output', help="结果 JSON 文件，默认写到标准输出")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果写入基线文件")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="允许的变慢比例（0.25 表示中位数慢 25%% 以内不算回归）")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='todo-bench-') as workdir:
+        for engine_name in args.engines:
+            for tables in args.tables:
+                tables = max(tables, 1)
+                template_path = prepare_background(engine_name, tables, workdir)
+                for rows in args.rows:
+                    results.extend(run_case(engine_name, tables, rows, args, template_path))
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"基线已保存: {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"没有基线文件 {args.baseline}，跳过比较（--save-baseline 保存）", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if not regressions:
+        print(f"与基线 {args.baseline} 相比没有回归", file=sys.stderr)
+        return 0
+    print(f"性能回归（容差 {args.tolerance:.0%}）:", file=sys.stderr)
+    for result, old_median in regressions:
+        print(f"  {result['name']} [{result['engine']} tables={result['tables']} rows={result['rows']}]: "
+              f"{old_median:.1f}us -> {result['median_us']:.1f}us "
+              f"({result['median_us'] / old_median - 1:+.0%})", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,51 @@ class Config:
     DB_POOL_SIZE = 10
     DB_TIMEOUT = 30
     
+    # SQLite 调优参数，连接池、DatabaseService 和 SQLAlchemy 的每个新连接都会执行
+    # WAL 让读写互不阻塞，synchronous=NORMAL 在 WAL 下只在检查点时 fsync
+    SQLITE_PRAGMAS = {
+        'busy_timeout': DB_TIMEOUT * 1000,  # 毫秒，遇到写锁时等待而不是立即报 database is locked
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,  # 负数单位为 KiB，约 16MB
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    
+    # 列表读缓存的最大条目数（每个列表一条），0 表示不缓存
+    READ_CACHE_SIZE = int(os.environ.get('READ_CACHE_SIZE', 256))
+    
+    # 导出内容按列表版本号缓存，超过这个大小的导出不缓存
+    EXPORT_CACHE_MAX_BYTES = 1024 * 1024
+    
+    # GET /api/todos 直接输出 SQLite JSON1 生成的 JSON 文本，不经过 Python 字典
+    # 默认关闭（使用 jsonify），设置 SQL_JSON_RESPONSES=1 开启；两种方式返回的数据相同
+    SQL_JSON_RESPONSES = os.environ.get('SQL_JSON_RESPONSES', '0') == '1'
+    
+    # 每天本地时间 0 点自动把前 ROLLOVER_DAYS 天未完成的任务转入当天
+    # ROLLOVER_MOVE=1 时从原来的日期中删除（移动），否则保留（复制）
+    ROLLOVER_AT_MIDNIGHT = os.environ.get('ROLLOVER_AT_MIDNIGHT', '0') == '1'
+    ROLLOVER_DAYS = int(os.environ.get('ROLLOVER_DAYS', 7))
+    ROLLOVER_MOVE = os.environ.get('ROLLOVER_MOVE', '0') == '1'
+    
+    # SQL 跟踪：记录每个 API 请求执行的语句、耗时和行数，
+    # 超过 SQL_SLOW_MS 毫秒的语句写入警告日志，并通过 Server-Timing 响应头返回数据库耗时
+    SQL_TRACE = os.environ.get('SQL_TRACE', '0') == '1'
+    SQL_SLOW_MS = float(os.environ.get('SQL_SLOW_MS', 100))
+    SQL_TRACE_SERVER_TIMING = os.environ.get('SQL_TRACE_SERVER_TIMING', '1') == '1'
+    
+    # 按需性能分析：请求带 X-Profile 头或 ?profile= 参数时用 cProfile/tracemalloc 分析该请求，
+    # 结果保存在 instance/profiles/，通过 /api/admin/profiles 查看；
+    # 设置 PROFILE_TOKEN 后参数值和查看接口的 X-Profile-Token 头都必须与它一致
+    PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
+    
+    # 存储引擎: per_day（每天一个表）或 single_table（单个 todos 表）
+    # per_day 每个列表增加一个表、一个索引和三个触发器，列表上千后新建列表和新连接明显变慢，
+    # 这时应使用 single_table（见 services/storage_engine.py）；从 per_day 切换前先运行 migrate_storage.py
+    TODO_STORAGE_ENGINE = os.environ.get('TODO_STORAGE_ENGINE', 'per_day')
+    
     # 安全配置
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = timedelta(hours=1)
@@ -44,12 +89,26 @@ class ProductionConfig(Config):
     # 生产环境特定配置
     TESTING = False
     WTF_CSRF_ENABLED = True
+    
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+    )
 
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    
+    # 测试数据不需要持久化保证，换取更快的写入
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        journal_mode='MEMORY',
+        synchronous='OFF',
+        mmap_size=0,
+    )
 
 # 配置映射
 config = {
@@ -59,3 +118,6 @@ config = {
     'default': DevelopmentConfig
 }
 
+def get_config(name=None):
+    """按名称返回配置类，不传时取环境变量 APP_CONFIG（默认 development）"""
+    return config[name or os.environ.get('APP_CONFIG', 'default')]
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+测试共用的 fixture：两种存储引擎下的管理器，以及使用临时数据库的接口客户端
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import routes
+from app import create_app
+from models import DailyTodoManager
+from services import connection_pool
+from services.storage_engine import PerDayTableEngine, SingleTableEngine
+
+
+@pytest.fixture(autouse=True)
+def pool_settings(monkeypatch):
+    """create_app 设置的连接池参数只在当前测试内有效"""
+    monkeypatch.setattr(connection_pool, '_pool_settings', {})
+
+
+@pytest.fixture(params=[PerDayTableEngine(), SingleTableEngine()], ids=lambda e: e.name)
+def engine(request):
+    return request.param
+
+
+@pytest.fixture
+def manager(tmp_path, engine):
+    """临时数据库上的管理器，每个测试在两种引擎下各跑一次"""
+    return DailyTodoManager(str(tmp_path / 'todos.db'), engine=engine)
+
+
+@pytest.fixture
+def api_manager(tmp_path, monkeypatch):
+    """接口使用的管理器换成临时数据库，不碰 instance/ 下的数据"""
+    manager = DailyTodoManager(str(tmp_path / 'api.db'))
+    monkeypatch.setattr(routes, 'todo_manager', manager)
+    return manager
+
+
+@pytest.fixture
+def client(api_manager):
+    return create_app('testing').test_client()
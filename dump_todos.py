@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+导出整个数据库的todos（备份或分析用）
+
+    python dump_todos.py                              # JSONL 输出到标准输出
+    python dump_todos.py --format csv -o todos.csv
+    python dump_todos.py --gzip -o todos.jsonl.gz
+"""
+import argparse
+import sys
+
+from models import DailyTodoManager
+from services.dump_service import FORMATS, dump_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出所有列表的todos")
+    parser.add_argument('--db', default='instance/todos_new.db', help="数据库文件路径")
+    parser.add_argument('--format', choices=list(FORMATS), default='jsonl', help="输出格式")
+    parser.add_argument('--gzip', action='store_true', help="gzip 压缩输出")
+    parser.add_argument('-o', '--output', help="输出文件，默认写到标准输出")
+    args = parser.parse_args()
+
+    manager = DailyTodoManager(args.db)
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in dump_chunks(manager.iter_all_todos(), args.format, args.gzip):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
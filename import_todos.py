@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+把 markdown 或 JSONL 文件导入到列表
+
+    python import_todos.py docs/07.28-todo.md --year 2025
+    python import_todos.py backup.jsonl.gz          # dump_todos.py 的输出，按 date 字段恢复
+    python import_todos.py notes.md --date copy-20250728-1
+"""
+import argparse
+import time
+
+from models import DailyTodoManager
+from services.import_service import import_stream, open_text
+
+
+def detect_format(path):
+    """根据扩展名判断格式（可带 .gz）"""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson')) else 'md'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入 markdown / JSONL 文件")
+    parser.add_argument('files', nargs='+', help="要导入的文件（.md / .jsonl，可带 .gz）")
+    parser.add_argument('--db', default='instance/todos_new.db', help="数据库文件路径")
+    parser.add_argument('--date', help="导入到指定列表（不指定时 markdown 取标题，JSONL 取 date 字段）")
+    parser.add_argument('--year', type=int, help="markdown 标题 MM.DD 所属的年份，默认今年")
+    args = parser.parse_args()
+
+    manager = DailyTodoManager(args.db)
+    for path in args.files:
+        start = time.perf_counter()
+        with open(path, 'rb') as raw:
+            lines = open_text(raw, compressed=path.endswith('.gz'))
+            imported = import_stream(manager, lines, detect_format(path), args.date, args.year)
+        elapsed = time.perf_counter() - start
+        total = sum(imported.values())
+        print(f"✓ {path}: {total} 项任务，{len(imported)} 个列表，用时 {elapsed:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
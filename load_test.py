@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+端到端并发压测 - 按操作比例从多个线程/进程调用 API，报告吞吐量、延迟分位数和错误
+
+    python load_test.py                                   # 进程内测试客户端，临时数据库
+    python load_test.py --threads 16 --duration 30
+    python load_test.py --processes 4 --threads 8         # 多进程共用同一个数据库文件
+    python load_test.py --url http://127.0.0.1:5990       # 压测已经启动的服务
+    python load_test.py --mix sidebar=50,read=30,toggle=10,add=10 --json result.json
+
+测试数据放在 --start-date 开始的连续日期中，结束后删除（--keep 保留）。
+测试客户端模式下异常直接抛到客户端，"database is locked" 可以准确计数；
+压测外部服务时只能从 500 响应的内容中识别。日期别名仍使用应用配置的数据库。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+DEFAULT_MIX = 'sidebar=30,read=35,toggle=15,add=10,copy=7,copy_date=3'
+LOCKED_MESSAGE = 'database is locked'
+
+_app = None
+
+
+def _load_app(workdir):
+    """在 workdir 中导入应用：DailyTodoManager 的相对路径 instance/todos_new.db 落在这里"""
+    global _app
+    if _app is None:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        os.chdir(workdir)
+        from app import app
+        from models import db
+        with app.app_context():
+            db.create_all()
+        # 让异常直接抛给测试客户端，以便识别 database is locked
+        app.config['PROPAGATE_EXCEPTIONS'] = True
+        _app = app
+    return _app
+
+
+class ClientTransport:
+    """Flask 测试客户端（每个线程一个）"""
+
+    def __init__(self, workdir):
+        self.client = _load_app(workdir).test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+
+class HttpTransport:
+    """通过 HTTP 访问已启动的服务"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def make_transport(options):
+    if options['url']:
+        return HttpTransport(options['url'], options['timeout'])
+    return ClientTransport(options['workdir'])
+
+
+def parse_mix(text):
+    """"sidebar=30,read=40" -> {'sidebar': 30.0, 'read': 40.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"未知操作: {name}（可选: {', '.join(OPERATIONS)}）")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("操作比例不能全为 0")
+    return mix
+
+
+class ListState:
+    """压测日期及其中的任务ID（添加、复制后追加）"""
+
+    def __init__(self, dates, ids):
+        self.dates = dates
+        self.ids = ids
+        self._lock = threading.Lock()
+
+    def pick(self, rng):
+        list_id = rng.choice(self.dates)
+        with self._lock:
+            ids = self.ids[list_id]
+            return list_id, (rng.choice(ids) if ids else None)
+
+    def added(self, list_id, body):
+        try:
+            todo_id = json.loads(body)['id']
+        except (ValueError, KeyError, TypeError):
+            return
+        with self._lock:
+            self.ids[list_id].append(todo_id)
+
+
+def _check(status, body):
+    """2xx/304 返回 None，否则返回错误类别"""
+    if status < 400:
+        return None
+    if LOCKED_MESSAGE.encode() in body:
+        return f"HTTP {status}: {LOCKED_MESSAGE}"
+    return f"HTTP {status}"
+
+
+def op_sidebar(transport, state, rng):
+    """侧边栏加载：计数 + 日期别名"""
+    error = _check(*transport.request('GET', '/api/todos/counts'))
+    return error or _check(*transport.request('GET', '/api/date-aliases'))
+
+
+def op_read(transport, state, rng):
+    list_id, _ = state.pick(rng)
+    return _check(*transport.request('GET', f'/api/todos?date={list_id}'))
+
+
+def op_toggle(transport, state, rng):
+    list_id, todo_id = state.pick(rng)
+    if todo_id is None:
+        return None
+    return _check(*transport.request('PUT', f'/api/todos/{todo_id}',
+                                     {'date': list_id, 'completed': rng.random() < 0.5}))
+
+
+def op_add(transport, state, rng):
+    list_id, _ = state.pick(rng)
+    status, body = transport.request('POST', '/api/todos', {'date': list_id, 'content': "压测任务"})
+    if status < 400:
+        state.added(list_id, body)
+    return _check(status, body)
+
+
+def op_copy(transport, state, rng):
+    """复制单个任务（POST /api/todos/<id>/copy）"""
+    list_id, todo_id = state.pick(rng)
+    if todo_id is None:
+        return None
+    status, body = transport.request('POST', f'/api/todos/{todo_id}/copy?date={list_id}')
+    if status < 400:
+        state.added(list_id, body)
+    return _check(status, body)
+
+
+def op_copy_date(transport, state, rng):
+    """复制整个列表到另一个压测日期"""
+    source, target = rng.sample(state.dates, 2) if len(state.dates) > 1 else (state.dates[0],) * 2
+    return _check(*transport.request('POST', '/api/todos/copy-date',
+                                     {'source_date': source, 'target_date': target}))
+
+
+OPERATIONS = {
+    'sidebar': op_sidebar,
+    'read': op_read,
+    'toggle': op_toggle,
+    'add': op_add,
+    'copy': op_copy,
+    'copy_date': op_copy_date,
+}
+
+
+def seed(transport, dates, todos_per_list):
+    """在每个压测日期中添加任务，返回 {日期: [任务ID]}"""
+    ids = {}
+    for list_id in dates:
+        ids[list_id] = []
+        for n in range(todos_per_list):
+            status, body = transport.request('POST', '/api/todos', {'date': list_id, 'content': f"压测任务 {n}"})
+            if status >= 400:
+                raise RuntimeError(f"准备数据失败: HTTP {status} {body[:200]!r}")
+            ids[list_id].append(json.loads(body)['id'])
+    return ids
+
+
+def cleanup(transport, dates):
+    for list_id in dates:
+        transport.request('DELETE', f'/api/todos/date/{list_id}')
+
+
+def _worker(options, state, deadline, seed_value, samples, errors, lock):
+    """一个线程：按比例随机选择操作直到 deadline"""
+    rng = random.Random(seed_value)
+    transport = make_transport(options)
+    names = list(options['mix'])
+    weights = [options['mix'][name] for name in names]
+    local_samples = defaultdict(list)
+    local_errors = Counter()
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            error = OPERATIONS[name](transport, state, rng)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        local_samples[name].append(time.perf_counter() - start)
+        if error:
+            local_errors[(name, error)] += 1
+    with lock:
+        for name, values in local_samples.items():
+            samples[name].extend(values)
+        errors.update(local_errors)
+
+
+def run_process(options, ids, process_index):
+    """一个进程：启动 options['threads'] 个线程，返回 (每种操作的耗时列表, 错误计数, 实际时长)"""
+    state = ListState(list(ids), {list_id: list(todo_ids) for list_id, todo_ids in ids.items()})
+    samples = defaultdict(list)
+    errors = Counter()
+    lock = threading.Lock()
+    make_transport(options)  # 先在主线程中导入应用
+    start = time.perf_counter()
+    deadline = start + options['duration']
+    threads = [
+        threading.Thread(target=_worker, args=(
+            options, state, deadline, options['seed'] + process_index * 1000 + i, samples, errors, lock
+        ))
+        for i in range(options['threads'])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(samples), errors, time.perf_counter() - start
+
+
+def _run_process_star(arguments):
+    return run_process(*arguments)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples, errors, elapsed):
+    """汇总为报告字典（耗时单位毫秒）"""
+    def stats(values, error_count):
+        ordered = sorted(values)
+        return {
+            'count': len(ordered),
+            'errors': error_count,
+            'error_rate': round(error_count / len(ordered), 4) if ordered else 0.0,
+            'throughput_per_s': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+            'p90_ms': round(percentile(ordered, 0.90) * 1000, 3),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        }
+
+    errors_by_op = Counter()
+    for (name, kind), count in errors.items():
+        errors_by_op[name] += count
+    all_values = [value for values in samples.values() for value in values]
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'total': stats(all_values, sum(errors.values())),
+        'operations': {name: stats(values, errors_by_op[name]) for name, values in sorted(samples.items())},
+        'database_locked': sum(count for (name, kind), count in errors.items() if LOCKED_MESSAGE in kind),
+        'errors': [
+            {'operation': name, 'error': kind, 'count': count}
+            for (name, kind), count in errors.most_common()
+        ],
+    }
+
+
+def print_report(report, options):
+    target = options['url'] or f"测试客户端 ({options['workdir']})"
+    print(f"目标: {target}")
+    print(f"{options['processes']} 个进程 x {options['threads']} 个线程, {report['elapsed_s']}s")
+    print(f"{'operation':<12}{'count':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+          f"{'max ms':>10}{'errors':>9}")
+    rows = list(report['operations'].items()) + [('total', report['total'])]
+    for name, item in rows:
+        print(f"{name:<12}{item['count']:>8}{item['throughput_per_s']:>10.1f}{item['p50_ms']:>10.2f}"
+              f"{item['p90_ms']:>10.2f}{item['p99_ms']:>10.2f}{item['max_ms']:>10.2f}"
+              f"{item['error_rate']:>9.2%}")
+    print(f"database is locked: {report['database_locked']} 次")
+    for item in report['errors'][:10]:
+        print(f"  {item['count']:>6} x {item['operation']}: {item['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Todo API 并发压测")
+    parser.add_argument('--url', help="已启动服务的地址（如 http://127.0.0.1:5990），不指定时使用进程内测试客户端")
+    parser.add_argument('--workdir', help="测试客户端模式的工作目录（数据库在其中的 instance/ 下），默认临时目录")
+    parser.add_argument('--threads', type=int, default=8, help="每个进程的线程数")
+    parser.add_argument('--processes', type=int, default=1, help="进程数")
+    parser.add_argument('--duration', type=float, default=10.0, help="压测时长（秒）")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"操作比例（默认 {DEFAULT_MIX}）")
+    parser.add_argument('--lists', type=int, default=7, help="压测使用的日期数")
+    parser.add_argument('--todos', type=int, default=30, help="每个日期预先添加的任务数")
+    parser.add_argument('--start-date', default='2099-01-01', help="压测日期从这一天开始")
+    parser.add_argument('--seed', type=int, default=1, help="随机数种子")
+    parser.add_argument('--timeout', type=float, default=30.0, help="HTTP 请求超时（秒）")
+    parser.add_argument('--keep', action='store_true', help="结束后保留压测数据")
+    parser.add_argument('--json', help="把报告另存为 JSON 文件")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    workdir = None
+    temp_dir = None
+    if not args.url:
+        if args.workdir:
+            workdir = os.path.abspath(args.workdir)
+        else:
+            temp_dir = tempfile.TemporaryDirectory(prefix='todo-load-')
+            workdir = temp_dir.name
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    options = {
+        'url': args.url,
+        'workdir': workdir,
+        'timeout': args.timeout,
+        'threads': args.threads,
+        'processes': args.processes,
+        'duration': args.duration,
+        'mix': mix,
+        'seed': args.seed,
+    }
+    first = date.fromisoformat(args.start_date)
+    dates = [(first + timedelta(days=i)).isoformat() for i in range(args.lists)]
+
+    transport = make_transport(options)
+    print(f"准备数据: {len(dates)} 个日期 x {args.todos} 个任务", file=sys.stderr)
+    ids = seed(transport, dates, args.todos)
+
+    try:
+        if args.processes > 1:
+            # spawn：子进程各自导入应用、打开自己的连接池
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(args.processes) as pool:
+                outputs = pool.map(_run_process_star,
+                                   [(options, ids, index) for index in range(args.processes)])
+        else:
+            outputs = [run_process(options, ids, 0)]
+    finally:
+        if not args.keep:
+            cleanup(transport, dates)
+
+    samples = defaultdict(list)
+    errors = Counter()
+    for process_samples, process_errors, elapsed in outputs:
+        for name, values in process_samples.items():
+            samples[name].extend(values)
+        errors.update(process_errors)
+    report = summarize(samples, errors, max(elapsed for _, _, elapsed in outputs))
+    report['config'] = {key: value for key, value in options.items() if key != 'workdir'}
+
+    print_report(report, options)
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+把每日表（todo_YYYY_MM_DD / todo_copy_xxx）迁移到单表存储引擎
+
+- 分批复制，每批一个短事务，应用可以继续在每日表引擎上运行
+- 进度记录在 storage_migration 表中，中断后重新运行会从断点继续
+- 以 (list_id, source_id) 做 upsert，重复运行是幂等的
+- 迁移期间 todos 表上不安装触发器，计数等派生数据仍归每日表引擎维护；
+  应用切换到单表引擎启动时会从 todos 重建一次
+- 迁移期间被删除的列表（旧表已不存在），其已复制的行会从 todos 中删除
+- 单表引擎接管后（storage_meta.derived_engine）拒绝再复制或同步，
+  否则旧表中的数据会覆盖单表引擎上的新修改；此时只允许 --drop-legacy
+
+典型流程:
+    python migrate_storage.py              # 在线复制（可多次运行）
+    # 停止应用，确保切换前没有新的写入
+    python migrate_storage.py --finalize   # 同步迁移期间的修改和删除
+    # 设置 TODO_STORAGE_ENGINE=single_table 并启动应用
+    python migrate_storage.py --drop-legacy
+"""
+import argparse
+from datetime import datetime
+
+from services.connection_pool import get_pool
+from services.storage_engine import (
+    PerDayTableEngine, SingleTableEngine, ensure_common_schema, register_list
+)
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS storage_migration (
+    list_id TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    copied INTEGER NOT NULL DEFAULT 0,
+    synced_at DATETIME NULL
+)
+"""
+
+COLUMNS = "content, completed, order_num, created_at, completed_at"
+
+UPSERT_TAIL = """
+ON CONFLICT (list_id, source_id) DO UPDATE SET
+    content = excluded.content,
+    completed = excluded.completed,
+    order_num = excluded.order_num,
+    created_at = excluded.created_at,
+    completed_at = excluded.completed_at
+"""
+
+legacy = PerDayTableEngine()
+target = SingleTableEngine()
+
+
+class MigrationError(Exception):
+    """单表引擎已经接管，不能再从旧表复制"""
+
+
+def _derived_owner(conn):
+    """维护派生数据的引擎名称（从未启动过应用时为 None）"""
+    row = conn.execute(
+        "SELECT value FROM storage_meta WHERE key = 'derived_engine'"
+    ).fetchone()
+    return row[0].split(':')[0] if row else None
+
+
+def _remove_dropped_lists(conn, list_ids):
+    """删除旧表已不存在的列表在 todos 中的已复制行，返回这些列表"""
+    dropped = [list_id for (list_id,) in conn.execute(
+        "SELECT list_id FROM storage_migration ORDER BY list_id"
+    ) if list_id not in list_ids]
+    for list_id in dropped:
+        conn.execute(
+            f"DELETE FROM {target.TABLE} WHERE list_id = ? AND source_id IS NOT NULL", (list_id,)
+        )
+        conn.execute("DELETE FROM storage_migration WHERE list_id = ?", (list_id,))
+    return dropped
+
+
+def _copy_batch(conn, list_id, batch_size):
+    """复制一批 id 大于断点的行，返回本批行数"""
+    table = legacy.table_name(list_id)
+    last_id = conn.execute(
+        "SELECT last_id FROM storage_migration WHERE list_id = ?", (list_id,)
+    ).fetchone()[0]
+
+    batch_max, batch_count = conn.execute(f"""
+    SELECT MAX(id), COUNT(*) FROM (
+        SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?
+    )
+    """, (last_id, batch_size)).fetchone()
+    if not batch_count:
+        return 0
+
+    conn.execute(f"""
+    INSERT INTO {target.TABLE} (list_id, {COLUMNS}, source_id)
+    SELECT ?, {COLUMNS}, id FROM {table}
+    WHERE id > ? AND id <= ?
+    {UPSERT_TAIL}
+    """, (list_id, last_id, batch_max))
+
+    conn.execute("""
+    UPDATE storage_migration SET last_id = ?, copied = copied + ?
+    WHERE list_id = ?
+    """, (batch_max, batch_count, list_id))
+    return batch_count
+
+
+def _sync_list(conn, list_id):
+    """在一个事务内追平迁移期间对已复制行的修改和删除"""
+    table = legacy.table_name(list_id)
+    conn.execute(f"""
+    INSERT INTO {target.TABLE} (list_id, {COLUMNS}, source_id)
+    SELECT ?, {COLUMNS}, id FROM {table} WHERE true
+    {UPSERT_TAIL}
+    """, (list_id,))
+    conn.execute(f"""
+    DELETE FROM {target.TABLE}
+    WHERE list_id = ? AND source_id IS NOT NULL
+      AND source_id NOT IN (SELECT id FROM {table})
+    """, (list_id,))
+    max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    conn.execute("""
+    UPDATE storage_migration SET last_id = MAX(last_id, ?), synced_at = ?
+    WHERE list_id = ?
+    """, (max_id, datetime.now().isoformat(), list_id))
+
+
+def migrate(db_path, batch_size=500, finalize=False, drop_legacy=False):
+    """迁移所有每日表"""
+    pool = get_pool(db_path)
+
+    with pool.connection() as conn:
+        ensure_common_schema(conn)
+        target.create_tables(conn)
+        conn.execute(STATE_SCHEMA)
+        conn.commit()
+        owner = _derived_owner(conn)
+
+    if owner == target.name:
+        if not drop_legacy:
+            raise MigrationError("单表引擎已经在使用 todos 表，不能再从旧表复制或同步（只能 --drop-legacy）")
+        _drop_legacy(pool)
+        print("迁移完成")
+        return
+
+    with pool.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        list_ids = legacy.scan_tables(conn)
+        dropped = _remove_dropped_lists(conn, set(list_ids))
+        conn.commit()
+
+    print(f"发现 {len(list_ids)} 个每日表")
+    for list_id in dropped:
+        print(f"  ✗ {list_id}: 旧表已删除，已清除复制的行")
+
+    for list_id in list_ids:
+        with pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR IGNORE INTO storage_migration (list_id) VALUES (?)", (list_id,)
+            )
+            register_list(conn, list_id)
+            conn.commit()
+
+            # 每批单独提交，写锁只持有很短的时间
+            copied = 0
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                count = _copy_batch(conn, list_id, batch_size)
+                conn.commit()
+                if count == 0:
+                    break
+                copied += count
+
+            if finalize:
+                conn.execute("BEGIN IMMEDIATE")
+                _sync_list(conn, list_id)
+                conn.commit()
+
+        print(f"  ✓ {list_id}: 本次复制 {copied} 行" + ("，已同步" if finalize else ""))
+
+    if drop_legacy:
+        _drop_legacy(pool)
+
+    print("迁移完成")
+
+
+def _drop_legacy(pool):
+    """删除已经同步过的每日表"""
+    with pool.connection() as conn:
+        synced = conn.execute(
+            "SELECT list_id FROM storage_migration WHERE synced_at IS NOT NULL"
+        ).fetchall()
+        for (list_id,) in synced:
+            # 只删物理表；table_registry 中的登记仍由单表引擎使用
+            conn.execute(f"DROP TABLE IF EXISTS {legacy.table_name(list_id)}")
+            print(f"  已删除旧表: {legacy.table_name(list_id)}")
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="迁移每日表到单表存储引擎")
+    parser.add_argument('--db', default='instance/todos_new.db', help="数据库文件路径")
+    parser.add_argument('--batch-size', type=int, default=500, help="每批复制的行数")
+    parser.add_argument('--finalize', action='store_true', help="同步迁移期间的修改和删除")
+    parser.add_argument('--drop-legacy', action='store_true', help="删除已同步的旧表")
+    args = parser.parse_args()
+
+    try:
+        migrate(args.db, args.batch_size, args.finalize, args.drop_legacy)
+    except MigrationError as e:
+        parser.exit(1, f"错误: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,83 @@
 新的数据库模型 - 每天一个表的设计
 """
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import html
+import re
+import threading
+import time
 import os
 import uuid
 
+from config import Config
+from services.connection_pool import get_pool
+from services.metrics import timed_commit
+from services.markdown_format import markdown_title, render_markdown
+from services.read_cache import VersionedLRUCache
+from services.storage_engine import CATALOG_VERSION_KEY, GLOBAL_VERSION_KEY, get_engine, is_registered
+
 db = SQLAlchemy()
 
+# todo 行的列顺序，与 DailyTodoManager._row_to_todo 对应
+TODO_COLUMNS = "id, content, completed, order_num, created_at, completed_at"
+
+# JSON1 快速路径中接口字段与 SQL 表达式的对应关系，字段顺序与 _row_to_todo 一致
+TODO_JSON_FIELDS = [
+    ('id', 'id'),
+    ('content', 'content'),
+    ('completed', "json(CASE WHEN completed THEN 'true' ELSE 'false' END)"),
+    ('order', 'order_num'),
+    ('created_at', 'created_at'),
+    ('completed_at', 'completed_at'),
+]
+
+# 按列表缓存的读缓存键: (类别, 列表标识符, ...)，列表删除时按前两项清除
+LIST_CACHE_KINDS = ('list', 'json', 'markdown')
+
+# 相邻任务 order_num 的间隔；移动时取两个邻居的中间值，间隔用完才重新编号
+ORDER_GAP = 1024
+
+# 搜索片段：先用控制字符标出匹配，转义 HTML 之后再换成 <mark>，任务内容中的标签不会生效
+SNIPPET_MARKS = ('\x02', '\x03')
+# 片段长度（字符数，trigram 分词下与 snippet() 的词数相当）
+SNIPPET_CHARS = 16
+
+
+def _marked_html(text):
+    """把带控制字符标记的文本转义为 HTML，标记换成 <mark></mark>"""
+    start, end = SNIPPET_MARKS
+    return html.escape(text).replace(start, '<mark>').replace(end, '</mark>')
+
+
+def _highlight(content, terms):
+    """在 Python 中生成片段（子串匹配路径），形式与 FTS5 snippet() 相同：
+    截取第一个匹配附近 SNIPPET_CHARS 个字符，转义后高亮，截断处加省略号
+    """
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)),
+                         re.IGNORECASE)
+    matches = list(pattern.finditer(content))
+    start = 0
+    if matches:
+        start = max(0, min(matches[0].start() - SNIPPET_CHARS // 4, len(content) - SNIPPET_CHARS))
+    end = start + SNIPPET_CHARS
+    
+    parts = ['…'] if start > 0 else []
+    position = start
+    for match in matches:
+        match_start, match_end = max(match.start(), start), min(match.end(), end)
+        if match_start >= end:
+            break
+        if match_end <= match_start:
+            continue
+        parts.append(html.escape(content[position:match_start]))
+        parts.append(f"<mark>{html.escape(content[match_start:match_end])}</mark>")
+        position = match_end
+    parts.append(html.escape(content[position:end]))
+    if end < len(content):
+        parts.append('…')
+    return ''.join(parts)
+
 class TableRegistry(db.Model):
     """表注册表 - 记录所有todo表的元信息"""
     __tablename__ = 'table_registry'
@@ -52,31 +122,239 @@ class DateAlias(db.Model):
         }
 
 class DailyTodoManager:
-    """每日Todo管理器 - 处理动态表操作，支持UUID表名"""
+    """每日Todo管理器 - 处理动态表操作，支持UUID表名
     
-    def __init__(self, db_path='instance/todos_new.db'):
+    具体的表结构由存储引擎决定（见 services/storage_engine.py），
+    通过 Config.TODO_STORAGE_ENGINE 选择。
+    """
+    
+    def __init__(self, db_path='instance/todos_new.db', engine=None):
         self.db_path = db_path
         self.ensure_db_exists()
+        self.engine = engine or get_engine(Config.TODO_STORAGE_ENGINE)
+        # 与 DatabaseService 共享同一个连接池
+        self.pool = get_pool(db_path)
+        self._local = threading.local()
+        self._schema_ready = False
+        # 内存中的列表目录（来自 table_registry），首次使用时加载
+        self._catalog = None
+        self._catalog_version = None
+        self._sorted_ids = None
+        self._catalog_lock = threading.Lock()
+        self._instance_id = None
+        # 列表内容和计数的读缓存，用 list_versions 中的版本号校验
+        self._read_cache = VersionedLRUCache(Config.READ_CACHE_SIZE)
     
     def ensure_db_exists(self):
         """确保数据库文件存在"""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
     
+    @contextmanager
+    def _connect(self):
+        """从连接池获取连接，正常退出时提交，异常时回滚
+        
+        同一线程内的嵌套调用复用外层的连接和事务，
+        所以一个请求里的 table_exists/建表/插入只占用一个连接。
+        事务中创建/删除的列表在最外层提交后才发布到共享的列表目录。
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            self._local.pending = {}
+            self._local.view = None
+            try:
+                if not self._schema_ready:
+                    self.engine.ensure_schema(conn)
+                    self._schema_ready = True
+                yield conn
+                timed_commit(conn)
+                self._publish_pending()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._local.conn = None
+                self._local.pending = {}
+                self._local.view = None
+    
+    def _ensure_schema(self):
+        """不经过 _connect 的流式读取在开始前确保公共表已建好（新数据库上也能读）"""
+        if not self._schema_ready:
+            with self._connect():
+                pass
+    
+    @contextmanager
+    def transaction(self):
+        """显式写事务：块内所有管理器调用共用一个连接，整体提交或回滚
+        
+        使用 BEGIN IMMEDIATE 在开始时就拿到写锁，避免中途升级锁失败。
+        """
+        with self._connect() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+    
+    @contextmanager
+    def savepoint(self):
+        """事务中的保存点：块内抛出异常时只撤销块内的修改（包括挂起的列表目录修改），异常继续抛出"""
+        with self.transaction() as conn:
+            pending = dict(self._local.pending)
+            view = self._local.view
+            if view is not None:
+                view = (view[0], set(view[1]), view[2])
+            conn.execute("SAVEPOINT todo_savepoint")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK TO todo_savepoint")
+                conn.execute("RELEASE todo_savepoint")
+                self._local.pending = pending
+                self._local.view = view
+                raise
+            conn.execute("RELEASE todo_savepoint")
+    
+    def _scoped(self, list_id, *conditions):
+        """返回 (表名, WHERE子句, 参数)，见 StorageEngine.scoped"""
+        return self.engine.scoped(list_id, *conditions)
+    
+    def _list_catalog(self):
+        """返回内存中的列表目录（集合）
+        
+        首次调用时从 table_registry 加载；之后每次先比对目录版本号，
+        其他进程创建或删除了列表时重新加载。
+        连接上有未提交的事务时返回本线程事务内的目录（见 _transaction_catalog）。
+        """
+        with self._connect() as conn:
+            version = self._read_version(conn, CATALOG_VERSION_KEY)
+            if conn.in_transaction:
+                return self._transaction_catalog(conn, version)
+            catalog = self._catalog
+            if catalog is None or self._catalog_version != version:
+                ids = self.engine.list_ids(conn)
+                with self._catalog_lock:
+                    self._catalog = catalog = set(ids)
+                    self._catalog_version = version
+                    self._sorted_ids = None
+        return catalog
+    
+    def _transaction_catalog(self, conn, version):
+        """事务内看到的目录：共享目录的副本加上本事务的修改，不对其他线程可见
+        
+        (版本号, 目录, 起始共享版本号) 保存在 self._local.view 中，事务内重复使用。
+        """
+        view = self._local.view
+        if view is not None and view[0] == version:
+            return view[1]
+        with self._catalog_lock:
+            if self._catalog is not None and self._catalog_version == version:
+                catalog, base_version = set(self._catalog), version
+            else:
+                catalog, base_version = None, None
+        if catalog is None:
+            catalog = set(self.engine.list_ids(conn))
+        self._local.view = (version, catalog, base_version)
+        return catalog
+    
+    def _catalog_changed(self, list_id, added):
+        """记录列表的创建/删除：在事务中时先挂起，提交后再发布"""
+        if getattr(self._local, 'conn', None) is not None:
+            conn = self._local.conn
+            self._local.pending[list_id] = added
+            view = self._local.view
+            if view is not None:
+                version, catalog, base_version = view
+                if added:
+                    catalog.add(list_id)
+                else:
+                    catalog.discard(list_id)
+                self._local.view = (self._read_version(conn, CATALOG_VERSION_KEY), catalog, base_version)
+            return
+        self._apply_catalog_changes({list_id: added})
+    
+    def _catalog_add(self, list_id):
+        self._catalog_changed(list_id, True)
+    
+    def _catalog_discard(self, list_id):
+        self._catalog_changed(list_id, False)
+    
+    def _publish_pending(self):
+        """最外层事务提交后把挂起的目录修改应用到共享目录"""
+        pending = self._local.pending
+        if not pending:
+            return
+        view = self._local.view
+        # 事务内的目录由当前共享目录推导而来时，提交后的版本号就是事务内的版本号
+        new_version = view[0] if view is not None else None
+        base_version = view[2] if view is not None else None
+        self._apply_catalog_changes(pending, base_version, new_version)
+    
+    def _apply_catalog_changes(self, changes, base_version=None, new_version=None):
+        with self._catalog_lock:
+            if self._catalog is not None:
+                for list_id, added in changes.items():
+                    if added:
+                        self._catalog.add(list_id)
+                    else:
+                        self._catalog.discard(list_id)
+                if base_version is not None and self._catalog_version == base_version:
+                    self._catalog_version = new_version
+            self._sorted_ids = None
+    
+    def _reset_catalog(self):
+        with self._catalog_lock:
+            self._catalog = None
+            self._sorted_ids = None
+    
+    @staticmethod
+    def _read_version(conn, key):
+        """读取 list_versions 中的版本号，没有记录时为0"""
+        row = conn.execute(
+            "SELECT version FROM list_versions WHERE list_id = ?", (key,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def _cached_read(self, cache_key, version_key, load):
+        """先比对版本号再决定是否使用缓存，未命中时调用 load() 并写入缓存
+        
+        连接上有未提交的事务时不读也不写缓存：事务中的版本号可能随回滚作废。
+        先读版本号后读数据，数据只可能比版本号新，下次读取时会因版本不一致而重新加载。
+        """
+        with self._connect() as conn:
+            if conn.in_transaction:
+                return load()
+            version = self._read_version(conn, version_key)
+            value = self._read_cache.get(cache_key, version)
+            if value is None:
+                value = load()
+                self._read_cache.put(cache_key, version, value)
+        return value
+    
+    def pool_stats(self):
+        """连接池命中/未命中/等待统计"""
+        return self.pool.stats()
+    
+    def cache_stats(self):
+        """读缓存命中/未命中/淘汰统计"""
+        return self._read_cache.stats()
+    
     def get_table_name_by_id(self, table_id):
         """根据表ID生成实际的表名"""
-        return f"todo_{table_id.replace('-', '_')}"
+        return self.engine.table_name(table_id)
     
     def get_table_name(self, date_str):
         """兼容旧系统：根据日期或唯一标识符生成表名"""
         # 处理新的复制标识符格式：copy-YYYYMMDD-timestamp
         # 以及传统日期格式：YYYY-MM-DD
-        return f"todo_{date_str.replace('-', '_')}"
+        return self.engine.table_name(date_str)
     
     def create_table_for_date(self, date_str):
         """为指定日期创建表（简化版本，兼容旧系统和新的复制标识符）"""
-        table_name = self.get_table_name(date_str)
-        self._create_physical_table(table_name)
-        return table_name
+        self._create_list(date_str)
+        return self.get_table_name(date_str)
     
     def create_copy_table(self, source_table_id, display_name):
         """创建复制表"""
@@ -97,30 +375,27 @@ class DailyTodoManager:
             db.session.commit()
             
             # 创建实际的数据库表
+            self._create_list(new_table_id)
             new_table_name = self.get_table_name_by_id(new_table_id)
-            self._create_physical_table(new_table_name)
             
             return new_table_id, new_table_name
     
-    def _create_physical_table(self, table_name):
-        """创建物理数据库表"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        create_sql = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT NOT NULL,
-            completed BOOLEAN DEFAULT 0,
-            order_num INTEGER DEFAULT 0,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            completed_at DATETIME NULL
-        )
-        """
-        
-        cursor.execute(create_sql)
-        conn.commit()
-        conn.close()
+    def _create_list(self, list_id, **registry_fields):
+        """创建并登记列表（每日引擎下即物理表），已存在时直接返回"""
+        if list_id in self._list_catalog():
+            return
+        with self._connect() as conn:
+            self.engine.create_list(conn, list_id, **registry_fields)
+        self._catalog_add(list_id)
+    
+    def new_copy_list_id(self):
+        """生成复制列表的唯一标识符：copy-YYYYMMDD-毫秒时间戳（与前端格式一致）"""
+        date_prefix = datetime.now().strftime('%Y%m%d')
+        timestamp = int(time.time() * 1000)
+        catalog = self._list_catalog()
+        while f"copy-{date_prefix}-{timestamp}" in catalog:
+            timestamp += 1
+        return f"copy-{date_prefix}-{timestamp}"
     
     def format_date_for_display(self, date_str):
         """格式化日期用于显示"""
@@ -132,171 +407,472 @@ class DailyTodoManager:
     
     def table_exists_by_id(self, table_id):
         """检查指定表ID的表是否存在"""
-        table_name = self.get_table_name_by_id(table_id)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='table' AND name=?
-        """, (table_name,))
+        return self.table_exists(table_id)
+    
+    def table_exists(self, date_str):
+        """检查指定日期的表是否存在（兼容旧系统），直接查内存目录"""
+        return date_str in self._list_catalog()
+    
+    @staticmethod
+    def _row_to_todo(row, list_key, list_id):
+        """把一行 TODO_COLUMNS 转换为接口使用的字典"""
+        return {
+            'id': row[0],
+            'content': row[1],
+            'completed': bool(row[2]),
+            'order': row[3],
+            list_key: list_id,
+            'created_at': row[4],
+            'completed_at': row[5]
+        }
+    
+    @staticmethod
+    def _field_names(list_key):
+        """接口字段的默认顺序（与 _row_to_todo 一致），也是 fields 参数的可选值"""
+        names = [name for name, expr in TODO_JSON_FIELDS]
+        names.insert(4, list_key)
+        return names
+    
+    def _page_scope(self, list_id, after=None, completed=None):
+        """返回 (表名, WHERE子句, 参数)：列表范围 + keyset 游标 + 完成状态过滤"""
+        conditions = []
+        extra = []
+        if after is not None:
+            # 行值比较可以直接使用 (order_num, id) 索引定位到游标之后
+            conditions.append('(order_num, id) > (?, ?)')
+            extra.extend(after)
+        if completed is not None:
+            conditions.append('(completed != 0) = ?')
+            extra.append(1 if completed else 0)
+        table, where, params = self._scoped(list_id, *conditions)
+        return table, where, params + extra
+    
+    def _fetch_page(self, list_id, list_key, limit=None, after=None, completed=None, fields=None):
+        """按 (order_num, id) 顺序读取一页，返回 (字典列表, 下一页游标)"""
+        table, where, params = self._page_scope(list_id, after, completed)
+        limit_clause = ''
+        if limit is not None:
+            # 多取一行，用来判断是否还有下一页
+            limit_clause = 'LIMIT ?'
+            params.append(limit + 1)
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+            SELECT {TODO_COLUMNS}
+            FROM {table}
+            {where}
+            ORDER BY order_num, id
+            {limit_clause}
+            """, params).fetchall()
         
-        exists = cursor.fetchone() is not None
-        conn.close()
+        next_after = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1][3], rows[-1][0])
         
-        return exists
+        todos = [self._row_to_todo(row, list_key, list_id) for row in rows]
+        if fields:
+            todos = [{name: todo[name] for name in fields} for todo in todos]
+        return todos, next_after
     
-    def table_exists(self, date_str):
-        """检查指定日期的表是否存在（兼容旧系统）"""
-        table_name = self.get_table_name(date_str)
+    def _fetch_page_json(self, list_id, list_key, limit=None, after=None, completed=None, fields=None):
+        """同 _fetch_page，但 JSON 数组文本由 SQLite 的 json_group_array/json_object 直接生成"""
+        expressions = dict(TODO_JSON_FIELDS)
+        pairs = []
+        pair_params = []
+        for name in fields or self._field_names(list_key):
+            if name == list_key:
+                pairs.append(f"'{name}', ?")
+                pair_params.append(list_id)
+            else:
+                pairs.append(f"'{name}', {expressions[name]}")
+        json_object = f"json_object({', '.join(pairs)})"
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        table, where, params = self._page_scope(list_id, after, completed)
+        with self._connect() as conn:
+            # 在子查询中排序：json_group_array 按子查询输出的顺序聚合
+            if limit is None:
+                text = conn.execute(f"""
+                SELECT json_group_array({json_object})
+                FROM (SELECT {TODO_COLUMNS} FROM {table} {where} ORDER BY order_num, id)
+                """, pair_params + params).fetchone()[0]
+                return text, None
+            
+            # 多取一行判断是否有下一页；本页最后一行的 (order_num, id) 在同一查询中取出
+            text, last_order, last_id, count = conn.execute(f"""
+            SELECT json_group_array({json_object}) FILTER (WHERE rn <= ?),
+                   MAX(order_num) FILTER (WHERE rn = ?),
+                   MAX(id) FILTER (WHERE rn = ?),
+                   COUNT(*)
+            FROM (
+                SELECT {TODO_COLUMNS}, ROW_NUMBER() OVER (ORDER BY order_num, id) AS rn
+                FROM {table} {where}
+                ORDER BY order_num, id
+                LIMIT ?
+            )
+            """, pair_params + [limit, limit, limit] + params + [limit + 1]).fetchone()
+        return text, ((last_order, last_id) if count > limit else None)
+    
+    def _read_page(self, list_id, list_key, limit=None, after=None, completed=None, fields=None,
+                   as_json=False):
+        """读取一页（经过读缓存），返回 (数据, 下一页游标)
         
-        cursor.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='table' AND name=?
-        """, (table_name,))
+        字典列表返回副本，调用方可以随意修改。fields 中有未知字段时抛出 ValueError。
+        """
+        if fields:
+            fields = tuple(fields)
+            unknown = set(fields) - set(self._field_names(list_key))
+            if unknown:
+                raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+        if after is not None:
+            after = tuple(after)
         
-        exists = cursor.fetchone() is not None
-        conn.close()
+        with self._connect():
+            if not self.table_exists(list_id):
+                return ('[]' if as_json else []), None
+            fetch = self._fetch_page_json if as_json else self._fetch_page
+            payload, next_after = self._cached_read(
+                ('json' if as_json else 'list', list_id, list_key, limit, after, completed, fields),
+                list_id,
+                lambda: fetch(list_id, list_key, limit, after, completed, fields)
+            )
+        if not as_json:
+            payload = [dict(todo) for todo in payload]
+        return payload, next_after
+    
+    def get_todos_page(self, date_str, limit=None, after=None, completed=None, fields=None,
+                       as_json=False):
+        """按页获取指定日期的todos，返回 (数据, 下一页游标)
         
-        return exists
+        limit: 每页条数，None 表示全部
+        after: 上一页返回的游标，即最后一行的 (order, id)
+        completed: True/False 只返回已完成/未完成的任务
+        fields: 只返回这些字段
+        as_json: 为 True 时数据是 SQLite JSON1 生成的 JSON 数组文本，省去构造字典和 jsonify
+        """
+        return self._read_page(date_str, 'date', limit, after, completed, fields, as_json)
+    
+    def get_todos_json(self, date_str, **page):
+        """返回与 get_todos_for_date 结构相同的 JSON 数组文本（参数同 get_todos_page）"""
+        return self.get_todos_page(date_str, as_json=True, **page)[0]
     
     def get_todos_by_table_id(self, table_id):
         """根据表ID获取todos"""
-        if not self.table_exists_by_id(table_id):
-            return []
-        
-        table_name = self.get_table_name_by_id(table_id)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(f"""
-        SELECT id, content, completed, order_num, created_at, completed_at
-        FROM {table_name}
-        ORDER BY order_num, id
-        """)
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        todos = []
-        for row in rows:
-            todos.append({
-                'id': row[0],
-                'content': row[1],
-                'completed': bool(row[2]),
-                'order': row[3],
-                'table_id': table_id,
-                'created_at': row[4],
-                'completed_at': row[5]
-            })
-        
-        return todos
-    
-    def get_todos_for_date(self, date_str):
-        """获取指定日期的所有todos（兼容旧系统）"""
-        if not self.table_exists(date_str):
-            return []
-        
-        table_name = self.get_table_name(date_str)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(f"""
-        SELECT id, content, completed, order_num, created_at, completed_at
-        FROM {table_name}
-        ORDER BY order_num, id
-        """)
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        todos = []
-        for row in rows:
-            todos.append({
-                'id': row[0],
-                'content': row[1],
-                'completed': bool(row[2]),
-                'order': row[3],
-                'date': date_str,
-                'created_at': row[4],
-                'completed_at': row[5]
-            })
+        return self._read_page(table_id, 'table_id')[0]
+    
+    def get_todos_for_date(self, date_str, limit=None, after=None, completed=None, fields=None):
+        """获取指定日期的todos（兼容旧系统），参数见 get_todos_page"""
+        return self.get_todos_page(date_str, limit, after, completed, fields)[0]
+    
+    def get_todos_range(self, date_from, date_to):
+        """获取日期范围内（含两端）所有已存在列表的todos，返回 {日期: [todo, ...]}
         
-        return todos
+        要读取的列表取自内存目录，不探测不存在的表；
+        每日表引擎用一个 UNION ALL 查询，单表引擎用一个 IN 查询。
+        """
+        with self._connect() as conn:
+            list_ids = sorted(
+                list_id for list_id in self._list_catalog()
+                if len(list_id) == 10 and date_from <= list_id <= date_to and list_id[4] == '-'
+            )
+            result = {list_id: [] for list_id in list_ids}
+            if not list_ids:
+                return result
+            
+            for sql, params in self.engine.select_lists(list_ids, TODO_COLUMNS):
+                rows = conn.execute(f"""
+                SELECT * FROM ({sql}) ORDER BY list_id, order_num, id
+                """, params).fetchall()
+                for row in rows:
+                    result[row[0]].append(self._row_to_todo(row[1:], 'date', row[0]))
+        return result
     
-    def add_todo_by_table_id(self, table_id, content, order_num=None):
-        """根据表ID添加新的todo"""
-        if not self.table_exists_by_id(table_id):
-            return None
+    def iter_list_rows(self, list_id, columns=TODO_COLUMNS, order_by='order_num, id', batch_size=500):
+        """用游标逐批（fetchmany）读取列表的行，内存占用与列表大小无关
         
-        table_name = self.get_table_name_by_id(table_id)
+        生成器单独从连接池取一个连接，迭代结束（或被关闭）时才归还，
+        适合在流式响应中使用。列表不存在时不产生任何行。
+        """
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                if is_registered(conn, list_id):
+                    yield from self._iter_rows(conn, list_id, columns, order_by, batch_size)
+            finally:
+                conn.rollback()
+    
+    def _iter_rows(self, conn, list_id, columns, order_by, batch_size):
+        """在给定连接上逐批读取一个列表的行"""
+        table, where, params = self._scoped(list_id)
+        cursor = conn.execute(f"""
+        SELECT {columns} FROM {table} {where} ORDER BY {order_by}
+        """, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    
+    def iter_all_todos(self, batch_size=500):
+        """逐个列表、逐批读取整个数据库的todos（与接口相同的字典，带 date 字段）
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        列表标识符和所有列表的行在同一个连接的同一个读事务中读取，得到一致的快照
+        （WAL 下不阻塞写入）；内存占用只与 batch_size 有关。
+        """
+        self._ensure_schema()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                # 不用内存中的列表目录：它可能比快照新或旧，导致漏掉列表或读到已删除的表
+                for list_id in sorted(self.engine.list_ids(conn)):
+                    for row in self._iter_rows(conn, list_id, TODO_COLUMNS, 'order_num, id', batch_size):
+                        yield self._row_to_todo(row, 'date', list_id)
+            finally:
+                conn.rollback()
+    
+    def _cache_stream(self, key, version, chunks):
+        """原样转发 chunks，同时收集完整内容；结束后按版本号写入读缓存
         
-        # 如果没有指定order，获取最大值+1
-        if order_num is None:
-            cursor.execute(f"SELECT MAX(order_num) FROM {table_name}")
-            max_order = cursor.fetchone()[0] or 0
-            order_num = max_order + 1
+        内容超过 Config.EXPORT_CACHE_MAX_BYTES 时放弃缓存，保证内存占用有上限。
+        """
+        parts = []
+        size = 0
+        for chunk in chunks:
+            if parts is not None:
+                parts.append(chunk)
+                size += len(chunk)
+                if size > Config.EXPORT_CACHE_MAX_BYTES:
+                    parts = None
+            yield chunk
+        if parts is not None:
+            self._read_cache.put(key, version, ''.join(parts))
+    
+    def export_markdown(self, list_id):
+        """返回逐块生成列表 markdown 导出内容的迭代器（支持日期和复制标识符）
         
-        cursor.execute(f"""
-        INSERT INTO {table_name} (content, completed, order_num, created_at)
-        VALUES (?, ?, ?, ?)
-        """, (content, 0, order_num, datetime.now().isoformat()))
+        直接从数据库游标渲染，按列表版本号缓存，列表未修改时重复导出不再查询。
+        """
+        with self._connect() as conn:
+            version = self._read_version(conn, list_id)
+            exists = self.table_exists(list_id)
         
-        todo_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        key = ('markdown', list_id)
+        cached = self._read_cache.get(key, version)
+        if cached is not None:
+            return iter([cached])
         
-        return todo_id
-
-    def add_todo(self, date_str, content, order_num=None):
-        """添加新的todo（兼容旧系统和新的复制标识符）"""
-        # 对于复制标识符，直接创建表，不需要注册表逻辑
-        if date_str.startswith('copy-'):
-            table_name = self.get_table_name(date_str)
-            self._create_physical_table(table_name)
-        else:
-            # 确保表存在（传统日期格式）
-            table_name = self.create_table_for_date(date_str)
+        # 未完成的在前，各自按列表顺序
+        rows = self.iter_list_rows(
+            list_id, 'content, completed', '(completed != 0), order_num, id'
+        ) if exists else iter(())
+        return self._cache_stream(key, version, render_markdown(markdown_title(list_id), rows))
+    
+    def get_todo(self, date_str, todo_id):
+        """按主键读取单个todo，不存在时返回None"""
+        with self._connect() as conn:
+            if not self.table_exists(date_str):
+                return None
+            
+            table, where, params = self._scoped(date_str, 'id = ?')
+            row = conn.execute(f"""
+            SELECT {TODO_COLUMNS} FROM {table} {where}
+            """, params + [todo_id]).fetchone()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return self._row_to_todo(row, 'date', date_str) if row else None
+    
+    def _insert_todo(self, list_id, content, order_num=None):
+        """向列表中插入一行，通过 RETURNING 在同一语句中返回新行"""
+        table, columns, values = self.engine.insert_target(list_id)
+        placeholders = ['?'] * len(columns)
         
-        # 如果没有指定order，获取最大值+1
+        # 如果没有指定order，在同一条INSERT里取最大值+间隔（走排序索引，不会与并发写入交错）
         if order_num is None:
-            cursor.execute(f"SELECT MAX(order_num) FROM {table_name}")
-            max_order = cursor.fetchone()[0] or 0
-            order_num = max_order + 1
+            _, where, params = self._scoped(list_id)
+            order_sql = f"(SELECT COALESCE(MAX(order_num), 0) + {ORDER_GAP} FROM {table} {where})"
+            order_params = params
+        else:
+            order_sql = '?'
+            order_params = [order_num]
         
-        cursor.execute(f"""
-        INSERT INTO {table_name} (content, completed, order_num, created_at)
-        VALUES (?, ?, ?, ?)
-        """, (content, 0, order_num, datetime.now().isoformat()))
+        columns = columns + ['content', 'completed', 'order_num', 'created_at']
+        placeholders = placeholders + ['?', '?', order_sql, '?']
+        values = values + [content, 0] + order_params + [datetime.now().isoformat()]
         
-        todo_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join(placeholders)})
+            RETURNING {TODO_COLUMNS}
+            """, values).fetchall()
+            
+            return rows[0]
+    
+    def add_todo_by_table_id(self, table_id, content, order_num=None):
+        """根据表ID添加新的todo"""
+        with self._connect():
+            if not self.table_exists_by_id(table_id):
+                return None
+            return self._insert_todo(table_id, content, order_num)[0]
+
+    def add_todo(self, date_str, content, order_num=None):
+        """添加新的todo（兼容旧系统和新的复制标识符），返回新ID"""
+        return self.add_todo_returning(date_str, content, order_num)['id']
+    
+    def add_todo_returning(self, date_str, content, order_num=None):
+        """添加新的todo并返回完整的新行"""
+        with self._connect():
+            # 日期和复制标识符（copy-*）都直接创建列表，不需要注册表逻辑
+            self._create_list(date_str)
+            row = self._insert_todo(date_str, content, order_num)
+        return self._row_to_todo(row, 'date', date_str)
+    
+    def copy_list(self, source_date, target_date, preserve_completed=False,
+                  preserve_order=False, display_name=None):
+        """把整个列表复制到目标列表，返回复制的行数
         
-        return todo_id
+        一条 INSERT ... SELECT、一个事务完成，追加在目标列表已有任务之后。
+        preserve_completed: 保留完成状态和完成时间，否则全部重置为未完成
+        preserve_order: 保留原 order_num 的间隔（整体平移），否则按 ORDER_GAP 重新编号
+        目标列表不存在时会创建并登记（display_name/source_table_id 写入 table_registry）。
+        """
+        with self._connect() as conn:
+            self._create_list(target_date, display_name=display_name,
+                              source_table_id=source_date)
+            if not self.table_exists(source_date):
+                return 0
+            
+            target_table, target_where, target_params = self._scoped(target_date)
+            base_order = conn.execute(
+                f"SELECT COALESCE(MAX(order_num), 0) FROM {target_table} {target_where}",
+                target_params
+            ).fetchone()[0]
+            
+            if preserve_order:
+                order_expr = '? + order_num'
+            else:
+                order_expr = f'? + ROW_NUMBER() OVER (ORDER BY order_num, id) * {ORDER_GAP}'
+            completed_expr = 'completed, completed_at' if preserve_completed else '0, NULL'
+            
+            table, columns, values = self.engine.insert_target(target_date)
+            source_table, source_where, source_params = self._scoped(source_date)
+            columns = columns + ['content', 'order_num', 'created_at', 'completed', 'completed_at']
+            selects = ['?'] * len(values) + ['content', order_expr, '?', completed_expr]
+            
+            cursor = conn.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT {', '.join(selects)}
+            FROM {source_table} {source_where}
+            ORDER BY order_num, id
+            """, values + [base_order, datetime.now().isoformat()] + source_params)
+            
+            return cursor.rowcount
     
-    def update_todo(self, date_str, todo_id, **kwargs):
-        """更新todo（支持日期和复制标识符）"""
-        if not self.table_exists(date_str):
-            return False
+    def import_todos(self, list_id, rows):
+        """用 executemany 把 rows 追加到列表末尾，返回导入的行数
         
-        table_name = self.get_table_name(date_str)
+        rows 为字典的迭代器（可以是生成器，逐行消费）：必须有 content，
+        可选 completed/order/created_at/completed_at（与导出格式相同）。
+        一个列表一个事务，列表不存在时创建并登记；有 order 的行保留原顺序间隔。
+        """
+        now = datetime.now().isoformat()
+        with self.transaction() as conn:
+            self._create_list(list_id)
+            target_table, target_where, target_params = self._scoped(list_id)
+            base_order = conn.execute(
+                f"SELECT COALESCE(MAX(order_num), 0) FROM {target_table} {target_where}",
+                target_params
+            ).fetchone()[0]
+            
+            table, columns, values = self.engine.insert_target(list_id)
+            columns = columns + ['content', 'completed', 'order_num', 'created_at', 'completed_at']
+            
+            def parameters():
+                for index, row in enumerate(rows, 1):
+                    if not row.get('content'):
+                        raise ValueError(f"第 {index} 条缺少 content")
+                    completed = bool(row.get('completed'))
+                    order = row.get('order')
+                    if order is not None and (not isinstance(order, int) or isinstance(order, bool)):
+                        raise ValueError(f"第 {index} 条的 order 不是整数: {order!r}")
+                    yield values + [
+                        row['content'],
+                        completed,
+                        base_order + (order if order is not None else index * ORDER_GAP),
+                        row.get('created_at') or now,
+                        row.get('completed_at') or (now if completed else None),
+                    ]
+            
+            cursor = conn.executemany(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+            """, parameters())
+            return cursor.rowcount
+    
+    def rollover_pending(self, target_date, days=7, move=False):
+        """把目标日期之前 days 天内所有未完成的任务转入目标日期，返回统计字典
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        一个事务内用一条 INSERT ... SELECT 完成：按 (日期, 顺序) 追加到目标列表末尾，
+        内容相同的任务只保留一条，目标列表中已有的内容不再重复添加，所以重复执行是安全的。
+        move=True 时同时从来源列表中删除这些未完成任务。
+        """
+        end = datetime.strptime(target_date, '%Y-%m-%d')
+        start = (end - timedelta(days=days)).strftime('%Y-%m-%d')
         
+        with self.transaction() as conn:
+            sources = sorted(
+                list_id for list_id in self._list_catalog()
+                if len(list_id) == 10 and list_id[4] == '-' and start <= list_id < target_date
+            )
+            self._create_list(target_date)
+            result = {'target_date': target_date, 'sources': sources, 'copied': 0, 'removed': 0}
+            if not sources:
+                return result
+            
+            target_table, target_where, target_params = self._scoped(target_date)
+            base_order = conn.execute(
+                f"SELECT COALESCE(MAX(order_num), 0) FROM {target_table} {target_where}",
+                target_params
+            ).fetchone()[0]
+            
+            table, columns, values = self.engine.insert_target(target_date)
+            columns = columns + ['content', 'order_num', 'created_at', 'completed', 'completed_at']
+            selects = ['?'] * len(values) + [
+                'content', f'? + ROW_NUMBER() OVER (ORDER BY list_id, order_num, id) * {ORDER_GAP}', '?', '0', 'NULL'
+            ]
+            now = datetime.now().isoformat()
+            
+            for source_sql, source_params in self.engine.select_lists(sources, 'id, content, completed, order_num'):
+                base = base_order + result['copied'] * ORDER_GAP
+                # dup = 1 是同一内容最早出现的一行；NOT IN 排除目标列表中已有的内容
+                cursor = conn.execute(f"""
+                INSERT INTO {table} ({', '.join(columns)})
+                SELECT {', '.join(selects)}
+                FROM (
+                    SELECT list_id, id, content, order_num,
+                           ROW_NUMBER() OVER (PARTITION BY content ORDER BY list_id, order_num, id) AS dup
+                    FROM ({source_sql})
+                    WHERE completed = 0
+                )
+                WHERE dup = 1
+                  AND content NOT IN (SELECT content FROM {target_table} {target_where})
+                ORDER BY list_id, order_num, id
+                """, values + [base, now] + source_params + target_params)
+                result['copied'] += cursor.rowcount
+            
+            if move:
+                for list_id in sources:
+                    source_table, source_where, source_params = self._scoped(list_id, 'completed = 0')
+                    cursor = conn.execute(f"DELETE FROM {source_table} {source_where}", source_params)
+                    result['removed'] += cursor.rowcount
+            
+            return result
+    
+    def update_todo(self, date_str, todo_id, **kwargs):
+        """更新todo（支持日期和复制标识符）"""
+        return self.update_todo_returning(date_str, todo_id, **kwargs) is not None
+    
+    def update_todo_returning(self, date_str, todo_id, **kwargs):
+        """更新todo并返回更新后的行；不存在或没有可更新字段时返回None"""
         # 构建更新语句
         update_fields = []
         values = []
@@ -322,100 +898,294 @@ class DailyTodoManager:
             values.append(kwargs['order_num'])
         
         if not update_fields:
-            conn.close()
-            return False
-        
-        values.append(todo_id)
-        
-        cursor.execute(f"""
-        UPDATE {table_name}
-        SET {', '.join(update_fields)}
-        WHERE id = ?
-        """, values)
+            return None
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self._connect() as conn:
+            if not self.table_exists(date_str):
+                return None
+            
+            table, where, params = self._scoped(date_str, 'id = ?')
+            rows = conn.execute(f"""
+            UPDATE {table}
+            SET {', '.join(update_fields)}
+            {where}
+            RETURNING {TODO_COLUMNS}
+            """, values + params + [todo_id]).fetchall()
         
-        return success
+        return self._row_to_todo(rows[0], 'date', date_str) if rows else None
     
     def delete_todo(self, date_str, todo_id):
         """删除todo"""
-        if not self.table_exists(date_str):
-            return False
-        
-        table_name = self.get_table_name(date_str)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (todo_id,))
+        with self._connect() as conn:
+            if not self.table_exists(date_str):
+                return False
+            
+            table, where, params = self._scoped(date_str, 'id = ?')
+            cursor = conn.execute(f"DELETE FROM {table} {where}", params + [todo_id])
+            
+            return cursor.rowcount > 0
+    
+    def reorder_todos(self, date_str, todo_ids):
+        """按给定的id顺序重新编号（间隔 ORDER_GAP），返回更新的行数"""
+        with self._connect() as conn:
+            if not self.table_exists(date_str):
+                return 0
+            
+            table, where, params = self._scoped(date_str, 'id = ?')
+            cursor = conn.executemany(
+                f"UPDATE {table} SET order_num = ? {where}",
+                [[position * ORDER_GAP] + params + [todo_id]
+                 for position, todo_id in enumerate(todo_ids, 1)]
+            )
+            return cursor.rowcount
+    
+    def renumber_list(self, date_str):
+        """按当前顺序把整个列表重新编号为 ORDER_GAP 的整数倍，恢复移动所需的间隔"""
+        with self._connect() as conn:
+            table, where, params = self._scoped(date_str)
+            cursor = conn.execute(f"""
+            UPDATE {table} SET order_num = ranked.new_order
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY order_num, id) * {ORDER_GAP} AS new_order
+                FROM {table} {where}
+            ) AS ranked
+            WHERE {table}.id = ranked.id
+            """, params)
+            return cursor.rowcount
+    
+    def _neighbour_orders(self, date_str, prev_id, next_id):
+        """读取两个邻居的 order_num；邻居不存在时返回 None 表示出错"""
+        ids = [todo_id for todo_id in (prev_id, next_id) if todo_id is not None]
+        if not ids:
+            return None, None
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        table, where, params = self._scoped(date_str, f"id IN ({', '.join('?' * len(ids))})")
+        with self._connect() as conn:
+            orders = dict(conn.execute(
+                f"SELECT id, order_num FROM {table} {where}", params + ids
+            ).fetchall())
+        if any(todo_id not in orders for todo_id in ids):
+            raise LookupError('neighbour not found')
+        return orders.get(prev_id), orders.get(next_id)
+    
+    def move_todo(self, date_str, todo_id, prev_id=None, next_id=None):
+        """把任务移动到 prev_id 与 next_id 之间（任一为 None 表示列表边缘）
         
-        return success
+        只写一行：order_num 取两个邻居的中间值；
+        邻居之间没有间隔时先重新编号整个列表。
+        任务或邻居不存在时返回 None。
+        """
+        with self.transaction():
+            if not self.table_exists(date_str):
+                return None
+            try:
+                prev_order, next_order = self._neighbour_orders(date_str, prev_id, next_id)
+                if prev_order is not None and next_order is not None and next_order - prev_order < 2:
+                    self.renumber_list(date_str)
+                    prev_order, next_order = self._neighbour_orders(date_str, prev_id, next_id)
+            except LookupError:
+                return None
+            
+            if prev_order is None and next_order is None:
+                return self.get_todo(date_str, todo_id)
+            if prev_order is None:
+                new_order = next_order - ORDER_GAP
+            elif next_order is None:
+                new_order = prev_order + ORDER_GAP
+            else:
+                new_order = (prev_order + next_order) // 2
+            
+            return self.update_todo_returning(date_str, todo_id, order_num=new_order)
     
     def delete_all_todos_for_date(self, date_str):
         """删除指定日期的所有todos并删除表"""
-        if not self.table_exists(date_str):
-            return 0
-        
-        table_name = self.get_table_name(date_str)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connect() as conn:
+            if not self.table_exists(date_str):
+                return 0
+            
+            # 先获取任务数量
+            table, where, params = self._scoped(date_str)
+            count = conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+            
+            # 删除整个列表，而不是只删除数据
+            self.engine.drop_list(conn, date_str)
+            self._catalog_discard(date_str)
+            # 版本号已保证不会再命中，这里只是及早释放内存
+            self._read_cache.invalidate_matching(
+                lambda key: key[0] in LIST_CACHE_KINDS and key[1] == date_str)
+            
+            return count
+    
+    def get_available_dates(self):
+        """获取所有有数据的日期和标识符（按标识符倒序）"""
+        catalog = self._list_catalog()
+        if catalog is not self._catalog:
+            # 事务内的目录，不使用共享的排序结果
+            return sorted(catalog, reverse=True)
+        with self._catalog_lock:
+            if self._sorted_ids is None:
+                self._sorted_ids = sorted(catalog, reverse=True)
+            return list(self._sorted_ids)
+    
+    def _counter_rows(self):
+        """读取 list_counters（经过读缓存，任何修改都会使其失效）"""
+        def load():
+            with self._connect() as conn:
+                return conn.execute("""
+                SELECT list_id, total, completed FROM list_counters ORDER BY list_id DESC
+                """).fetchall()
+        return self._cached_read(('counters',), GLOBAL_VERSION_KEY, load)
+    
+    def get_todo_counts(self):
+        """获取每个日期的todo数量（触发器维护的计数，一次读取）"""
+        return {list_id: total for list_id, total, completed in self._counter_rows()}
+    
+    def get_todo_stats(self):
+        """获取每个日期的总数和已完成数"""
+        rows = self._counter_rows()
+        return {
+            list_id: {'total': total, 'completed': completed}
+            for list_id, total, completed in rows
+        }
+    
+    def get_version_tag(self, list_id=None):
+        """返回列表（不传时为全局）的版本标记，用作 ETag
         
-        # 先获取任务数量
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-        count = cursor.fetchone()[0]
+        只读 list_versions 一行，不访问 todo 表；从未修改过的列表版本号为0。
+        """
+        with self._connect() as conn:
+            if self._instance_id is None:
+                self._instance_id = conn.execute(
+                    "SELECT value FROM storage_meta WHERE key = 'instance_id'"
+                ).fetchone()[0]
+            version = self._read_version(conn, list_id or GLOBAL_VERSION_KEY)
+        return f"{self._instance_id}-{version}"
+
+    def get_pending_todos(self, limit=100, after=None):
+        """按 (列表, 顺序) 获取所有列表中未完成的todos，返回 (todo列表, 下一页游标)
         
-        # 删除整个表，而不是只删除数据
-        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-        conn.commit()
-        conn.close()
+        读取触发器维护的 search_docs 及其未完成部分索引，不扫描各个列表；
+        内容按 rowid 从 search_index 取出。after 为上一页返回的 (list_id, order, id)。
+        """
+        def load():
+            conditions = ['d.completed = 0']
+            params = []
+            if after is not None:
+                conditions.append('(d.list_id, d.order_num, d.todo_id) > (?, ?, ?)')
+                params.extend(after)
+            with self._connect() as conn:
+                rows = conn.execute(f"""
+                SELECT d.list_id, d.todo_id, s.content, d.order_num, d.created_at, d.completed_at
+                FROM search_docs AS d
+                CROSS JOIN search_index AS s ON s.rowid = d.doc_id  -- CROSS JOIN 固定先走部分索引
+                WHERE {' AND '.join(conditions)}
+                ORDER BY d.list_id, d.order_num, d.todo_id
+                LIMIT ?
+                """, params + [limit + 1]).fetchall()
+            
+            next_after = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_after = (rows[-1][0], rows[-1][3], rows[-1][1])
+            todos = [{
+                'id': todo_id,
+                'content': content,
+                'completed': False,
+                'order': order_num,
+                'date': list_id,
+                'created_at': created_at,
+                'completed_at': completed_at
+            } for list_id, todo_id, content, order_num, created_at, completed_at in rows]
+            return todos, next_after
         
-        return count
+        after = tuple(after) if after is not None else None
+        todos, next_after = self._cached_read(('pending', limit, after), GLOBAL_VERSION_KEY, load)
+        return [dict(todo) for todo in todos], next_after
     
-    def get_available_dates(self):
-        """获取所有有数据的日期和标识符"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def search_todos(self, query, date=None, date_from=None, date_to=None,
+                     completed=None, limit=50, cursor=None):
+        """在所有列表中全文搜索，返回 (结果列表, 下一页游标)
         
-        cursor.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='table' AND name LIKE 'todo_%'
-        ORDER BY name DESC
-        """)
+        每个词都不少于3个字符时走 FTS5 索引并按 bm25 排序；
+        否则（trigram 无法索引短词）退回到对 search_index 的子串扫描。
+        两种方式都返回 snippet：已转义的 HTML 片段，匹配部分用 <mark> 标出。
+        游标格式为 "score:doc_id"，即上一页最后一行的排序键（keyset 分页）。
+        """
+        terms = query.split()
+        if not terms:
+            return [], None
         
-        tables = cursor.fetchall()
-        conn.close()
+        conditions = []
+        params = []
+        if all(len(term) >= 3 for term in terms):
+            score_sql = 'bm25(search_index)'
+            snippet_sql = (f"snippet(search_index, 0, '{SNIPPET_MARKS[0]}', '{SNIPPET_MARKS[1]}', "
+                           f"'…', {SNIPPET_CHARS})")
+            conditions.append('search_index MATCH ?')
+            params.append(' '.join('"' + term.replace('"', '""') + '"' for term in terms))
+        else:
+            score_sql = '0.0'
+            snippet_sql = 'NULL'
+            for term in terms:
+                conditions.append('instr(lower(search_index.content), lower(?)) > 0')
+                params.append(term)
         
-        dates = []
-        for table in tables:
-            table_name = table[0]
-            # 从表名恢复原始标识符
-            identifier = table_name.replace('todo_', '').replace('_', '-')
-            dates.append(identifier)
+        if date:
+            conditions.append('d.list_id = ?')
+            params.append(date)
+        if date_from or date_to:
+            # 日期范围只包含真实日期，不包含 copy-* 列表
+            conditions.append("d.list_id GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'")
+        if date_from:
+            conditions.append('d.list_id >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append('d.list_id <= ?')
+            params.append(date_to)
+        if completed is not None:
+            conditions.append('d.completed = ?')
+            params.append(1 if completed else 0)
+        if cursor:
+            score, doc_id = cursor.rsplit(':', 1)
+            conditions.append(f'({score_sql}, d.doc_id) > (?, ?)')
+            params.extend([float(score), int(doc_id)])
         
-        return dates
-    
-    def get_todo_counts(self):
-        """获取每个日期的todo数量"""
-        dates = self.get_available_dates()
-        counts = {}
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+            SELECT d.doc_id, {score_sql} AS score, d.todo_id, d.list_id, search_index.content,
+                   d.completed, d.order_num, d.created_at, d.completed_at, {snippet_sql}
+            FROM search_index
+            JOIN search_docs AS d ON d.doc_id = search_index.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY score, d.doc_id
+            LIMIT ?
+            """, params + [limit + 1]).fetchall()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][1]!r}:{rows[-1][0]}"
         
-        for date_str in dates:
-            table_name = self.get_table_name(date_str)
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            counts[date_str] = cursor.fetchone()[0]
+        results = []
+        for doc_id, score, todo_id, list_id, content, done, order_num, created_at, completed_at, snippet in rows:
+            # 内容本身含有标记字符时不能信任 snippet() 的结果
+            if snippet is None or any(mark in content for mark in SNIPPET_MARKS):
+                snippet = _highlight(content, terms)
+            else:
+                snippet = _marked_html(snippet)
+            results.append({
+                'id': todo_id,
+                'content': content,
+                'completed': bool(done),
+                'order': order_num,
+                'date': list_id,
+                'created_at': created_at,
+                'completed_at': completed_at,
+                'snippet': snippet,
+                'score': score
+            })
         
-        conn.close()
-        return counts
+        return results, next_cursor
 
 # 全局实例
 todo_manager = DailyTodoManager()
\ No newline at end of file
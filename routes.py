@@ -1,25 +1,73 @@
 """
 新的路由文件 - 支持每日一表架构
 """
-from flask import Blueprint, request, jsonify, send_file
-from models import DailyTodoManager, DateAlias, db
+from flask import Blueprint, Response, current_app, request, jsonify, make_response, send_from_directory
+from models import DateAlias, db, todo_manager
+from services.batch_service import apply_batch
+from services.dump_service import FORMATS, dump_chunks, dump_filename
+from services.import_service import IMPORT_FORMATS, import_stream, open_text
+from services.markdown_format import markdown_title
+from services.metrics import instrument_blueprint
+from services.profiler import instrument_profiler, is_valid_profile_id, list_profiles, load_profile
+from services.sql_trace import instrument_sql_trace
 from datetime import datetime
+from urllib.parse import quote
+import time
 import os
+import unicodedata
 
 # 使用 'api' 作为蓝图名称，并添加 URL 前缀
+# todo_manager 与 models 共用同一个全局实例，内存中的列表目录只有一份
 todo_bp = Blueprint('api', __name__, url_prefix='/api')
-
-# 全局todo管理器实例
-todo_manager = DailyTodoManager()
+# 每个 API 请求的延迟、状态码与SQL语句数，见 /metrics
+instrument_blueprint(todo_bp)
+# 可选：SQL 跟踪和按需分析，分别由配置 SQL_TRACE、PROFILE_REQUESTS 开启
+instrument_sql_trace(todo_bp)
+instrument_profiler(todo_bp)
 
 def _is_valid_date_format(date_str):
     """验证日期格式是否为YYYY-MM-DD"""
     try:
-        datetime.strptime(date_str, '%Y-%m-%d')
-        return True
+        # strptime 也接受 2025-7-1，列表标识符按字符串比较，必须补零
+        return datetime.strptime(date_str, '%Y-%m-%d').strftime('%Y-%m-%d') == date_str
     except ValueError:
         return False
 
+def _parse_bool(value):
+    """解析查询参数中的布尔值，未提供时返回None"""
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+def _attachment(filename):
+    """Content-Disposition 响应头（与 send_file 的 download_name 相同）
+
+    响应头只能是 latin-1：非 ASCII 文件名放在 RFC 5987 的 filename* 中，
+    filename 为去掉非 ASCII 字符后的兼容写法。
+    """
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        return {'Content-Disposition': f"attachment; filename=\"{simple}\"; "
+                                       f"filename*=UTF-8''{quote(filename, safe='!#$&+^`|~')}"}
+    return {'Content-Disposition': f'attachment; filename="{filename}"'}
+
+def _conditional_response(etag, build):
+    """If-None-Match 命中时直接返回304，否则调用 build() 生成响应"""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    # 允许浏览器缓存，但每次使用前都要带 If-None-Match 重新验证
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _conditional_json(etag, build):
+    """同 _conditional_response，build() 返回需要 jsonify 的数据"""
+    return _conditional_response(etag, lambda: jsonify(build()))
+
 def ensure_today_todo_file():
     """确保今天的todo文件和数据库表存在"""
     today = datetime.now().strftime('%Y-%m-%d')
@@ -47,16 +95,99 @@ def ensure_today_todo_file():
     else:
         print(f"今日Todo文件已存在: {filename}")
 
+def _parse_page_args(args):
+    """解析 limit/after/completed/fields 查询参数，格式错误时抛出 ValueError"""
+    page = {}
+    if args.get('limit'):
+        limit = int(args['limit'])
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        page['limit'] = min(limit, 1000)
+    if args.get('after'):
+        order, todo_id = args['after'].split(',')
+        page['after'] = (int(order), int(todo_id))
+    completed = _parse_bool(args.get('completed'))
+    if completed is not None:
+        page['completed'] = completed
+    if args.get('fields'):
+        page['fields'] = [name.strip() for name in args['fields'].split(',') if name.strip()]
+    return page
+
 @todo_bp.route('/todos', methods=['GET'])
 def get_todos():
-    """获取指定日期的todos"""
+    """获取指定日期的todos
+    
+    可选参数: limit（每页条数）、after（上一页响应头 X-Next-After 中的游标 "order,id"）、
+    completed（true/false）、fields（逗号分隔的字段名）。不带参数时返回整个列表。
+    """
     date = request.args.get('date')
     if not date:
         # 如果没有指定日期，返回今天的todos
         date = datetime.now().strftime('%Y-%m-%d')
     
-    todos = todo_manager.get_todos_for_date(date)
-    return jsonify(todos)
+    try:
+        page = _parse_page_args(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit, after, completed or fields'}), 400
+    
+    def build():
+        as_json = current_app.config.get('SQL_JSON_RESPONSES')
+        payload, next_after = todo_manager.get_todos_page(date, as_json=as_json, **page)
+        response = Response(payload, mimetype='application/json') if as_json else jsonify(payload)
+        if next_after:
+            # 响应体保持为数组，下一页游标放在响应头中
+            response.headers['X-Next-After'] = f"{next_after[0]},{next_after[1]}"
+        return response
+    
+    # 先取版本号再读数据：期间若有修改，ETag 只会比数据旧，客户端下次会重新获取
+    etag = todo_manager.get_version_tag(date)
+    try:
+        return _conditional_response(etag, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@todo_bp.route('/todos/range', methods=['GET'])
+def get_todos_range():
+    """一次获取一段日期内的所有列表（周视图、月视图），最多366天"""
+    date_from = request.args.get('from', '')
+    date_to = request.args.get('to', '')
+    if not (_is_valid_date_format(date_from) and _is_valid_date_format(date_to)):
+        return jsonify({'error': 'from and to must be YYYY-MM-DD'}), 400
+    
+    days = (datetime.strptime(date_to, '%Y-%m-%d') - datetime.strptime(date_from, '%Y-%m-%d')).days
+    if not 0 <= days <= 365:
+        return jsonify({'error': 'Invalid date range (max 366 days)'}), 400
+    
+    # 任何修改都会改变全局版本号，所以可以用它作为整个范围的 ETag
+    return _conditional_json(
+        todo_manager.get_version_tag(),
+        lambda: todo_manager.get_todos_range(date_from, date_to)
+    )
+
+@todo_bp.route('/todos/pending', methods=['GET'])
+def get_pending_todos():
+    """获取所有列表中未完成的todos（按日期和顺序）
+    
+    参数: limit（默认100，最大500）、cursor（上一页返回的 next_cursor）
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+        after = None
+        if request.args.get('cursor'):
+            list_id, order, todo_id = request.args['cursor'].rsplit(',', 2)
+            after = (list_id, int(order), int(todo_id))
+            # 超出 SQLite 整数范围时查询会抛 OverflowError，这里当作无效游标
+            if not all(-2 ** 63 <= part < 2 ** 63 for part in after[1:]):
+                raise ValueError(request.args['cursor'])
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    
+    def build():
+        todos, next_after = todo_manager.get_pending_todos(limit, after)
+        next_cursor = ','.join(str(part) for part in next_after) if next_after else None
+        return {'todos': todos, 'next_cursor': next_cursor}
+    
+    return _conditional_json(todo_manager.get_version_tag(), build)
 
 @todo_bp.route('/todos', methods=['POST'])
 def add_todo():
@@ -68,11 +199,8 @@ def add_todo():
     if not content:
         return jsonify({'error': 'Content is required'}), 400
     
-    todo_id = todo_manager.add_todo(date, content)
-    
-    # 返回新创建的todo
-    todos = todo_manager.get_todos_for_date(date)
-    new_todo = next((t for t in todos if t['id'] == todo_id), None)
+    # 插入语句通过 RETURNING 直接返回新创建的todo
+    new_todo = todo_manager.add_todo_returning(date, content)
     
     if new_todo:
         return jsonify(new_todo), 201
@@ -82,8 +210,12 @@ def add_todo():
 @todo_bp.route('/todos/counts', methods=['GET'])
 def get_todo_counts():
     """获取每个日期的todo数量"""
-    counts = todo_manager.get_todo_counts()
-    return jsonify(counts)
+    return _conditional_json(todo_manager.get_version_tag(), todo_manager.get_todo_counts)
+
+@todo_bp.route('/todos/stats', methods=['GET'])
+def get_todo_stats():
+    """获取每个日期的总数和已完成数"""
+    return _conditional_json(todo_manager.get_version_tag(), todo_manager.get_todo_stats)
 
 @todo_bp.route('/todos/<int:todo_id>', methods=['GET'])
 def get_todo(todo_id):
@@ -92,8 +224,7 @@ def get_todo(todo_id):
     if not date:
         return jsonify({'error': 'Date parameter is required'}), 400
     
-    todos = todo_manager.get_todos_for_date(date)
-    todo = next((t for t in todos if t['id'] == todo_id), None)
+    todo = todo_manager.get_todo(date, todo_id)
     
     if todo:
         return jsonify(todo)
@@ -115,14 +246,15 @@ def update_todo(todo_id):
     if 'completed' in data:
         update_data['completed'] = data['completed']
     if 'order' in data:
+        # bool 是 int 的子类，true/false 不能当作顺序
+        if not isinstance(data['order'], int) or isinstance(data['order'], bool):
+            return jsonify({'error': 'order must be an integer'}), 400
         update_data['order_num'] = data['order']
     
-    success = todo_manager.update_todo(date, todo_id, **update_data)
+    # 更新语句通过 RETURNING 直接返回更新后的todo
+    updated_todo = todo_manager.update_todo_returning(date, todo_id, **update_data)
     
-    if success:
-        # 返回更新后的todo
-        todos = todo_manager.get_todos_for_date(date)
-        updated_todo = next((t for t in todos if t['id'] == todo_id), None)
+    if updated_todo:
         return jsonify(updated_todo)
     else:
         return jsonify({'error': 'Todo not found or update failed'}), 404
@@ -149,21 +281,57 @@ def copy_todo(todo_id):
         return jsonify({'error': 'Date parameter is required'}), 400
     
     # 获取原todo
-    todos = todo_manager.get_todos_for_date(date)
-    original_todo = next((t for t in todos if t['id'] == todo_id), None)
+    original_todo = todo_manager.get_todo(date, todo_id)
     
     if not original_todo:
         return jsonify({'error': 'Todo not found'}), 404
     
-    # 复制到同一日期
-    new_todo_id = todo_manager.add_todo(date, original_todo['content'])
-    
-    # 返回新创建的todo
-    todos = todo_manager.get_todos_for_date(date)
-    new_todo = next((t for t in todos if t['id'] == new_todo_id), None)
+    # 复制到同一日期，并返回新创建的todo
+    new_todo = todo_manager.add_todo_returning(date, original_todo['content'])
     
     return jsonify(new_todo), 201
 
+@todo_bp.route('/todos/<int:todo_id>/move', methods=['POST'])
+def move_todo(todo_id):
+    """把todo移动到两个相邻todo之间
+    
+    请求: {"date": ..., "prev_id": 上方邻居id或null, "next_id": 下方邻居id或null}
+    """
+    data = request.json or {}
+    date = data.get('date')
+    if not date:
+        return jsonify({'error': 'Date parameter is required'}), 400
+    
+    moved_todo = todo_manager.move_todo(date, todo_id, data.get('prev_id'), data.get('next_id'))
+    
+    if moved_todo:
+        return jsonify(moved_todo)
+    else:
+        return jsonify({'error': 'Todo or neighbour not found'}), 404
+
+@todo_bp.route('/todos/batch', methods=['POST'])
+def batch_todos():
+    """在一个事务中批量执行 create/update/delete/reorder 操作
+    
+    请求: {"operations": [{"op": "create", "date": ..., "content": ...},
+                          {"op": "update", "date": ..., "id": ..., "completed": true},
+                          {"op": "delete", "date": ..., "id": ...},
+                          {"op": "reorder", "date": ..., "ids": [3, 1, 2]},
+                          {"op": "move", "date": ..., "id": ..., "prev_id": ..., "next_id": ...}],
+           "atomic": true}
+    atomic 为 true（默认）时任一操作失败则全部回滚。
+    """
+    data = request.json or {}
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'Operations are required'}), 400
+    
+    committed, results = apply_batch(todo_manager, operations, atomic=data.get('atomic', True))
+    
+    if not committed:
+        return jsonify({'error': 'Batch rolled back', 'committed': False, 'results': results}), 400
+    return jsonify({'committed': True, 'results': results})
+
 @todo_bp.route('/todos/date/<date>', methods=['DELETE'])
 def delete_todos_by_date(date):
     """删除指定日期的所有todos"""
@@ -183,34 +351,184 @@ def delete_todos_by_date(date):
 
 @todo_bp.route('/todos/copy-date', methods=['POST'])
 def copy_date_todos():
-    """复制整个日期的todos到新日期"""
+    """复制整个日期的todos到新日期
+    
+    可选参数:
+    - preserve_completed: 保留完成状态（默认全部重置为未完成）
+    - preserve_order: 保留原 order 值（默认重新编号）
+    - 不传 target_date 时创建一个新的复制列表（copy-YYYYMMDD-timestamp），
+      display_name 会写入 table_registry
+    """
     data = request.json
     source_date = data.get('source_date')
     target_date = data.get('target_date')
     
-    if not source_date or not target_date:
-        return jsonify({'error': 'Source date and target date are required'}), 400
-    
-    # 获取源日期的所有todos
-    source_todos = todo_manager.get_todos_for_date(source_date)
-    
-    # 即使没有任务也要创建目标日期的表
-    copied_count = 0
-    if source_todos:
-        # 复制到目标日期
-        for todo in source_todos:
-            todo_manager.add_todo(target_date, todo['content'])
-            copied_count += 1
-    else:
-        # 即使源日期没有任务，也要确保目标日期的表存在
-        # 通过创建表来实现"复制空列表"
-        todo_manager.create_table_for_date(target_date)
+    if not source_date:
+        return jsonify({'error': 'Source date is required'}), 400
+    if not target_date:
+        target_date = todo_manager.new_copy_list_id()
+    
+    # 在一个事务内用 INSERT ... SELECT 批量复制；
+    # 源日期没有任务时也会创建目标列表，实现"复制空列表"
+    start = time.perf_counter()
+    copied_count = todo_manager.copy_list(
+        source_date,
+        target_date,
+        preserve_completed=bool(data.get('preserve_completed')),
+        preserve_order=bool(data.get('preserve_order')),
+        display_name=data.get('display_name'),
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
     
     return jsonify({
         'message': f'已复制 {copied_count} 个任务',
-        'count': copied_count
+        'count': copied_count,
+        'target_date': target_date,
+        'elapsed_ms': round(elapsed_ms, 3)
     })
 
+@todo_bp.route('/todos/rollover', methods=['POST'])
+def rollover_todos():
+    """把前几天未完成的任务转入目标日期（默认今天）
+    
+    请求体: {"target_date": "YYYY-MM-DD", "days": 7, "mode": "copy" | "move"}
+    """
+    data = request.json or {}
+    target_date = data.get('target_date') or datetime.now().strftime('%Y-%m-%d')
+    mode = data.get('mode', 'copy')
+    
+    if not _is_valid_date_format(target_date):
+        return jsonify({'error': 'Invalid target_date format. Use YYYY-MM-DD'}), 400
+    if mode not in ('copy', 'move'):
+        return jsonify({'error': 'mode must be copy or move'}), 400
+    try:
+        days = int(data.get('days', 7))
+    except (TypeError, ValueError):
+        days = 0
+    if not 1 <= days <= 366:
+        return jsonify({'error': 'days must be between 1 and 366'}), 400
+    
+    start_time = time.perf_counter()
+    result = todo_manager.rollover_pending(target_date, days, move=(mode == 'move'))
+    result['mode'] = mode
+    result['elapsed_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+    return jsonify(result)
+
+@todo_bp.route('/export/all', methods=['GET'])
+def export_all():
+    """流式导出所有列表的todos
+    
+    参数: format=jsonl|csv（默认 jsonl）、gzip=1 时边导出边压缩
+    """
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    compress = bool(_parse_bool(request.args.get('gzip')))
+    
+    return Response(
+        dump_chunks(todo_manager.iter_all_todos(), fmt, compress),
+        mimetype='application/gzip' if compress else FORMATS[fmt],
+        headers=_attachment(dump_filename(fmt, compress))
+    )
+
+@todo_bp.route('/todos/import', methods=['POST'])
+def import_todos():
+    """导入 markdown 或 JSONL（请求体为文件内容，或 multipart 的 file 字段）
+    
+    参数: format=md|jsonl（默认 md）、date（目标列表）、year（markdown 标题的年份）、gzip=1
+    """
+    fmt = request.args.get('format', 'md')
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+    
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    lines = open_text(stream, compressed=bool(_parse_bool(request.args.get('gzip'))))
+    
+    start_time = time.perf_counter()
+    try:
+        year = int(request.args['year']) if request.args.get('year') else None
+        imported = import_stream(todo_manager, lines, fmt, request.args.get('date'), year)
+    except ValueError as e:
+        # 出错的列表整体回滚，之前已导入的列表保留；消息中带有出错的行号
+        return jsonify({'error': f'Import failed: {e}'}), 400
+    
+    return jsonify({
+        'imported': imported,
+        'total': sum(imported.values()),
+        'elapsed_ms': round((time.perf_counter() - start_time) * 1000, 2)
+    }), 201
+
+@todo_bp.route('/search', methods=['GET'])
+def search_todos():
+    """全文搜索所有列表
+    
+    参数: q（必填）、date、from、to、completed、limit（默认50，最大200）、cursor
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        results, next_cursor = todo_manager.search_todos(
+            query,
+            date=request.args.get('date'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            completed=_parse_bool(request.args.get('completed')),
+            limit=limit,
+            cursor=request.args.get('cursor'),
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    
+    return jsonify({'results': results, 'next_cursor': next_cursor})
+
+@todo_bp.route('/db/pool-stats', methods=['GET'])
+def get_pool_stats():
+    """获取数据库连接池统计（命中/未命中/等待时间）"""
+    return jsonify(todo_manager.pool_stats())
+
+@todo_bp.route('/db/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """读缓存统计"""
+    return jsonify(todo_manager.cache_stats())
+
+def _profiles_dir():
+    """未开启按需分析或令牌不符时返回 None"""
+    if not current_app.config.get('PROFILE_REQUESTS'):
+        return None
+    token = current_app.config.get('PROFILE_TOKEN')
+    if token and request.headers.get('X-Profile-Token') != token:
+        return None
+    return current_app.config['PROFILE_DIR']
+
+@todo_bp.route('/admin/profiles', methods=['GET'])
+def get_profiles():
+    """已保存的请求分析结果列表"""
+    profile_dir = _profiles_dir()
+    if profile_dir is None:
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    return jsonify(list_profiles(profile_dir))
+
+@todo_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """一份分析摘要：最耗时的函数和内存分配位置"""
+    profile_dir = _profiles_dir()
+    report = load_profile(profile_dir, profile_id) if profile_dir else None
+    if report is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(report)
+
+@todo_bp.route('/admin/profiles/<profile_id>/pstats', methods=['GET'])
+def download_profile(profile_id):
+    """下载 cProfile 原始结果（python -m pstats 或 snakeviz 打开）"""
+    profile_dir = _profiles_dir()
+    if profile_dir is None or not is_valid_profile_id(profile_id):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(profile_dir, f"{profile_id}.pstats", as_attachment=True)
+
 @todo_bp.route('/date-aliases', methods=['GET'])
 def get_date_aliases():
     """获取所有日期别名"""
@@ -265,47 +583,16 @@ def delete_date_alias(date):
         print(f"删除日期别名失败: {e}")
         return jsonify({'error': str(e)}), 500
 
-@todo_bp.route('/todos/export/<date>', methods=['GET'])
-def export_todo(date):
-    """导出指定日期的todos为markdown文件"""
-    todos = todo_manager.get_todos_for_date(date)
-    
-    # 创建docs文件夹
-    docs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'docs')
-    if not os.path.exists(docs_dir):
-        os.makedirs(docs_dir)
-    
-    # 生成markdown内容
-    date_obj = datetime.strptime(date, '%Y-%m-%d')
-    formatted_date = date_obj.strftime('%m.%d')
-    
-    content = f"# {formatted_date} Todo\n\n"
-    
-    if not todos:
-        content += "今日无任务\n"
-    else:
-        completed_todos = [t for t in todos if t['completed']]
-        pending_todos = [t for t in todos if not t['completed']]
-        
-        if pending_todos:
-            content += "## 待完成\n\n"
-            for todo in pending_todos:
-                content += f"- [ ] {todo['content']}\n"
-            content += "\n"
-        
-        if completed_todos:
-            content += "## 已完成\n\n"
-            for todo in completed_todos:
-                content += f"- [x] {todo['content']}\n"
-            content += "\n"
-        
-        content += f"---\n总计: {len(todos)} 项任务，已完成: {len(completed_todos)} 项\n"
-    
-    # 保存文件
-    filename = f"{formatted_date}-todo.md"
-    filepath = os.path.join(docs_dir, filename)
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    return send_file(filepath, as_attachment=True, download_name=filename)
\ No newline at end of file
+@todo_bp.route('/todos/export/<list_id>', methods=['GET'])
+def export_todo(list_id):
+    """以流式响应导出列表（日期或复制标识符）为markdown文件，不写临时文件"""
+    filename = f"{markdown_title(list_id)}-todo.md"
+    
+    def build():
+        return Response(
+            todo_manager.export_markdown(list_id),
+            mimetype='text/markdown',
+            headers=_attachment(filename)
+        )
+    
+    return _conditional_response(todo_manager.get_version_tag(list_id), build)
@@ -0,0 +1,120 @@
+"""
+批量修改 - 把多个 create/update/delete/reorder/move 操作放在一个事务中执行
+"""
+import sqlite3
+from typing import List, Dict, Any, Tuple
+
+
+class BatchAborted(Exception):
+    """原子模式下有操作失败，用于触发整个事务回滚"""
+
+
+def _is_int(value) -> bool:
+    # bool 是 int 的子类，JSON 中的 true/false 不能当作 id 或顺序
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _int_field(op: Dict[str, Any], key: str, optional: bool = False):
+    """读取整数字段，类型不对时抛出 ValueError"""
+    value = op.get(key)
+    if value is None and optional:
+        return None
+    if not _is_int(value):
+        raise ValueError(f'{key} must be an integer')
+    return value
+
+
+def _apply_operation(manager, op: Dict[str, Any]) -> Dict[str, Any]:
+    """执行单个操作，返回结果（status 与对应单条接口的 HTTP 状态码一致）
+
+    字段类型不对时抛出 ValueError（结果为400）。
+    """
+    kind = op.get('op')
+    date = op.get('date')
+    if not date:
+        return {'status': 400, 'error': 'Date parameter is required'}
+    if not isinstance(date, str):
+        raise ValueError('date must be a string')
+
+    if kind == 'create':
+        content = op.get('content')
+        if not content:
+            return {'status': 400, 'error': 'Content is required'}
+        if not isinstance(content, str):
+            raise ValueError('content must be a string')
+        todo = manager.add_todo_returning(date, content, _int_field(op, 'order', optional=True))
+        return {'status': 201, 'todo': todo}
+
+    if kind == 'update':
+        todo_id = _int_field(op, 'id')
+        update_data = {}
+        if 'content' in op:
+            if not isinstance(op['content'], str):
+                raise ValueError('content must be a string')
+            update_data['content'] = op['content']
+        if 'completed' in op:
+            if not isinstance(op['completed'], bool):
+                raise ValueError('completed must be a boolean')
+            update_data['completed'] = op['completed']
+        if 'order' in op:
+            update_data['order_num'] = _int_field(op, 'order')
+        todo = manager.update_todo_returning(date, todo_id, **update_data)
+        if todo is None:
+            return {'status': 404, 'error': 'Todo not found or update failed'}
+        return {'status': 200, 'todo': todo}
+
+    if kind == 'delete':
+        if not manager.delete_todo(date, _int_field(op, 'id')):
+            return {'status': 404, 'error': 'Todo not found'}
+        return {'status': 204}
+
+    if kind == 'reorder':
+        ids = op.get('ids')
+        if not isinstance(ids, list) or not all(_is_int(todo_id) for todo_id in ids):
+            return {'status': 400, 'error': 'ids must be a list of integers'}
+        return {'status': 200, 'count': manager.reorder_todos(date, ids)}
+
+    if kind == 'move':
+        todo = manager.move_todo(date, _int_field(op, 'id'),
+                                 _int_field(op, 'prev_id', optional=True),
+                                 _int_field(op, 'next_id', optional=True))
+        if todo is None:
+            return {'status': 404, 'error': 'Todo or neighbour not found'}
+        return {'status': 200, 'todo': todo}
+
+    return {'status': 400, 'error': f'Unknown op: {kind}'}
+
+
+def _run_operation(manager, op) -> Dict[str, Any]:
+    """在保存点中执行一个操作：出错时只撤销这个操作的修改"""
+    if not isinstance(op, dict):
+        return {'status': 400, 'error': 'Operation must be an object'}
+    try:
+        with manager.savepoint():
+            return _apply_operation(manager, op)
+    except ValueError as e:
+        return {'status': 400, 'error': str(e)}
+    except sqlite3.Error as e:
+        return {'status': 500, 'error': f'Database error: {e}'}
+
+
+def apply_batch(manager, operations: List[Dict[str, Any]], atomic: bool = True) -> Tuple[bool, List[Dict[str, Any]]]:
+    """在一个事务中依次执行所有操作
+
+    atomic=True 时任何一个操作失败都会回滚全部修改；
+    atomic=False 时失败的操作被撤销（每个操作一个保存点），其余操作仍一次提交。
+    返回 (是否已提交, 每个操作的结果)。
+    """
+    results = []
+    try:
+        with manager.transaction():
+            for index, op in enumerate(operations):
+                result = _run_operation(manager, op)
+                result['index'] = index
+                result['op'] = op.get('op') if isinstance(op, dict) else None
+                results.append(result)
+                if atomic and result['status'] >= 400:
+                    raise BatchAborted()
+    except BatchAborted:
+        return False, results
+    return True, results
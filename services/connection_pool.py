@@ -0,0 +1,304 @@
+"""
+SQLite 连接池 - DailyTodoManager 和 DatabaseService 共享
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from config import Config, get_config
+from services.metrics import DB_CONNECTIONS_OPENED, Gauge, record_query
+from services.sql_trace import PROGRESS_STEPS, active_trace, progress_handler
+from services.sqlite_tuning import apply_pragmas, read_pragmas
+
+
+class PoolTimeoutError(Exception):
+    """在超时时间内没有等到空闲连接"""
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """每条语句计入 /metrics（不用 trace 回调：它会把触发器里的语句也算进去）"""
+
+    def execute(self, *args, **kwargs):
+        record_query()
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        record_query()
+        return super().executemany(*args, **kwargs)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """SQL 跟踪开启时使用的游标：记录每条语句的耗时和行数，见 services/sql_trace.py"""
+
+    _entry = None
+
+    def _timed(self, method, *args):
+        entry = self._entry
+        if entry is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            entry.duration += time.perf_counter() - start
+
+    def _start(self, sql, method, *args):
+        record_query()
+        trace = active_trace()
+        self._entry = trace.start(sql) if trace is not None else None
+        self._timed(method, sql, *args)
+        if self._entry is not None and self.rowcount > 0:
+            self._entry.rows = self.rowcount
+        return self
+
+    def execute(self, sql, parameters=()):
+        return self._start(sql, super().execute, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._start(sql, super().executemany, seq_of_parameters)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is not None and self._entry is not None:
+            self._entry.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._entry is not None:
+            self._entry.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._entry is not None:
+            self._entry.rows += len(rows)
+        return rows
+
+    def __next__(self):
+        row = self._timed(super().__next__)
+        if self._entry is not None:
+            self._entry.rows += 1
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """连接池中的连接：conn.execute 与 cursor().execute 都计数"""
+
+    _progress = False
+
+    def cursor(self, factory=None):
+        tracing = active_trace() is not None
+        # 当前请求开启 SQL 跟踪（应用配置 SQL_TRACE）时才安装进度回调，统计语句的虚拟机指令数
+        if tracing != self._progress:
+            self.set_progress_handler(progress_handler if tracing else None, PROGRESS_STEPS)
+            self._progress = tracing
+        if factory is None:
+            factory = TracedCursor if tracing else InstrumentedCursor
+        return super().cursor(factory)
+
+    # 经由 Python 层的游标执行，以便计数和跟踪
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class ConnectionPool:
+    """有界连接池 - 连接用完后放回池中复用，不再每次 connect/close"""
+
+    def __init__(self, db_path: str, size: int = Config.DB_POOL_SIZE, timeout: float = Config.DB_TIMEOUT,
+                 pragmas: Optional[Dict[str, Any]] = None):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        # 不指定时使用当前配置类（APP_CONFIG）的调优参数
+        self.pragmas = pragmas if pragmas is not None else get_config().SQLITE_PRAGMAS
+        # configure() 修改参数后加一，旧参数打开的连接归还时关闭
+        self._generation = 0
+        # 后进先出：优先复用最近用过的连接（页缓存更热）
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def _open(self) -> sqlite3.Connection:
+        """打开一个新的物理连接并应用调优参数"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               factory=InstrumentedConnection)
+        DB_CONNECTIONS_OPENED.inc((os.path.basename(self.db_path),))
+        conn.generation = self._generation
+        try:
+            apply_pragmas(conn, self.pragmas)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """取出一个连接：优先复用空闲连接，未满时新建，否则等待"""
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._hits += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+                self._misses += 1
+
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        # 池已满，等待其他线程归还
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(f"等待数据库连接超时（{self.timeout}秒）: {self.db_path}")
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._waits += 1
+            self._wait_time += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """归还连接；未结束的事务会被回滚，损坏的连接和按旧参数打开的连接直接丢弃"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        if conn.generation != self._generation:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        conn.close()
+        with self._lock:
+            self._opened -= 1
+
+    def configure(self, size: int, timeout: float, pragmas: Dict[str, Any]):
+        """按应用配置修改池大小、超时和调优参数；已打开的连接关闭，之后新建的连接使用新参数"""
+        with self._lock:
+            self.size = size
+            self.timeout = timeout
+            self.pragmas = pragmas
+            self._generation += 1
+        self.close_all()
+
+    @contextmanager
+    def connection(self):
+        """获取连接的上下文管理器，退出时自动归还"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池统计信息"""
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                'db_path': self.db_path,
+                'size': self.size,
+                'timeout': self.timeout,
+                'opened': self._opened,
+                'idle': idle,
+                'in_use': self._opened - idle,
+                'hits': self._hits,
+                'misses': self._misses,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_total_ms': round(self._wait_time * 1000, 3),
+                'wait_time_max_ms': round(self._max_wait * 1000, 3),
+                'pragmas': dict(self.pragmas),
+            }
+
+    def active_pragmas(self) -> Dict[str, Any]:
+        """从一个池中连接读回实际生效的调优参数（用于启动时报告）"""
+        with self.connection() as conn:
+            return read_pragmas(conn, self.pragmas)
+
+
+# 按数据库文件共享连接池
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+# configure_pools 设置的参数，之后创建的连接池也使用；为空时取 APP_CONFIG 对应的配置类
+_pool_settings: Dict[str, Any] = {}
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """获取（必要时创建）指定数据库文件的共享连接池"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key, **_pool_settings)
+        return pool
+
+
+def configure_pools(config):
+    """按应用配置（create_app 的 app.config）设置所有连接池的大小、超时和调优参数"""
+    settings = {
+        'size': config['DB_POOL_SIZE'],
+        'timeout': config['DB_TIMEOUT'],
+        'pragmas': dict(config['SQLITE_PRAGMAS']),
+    }
+    with _pools_lock:
+        _pool_settings.update(settings)
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.configure(**settings)
+
+
+def _collect_pool_stats():
+    """抓取 /metrics 时读取各连接池的当前状态"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    values = {}
+    for pool in pools:
+        stats = pool.stats()
+        db_name = os.path.basename(pool.db_path)
+        for field in ('opened', 'idle', 'in_use', 'waits', 'timeouts'):
+            values[(db_name, field)] = stats[field]
+    return values
+
+
+POOL_STATS = Gauge('todo_db_pool', '连接池状态（waits/timeouts 为累计值）', ('db', 'stat'),
+                   collect=_collect_pool_stats)
@@ -7,6 +7,9 @@ from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
 import logging
 
+from services.connection_pool import get_pool
+from services.metrics import timed_commit
+
 logger = logging.getLogger(__name__)
 
 class DatabaseService:
@@ -15,6 +18,8 @@ class DatabaseService:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.ensure_db_exists()
+        # 与 DailyTodoManager 共享同一个连接池
+        self.pool = get_pool(db_path)
     
     def ensure_db_exists(self):
         """确保数据库文件存在"""
@@ -23,19 +28,17 @@ class DatabaseService:
     @contextmanager
     def get_connection(self):
         """获取数据库连接的上下文管理器"""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
+        with self.pool.connection() as conn:
             conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-            yield conn
-        except Exception as e:
-            if conn:
+            try:
+                yield conn
+            except Exception as e:
                 conn.rollback()
-            logger.error(f"数据库操作失败: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+                logger.error(f"数据库操作失败: {e}")
+                raise
+            finally:
+                # 连接是共享的，归还前恢复默认的元组行格式
+                conn.row_factory = None
     
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """执行查询并返回结果"""
@@ -49,7 +52,7 @@ class DatabaseService:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params or ())
-            conn.commit()
+            timed_commit(conn)
             return cursor.rowcount
     
     def execute_insert(self, query: str, params: tuple = None) -> int:
@@ -57,7 +60,7 @@ class DatabaseService:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params or ())
-            conn.commit()
+            timed_commit(conn)
             return cursor.lastrowid
     
     def table_exists(self, table_name: str) -> bool:
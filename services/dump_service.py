@@ -0,0 +1,68 @@
+"""
+全库导出 - 把所有列表的todos流式输出为 JSONL 或 CSV，可选 gzip 压缩
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+# 与接口返回的 todo 字典相同的字段，date 为列表标识符（日期或复制标识符）
+DUMP_FIELDS = ['date', 'id', 'content', 'completed', 'order', 'created_at', 'completed_at']
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# 攒够这么多字节再输出一块
+CHUNK_SIZE = 64 * 1024
+
+
+def _jsonl_lines(todos):
+    for todo in todos:
+        yield json.dumps(todo, ensure_ascii=False) + '\n'
+
+
+def _csv_lines(todos):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=DUMP_FIELDS)
+    writer.writeheader()
+    for todo in todos:
+        writer.writerow(todo)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def dump_chunks(todos, fmt='jsonl', compress=False):
+    """把 todo 字典的迭代器编码为字节块；compress=True 时边生成边 gzip 压缩"""
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的格式: {fmt}（可选: {', '.join(FORMATS)}）")
+    lines = _jsonl_lines(todos) if fmt == 'jsonl' else _csv_lines(todos)
+    # wbits=31 输出带 gzip 头的流
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            data = ''.join(buffer).encode('utf-8')
+            yield compressor.compress(data) if compressor else data
+            buffer = []
+            size = 0
+
+    data = ''.join(buffer).encode('utf-8')
+    if compressor:
+        yield compressor.compress(data) + compressor.flush()
+    elif data:
+        yield data
+
+
+def dump_filename(fmt, compress=False, now=None):
+    """下载文件名，例如 todos-20250728.jsonl.gz"""
+    stamp = (now or datetime.now()).strftime('%Y%m%d')
+    return f"todos-{stamp}.{fmt}" + ('.gz' if compress else '')
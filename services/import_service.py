@@ -0,0 +1,101 @@
+"""
+批量导入 - 把 markdown（docs/*-todo.md、导出文件）或 JSONL（全库导出）加载回列表
+
+文件按行流式解析，每个列表用一次 executemany、一个事务写入。
+"""
+import gzip
+import io
+import json
+import re
+from itertools import groupby
+
+from services.markdown_format import list_id_from_title, parse_markdown_items
+
+IMPORT_FORMATS = ('md', 'jsonl')
+
+# 列表标识符会成为每日表的表名，只允许日期、copy-* 和 UUID 这类字符
+_LIST_ID_RE = re.compile(r'^[0-9A-Za-z-]{1,36}$')
+
+
+def _check_list_id(list_id):
+    if not isinstance(list_id, str) or not _LIST_ID_RE.match(list_id):
+        raise ValueError(f"无效的列表标识符: {list_id!r}")
+    return list_id
+
+
+def markdown_groups(lines, list_id=None, year=None):
+    """markdown 文件只对应一个列表：未指定 list_id 时从标题行推断"""
+    lines = iter(lines)
+    title = next(lines, '')
+    list_id = list_id or list_id_from_title(title, year)
+    yield _check_list_id(list_id), parse_markdown_items(lines)
+
+
+class _LineCounter:
+    """逐行迭代并记住当前读到第几行，出错时用来提示位置"""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self.line = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # 先计数：读取本身出错（gzip 损坏、编码错误）时指向正在读的那一行
+        self.line += 1
+        return next(self._lines)
+
+
+def _jsonl_record(line):
+    """解析一行并检查字段类型（与导出格式一致），order 转为整数"""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("不是 JSON 对象")
+    if not isinstance(record.get('content'), str):
+        raise ValueError("content 必须是字符串")
+    for key in ('created_at', 'completed_at'):
+        if record.get(key) is not None and not isinstance(record[key], str):
+            raise ValueError(f"{key} 必须是字符串")
+    if record.get('order') is not None:
+        try:
+            record['order'] = int(record['order'])
+        except (TypeError, ValueError):
+            raise ValueError(f"order 必须是整数: {record['order']!r}") from None
+    return record
+
+
+def jsonl_groups(lines, list_id=None):
+    """JSONL 每行一个 todo；指定 list_id 时全部导入该列表，否则按 date 字段连续分组"""
+    records = (_jsonl_record(line) for line in lines if line.strip())
+    if list_id:
+        yield _check_list_id(list_id), records
+        return
+    for key, group in groupby(records, key=lambda record: record.get('date')):
+        yield _check_list_id(key), group
+
+
+def open_text(stream, compressed=False):
+    """把二进制流包装为逐行读取的文本流，compressed=True 时边读边解压 gzip"""
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def import_stream(manager, lines, fmt, list_id=None, year=None):
+    """解析并导入，返回 {列表标识符: 导入行数}
+
+    内容有误或无法读取（gzip 损坏、编码错误）时抛出 ValueError，消息中带有行号；
+    出错的列表整体回滚，之前已导入的列表保留。
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"不支持的格式: {fmt}（可选: {', '.join(IMPORT_FORMATS)}）")
+    lines = _LineCounter(lines)
+    groups = markdown_groups(lines, list_id, year) if fmt == 'md' else jsonl_groups(lines, list_id)
+    imported = {}
+    try:
+        for group_list_id, rows in groups:
+            imported[group_list_id] = imported.get(group_list_id, 0) + manager.import_todos(group_list_id, rows)
+    except (ValueError, KeyError, TypeError, OSError, EOFError) as e:
+        raise ValueError(f"第 {lines.line} 行: {e}") from e
+    return imported
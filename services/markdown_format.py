@@ -0,0 +1,79 @@
+"""
+Todo 列表的 markdown 格式（docs/*-todo.md 与导出接口使用同一格式）
+"""
+import re
+from datetime import datetime
+
+_TITLE_RE = re.compile(r'^# (.+) Todo$')
+_ITEM_RE = re.compile(r'^- \[([ xX])\] (.*)$')
+_MONTH_DAY_RE = re.compile(r'^(\d{2})\.(\d{2})$')
+
+# 每次输出的块大小，避免逐行写入响应
+CHUNK_SIZE = 64 * 1024
+
+
+def markdown_title(list_id):
+    """日期显示为 MM.DD，复制列表等其他标识符原样显示"""
+    try:
+        return datetime.strptime(list_id, '%Y-%m-%d').strftime('%m.%d')
+    except ValueError:
+        return list_id
+
+
+def _render_lines(title, rows):
+    """逐行生成 markdown；rows 为 (content, completed)，未完成的在前"""
+    yield f"# {title} Todo\n\n"
+    total = 0
+    completed_count = 0
+    section = None
+    for content, completed in rows:
+        completed = bool(completed)
+        if section != completed:
+            if section is not None:
+                yield "\n"
+            yield "## 已完成\n\n" if completed else "## 待完成\n\n"
+            section = completed
+        total += 1
+        completed_count += completed
+        yield f"- [{'x' if completed else ' '}] {content}\n"
+
+    if total == 0:
+        yield "今日无任务\n"
+        return
+    yield "\n"
+    yield f"---\n总计: {total} 项任务，已完成: {completed_count} 项\n"
+
+
+def render_markdown(title, rows):
+    """按块生成 markdown 文本，内存占用与列表大小无关"""
+    buffer = []
+    size = 0
+    for line in _render_lines(title, rows):
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def list_id_from_title(line, year=None):
+    """从标题行（"# MM.DD Todo"）还原列表标识符；MM.DD 需要补上年份（默认今年）"""
+    match = _TITLE_RE.match(line.strip())
+    if not match:
+        return None
+    title = match.group(1)
+    month_day = _MONTH_DAY_RE.match(title)
+    if not month_day:
+        return title
+    return f"{year or datetime.now().year}-{month_day.group(1)}-{month_day.group(2)}"
+
+
+def parse_markdown_items(lines):
+    """逐行解析任务项 "- [ ] 内容" / "- [x] 内容"，其余行忽略"""
+    for line in lines:
+        match = _ITEM_RE.match(line.rstrip('\r\n'))
+        if match:
+            yield {'content': match.group(2), 'completed': match.group(1) != ' '}
@@ -0,0 +1,194 @@
+"""
+运行指标 - 以 Prometheus 文本格式在 /metrics 输出（不依赖 prometheus_client）
+
+热路径上每次记录只是一次加锁的加法，指标在抓取时才格式化。
+"""
+import bisect
+import threading
+import time
+
+from flask import g, request
+
+# 延迟直方图的桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# 每个请求 SQL 语句数的桶
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _lines(self):
+        raise NotImplementedError
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._lines()
+
+
+class Counter(_Metric):
+    """只增不减的计数"""
+
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _lines(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+
+
+class Gauge(_Metric):
+    """可增可减的当前值；collect 不为空时在抓取时调用它得到 {标签: 值}"""
+
+    type = 'gauge'
+
+    def __init__(self, name, help_text, label_names=(), collect=None):
+        super().__init__(name, help_text, label_names)
+        self.collect = collect
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def _lines(self):
+        if self.collect is not None:
+            items = list(self.collect().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+
+
+class Histogram(_Metric):
+    """分桶计数 + 总和 + 次数"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [各桶计数（最后一个是 +Inf）, 总和, 次数]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _lines(self):
+        with self._lock:
+            items = [(labels, (list(counts), total, count))
+                     for labels, (counts, total, count) in self._values.items()]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, [('le', bound)])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {count}"
+
+
+def render_metrics():
+    """所有指标的 Prometheus 文本格式"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# HTTP 请求（todo_bp 蓝图）
+REQUESTS_IN_FLIGHT = Gauge(
+    'todo_http_requests_in_flight', '正在处理的请求数')
+REQUEST_LATENCY = Histogram(
+    'todo_http_request_duration_seconds', '请求处理时间', ('endpoint', 'method', 'status'))
+REQUEST_QUERIES = Histogram(
+    'todo_http_request_db_queries', '每个请求执行的SQL语句数', ('endpoint',), QUERY_COUNT_BUCKETS)
+
+# 数据库（连接池中的连接，DailyTodoManager 与 DatabaseService 共用）
+DB_QUERIES = Counter(
+    'todo_db_queries_total', '执行的SQL语句总数')
+DB_CONNECTIONS_OPENED = Counter(
+    'todo_db_connections_opened_total', '打开的物理连接数', ('db',))
+DB_COMMIT_LATENCY = Histogram(
+    'todo_db_commit_duration_seconds', '提交事务的耗时')
+
+# 当前线程正在处理的请求的语句计数
+_request_state = threading.local()
+
+
+def record_query():
+    """每执行一条SQL语句调用一次"""
+    DB_QUERIES.inc()
+    count = getattr(_request_state, 'queries', None)
+    if count is not None:
+        _request_state.queries = count + 1
+
+
+def timed_commit(conn):
+    """提交并记录耗时"""
+    start = time.perf_counter()
+    conn.commit()
+    DB_COMMIT_LATENCY.observe(time.perf_counter() - start)
+
+
+def instrument_blueprint(blueprint):
+    """给蓝图的每个请求记录延迟、状态码、并发数和SQL语句数"""
+
+    @blueprint.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        _request_state.queries = 0
+        REQUESTS_IN_FLIGHT.inc()
+
+    @blueprint.after_request
+    def _record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @blueprint.teardown_request
+    def _finish_request_metrics(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        REQUESTS_IN_FLIGHT.dec()
+        # 路由模板作为标签（如 /api/todos/<int:todo_id>），避免标签数量随参数增长
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        status = str(g.pop('metrics_status', 500))
+        REQUEST_LATENCY.observe(time.perf_counter() - started, (endpoint, request.method, status))
+        REQUEST_QUERIES.observe(getattr(_request_state, 'queries', 0), (endpoint,))
+        _request_state.queries = None
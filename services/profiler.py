@@ -0,0 +1,179 @@
+"""
+按需性能分析 - 对单个请求运行 cProfile 和 tracemalloc，结果保存到 instance/profiles/
+
+需要应用配置 PROFILE_REQUESTS=1，并在请求中带上 X-Profile 头或 ?profile= 参数；
+配置了 PROFILE_TOKEN 时两者的值必须等于它。同一时间只分析一个请求（tracemalloc 是全局的）。
+流式响应只分析视图函数本身，不包括之后生成响应内容的部分。
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+
+# 报告中保留的函数数和内存分配位置数
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+_PROFILE_ID_RE = re.compile(r'^[0-9A-Za-z_.-]+$')
+_busy = threading.Lock()
+
+
+def profile_requested(token):
+    """请求是否要求分析；token 为空时任何值都可以"""
+    value = request.headers.get('X-Profile') or request.args.get('profile')
+    if not value:
+        return False
+    return not token or value == token
+
+
+def is_valid_profile_id(profile_id):
+    return bool(_PROFILE_ID_RE.match(profile_id))
+
+
+def _top_functions(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    return stream.getvalue()
+
+
+def _top_allocations(snapshot):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ))
+    return [
+        {
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+    ]
+
+
+def _prune(profile_dir, keep):
+    """只保留最近的 keep 份结果"""
+    reports = sorted(name for name in os.listdir(profile_dir) if name.endswith('.json'))
+    for name in reports[:-keep] if keep > 0 else []:
+        base = name[:-len('.json')]
+        for suffix in ('.json', '.pstats'):
+            try:
+                os.remove(os.path.join(profile_dir, base + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profile_dir, profiler, snapshot, peak, meta, keep):
+    """写入 <id>.pstats（可用 pstats / snakeviz 打开）和 <id>.json（摘要），返回 id"""
+    os.makedirs(profile_dir, exist_ok=True)
+    endpoint = (meta['endpoint'] or 'unmatched').replace('.', '-')
+    profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{endpoint}"
+    profiler.dump_stats(os.path.join(profile_dir, f"{profile_id}.pstats"))
+    report = dict(
+        meta,
+        id=profile_id,
+        peak_memory_kb=round(peak / 1024, 1),
+        top_allocations=_top_allocations(snapshot),
+        top_functions=_top_functions(profiler),
+    )
+    with open(os.path.join(profile_dir, f"{profile_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    _prune(profile_dir, keep)
+    return profile_id
+
+
+def list_profiles(profile_dir):
+    """已保存的分析结果（新的在前），不含函数和分配明细"""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(profile_dir), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(profile_dir, name), encoding='utf-8') as f:
+            report = json.load(f)
+        report.pop('top_functions', None)
+        report.pop('top_allocations', None)
+        profiles.append(report)
+    return profiles
+
+
+def load_profile(profile_dir, profile_id):
+    """读取一份分析摘要，不存在时返回 None"""
+    path = os.path.join(profile_dir, f"{profile_id}.json")
+    if not is_valid_profile_id(profile_id) or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def instrument_profiler(blueprint):
+    """给蓝图加上按需分析；需要在 register_blueprint 之前调用，由配置 PROFILE_REQUESTS 开关"""
+
+    @blueprint.before_request
+    def _start_profile():
+        if not current_app.config.get('PROFILE_REQUESTS'):
+            return
+        if not profile_requested(current_app.config.get('PROFILE_TOKEN')):
+            return
+        # 已有请求在分析时直接跳过，不阻塞
+        if not _busy.acquire(blocking=False):
+            return
+        g.profile_started = time.perf_counter()
+        # 进程已经在跟踪内存（PYTHONTRACEMALLOC）时不去启停它
+        g.profile_owns_tracemalloc = not tracemalloc.is_tracing()
+        if g.profile_owns_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @blueprint.after_request
+    def _finish_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        try:
+            profiler.disable()
+            duration = time.perf_counter() - g.pop('profile_started')
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if g.pop('profile_owns_tracemalloc'):
+                tracemalloc.stop()
+            # 记录的路径中去掉 profile 参数（其值可能是令牌）
+            query = urlencode([(k, v) for k, v in request.args.items(multi=True) if k != 'profile'])
+            meta = {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'method': request.method,
+                'path': f"{request.path}?{query}" if query else request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 3),
+            }
+            response.headers['X-Profile-Id'] = save_profile(
+                current_app.config['PROFILE_DIR'], profiler, snapshot, peak, meta,
+                current_app.config.get('PROFILE_KEEP', 50))
+        finally:
+            _busy.release()
+        return response
+
+    @blueprint.teardown_request
+    def _abort_profile(exc):
+        # 视图抛出异常且没有生成响应时，保证分析器停止、锁被释放
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            if g.pop('profile_owns_tracemalloc', False):
+                tracemalloc.stop()
+            _busy.release()
@@ -0,0 +1,80 @@
+"""
+进程内读缓存 - 按版本号校验的有界 LRU
+
+缓存项记录写入时的版本号，读取时由调用方传入数据库中的当前版本号，
+不一致即视为失效，所以多个进程各自缓存也不会读到旧数据。
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class VersionedLRUCache:
+    """线程安全的 LRU 缓存，每项带版本号"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """返回版本号一致的缓存值，否则返回 None（版本不一致的项直接丢弃）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] != version:
+                del self._entries[key]
+                self._stale += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any):
+        """写入缓存，超出容量时淘汰最久未使用的项"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """删除一项（列表被删除时释放内存，正确性由版本号保证）"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """删除键满足 predicate 的所有项，返回删除的项数（遍历整个缓存，条目数有上限）"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中/失效/淘汰统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'stale': self._stale,
+                'evictions': self._evictions,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+            }
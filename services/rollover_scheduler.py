@@ -0,0 +1,37 @@
+"""
+每日结转 - 在本地时间午夜把前几天未完成的任务转入新的一天（可选后台任务）
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+def seconds_until_midnight(now=None):
+    """距离下一个本地时间 0 点的秒数（多等1秒，确保日期已经切换）"""
+    now = now or datetime.now()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds() + 1
+
+
+def start_rollover_scheduler(manager, days=7, move=False):
+    """启动守护线程，每天 0 点对当天执行一次 manager.rollover_pending
+
+    结转按内容去重，多个进程各自运行调度也不会产生重复任务。
+    """
+    def run():
+        while True:
+            time.sleep(seconds_until_midnight())
+            today = datetime.now().strftime('%Y-%m-%d')
+            try:
+                result = manager.rollover_pending(today, days, move)
+                logger.info(f"已结转 {result['copied']} 个未完成任务到 {today}"
+                            f"（来源 {len(result['sources'])} 天，删除 {result['removed']} 个）")
+            except Exception as e:
+                logger.error(f"结转未完成任务失败: {e}")
+
+    thread = threading.Thread(target=run, name='todo-rollover', daemon=True)
+    thread.start()
+    return thread
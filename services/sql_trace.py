@@ -0,0 +1,110 @@
+"""
+SQL 跟踪（可选）- 记录每个请求执行的语句、耗时、行数，慢语句写入日志
+
+跟踪只在请求开始时打开（线程局部），未开启时连接池中的连接照常使用普通游标。
+"""
+import logging
+import threading
+
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+# 进度回调的间隔（虚拟机指令数），用来粗略估计每条语句的工作量
+PROGRESS_STEPS = 1000
+
+_state = threading.local()
+
+
+class TraceEntry:
+    """一条语句：耗时包括 execute 和之后逐行读取的时间（SELECT 的行在读取时才计算）"""
+
+    __slots__ = ('sql', 'duration', 'rows', 'steps')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.duration = 0.0
+        self.rows = 0
+        self.steps = 0
+
+
+class RequestTrace:
+    """一个请求内的全部语句"""
+
+    def __init__(self):
+        self.entries = []
+        self.current = None
+
+    def start(self, sql):
+        entry = self.current = TraceEntry(' '.join(sql.split()))
+        self.entries.append(entry)
+        return entry
+
+    @property
+    def total_duration(self):
+        return sum(entry.duration for entry in self.entries)
+
+
+def active_trace():
+    """当前线程正在记录的跟踪，未开启时返回 None"""
+    return getattr(_state, 'trace', None)
+
+
+def begin_trace():
+    _state.trace = RequestTrace()
+    return _state.trace
+
+
+def end_trace():
+    trace = getattr(_state, 'trace', None)
+    _state.trace = None
+    return trace
+
+
+def progress_handler():
+    """安装在连接上的进度回调：把指令数记到当前线程正在执行的语句上"""
+    trace = getattr(_state, 'trace', None)
+    if trace is not None and trace.current is not None:
+        trace.current.steps += PROGRESS_STEPS
+    return 0
+
+
+def server_timing(trace):
+    """Server-Timing 响应头：数据库总耗时和语句数"""
+    return f'db;dur={trace.total_duration * 1000:.2f};desc="{len(trace.entries)} queries"'
+
+
+def instrument_sql_trace(blueprint):
+    """给蓝图的请求挂上 SQL 跟踪；需要在 register_blueprint 之前调用
+
+    是否跟踪由应用配置 SQL_TRACE / SQL_SLOW_MS / SQL_TRACE_SERVER_TIMING 决定，
+    关闭时每个请求只多一次配置查找。
+    """
+
+    @blueprint.before_request
+    def _begin_sql_trace():
+        if current_app.config.get('SQL_TRACE'):
+            begin_trace()
+
+    @blueprint.after_request
+    def _add_server_timing(response):
+        trace = active_trace()
+        if trace is not None and current_app.config.get('SQL_TRACE_SERVER_TIMING', True):
+            response.headers.add('Server-Timing', server_timing(trace))
+        return response
+
+    @blueprint.teardown_request
+    def _finish_sql_trace(exc):
+        trace = end_trace()
+        if trace is None:
+            return
+        slow_ms = current_app.config.get('SQL_SLOW_MS', 100)
+        for entry in trace.entries:
+            if entry.duration * 1000 >= slow_ms:
+                logger.warning(f"慢查询 {entry.duration * 1000:.1f}ms rows={entry.rows} steps~{entry.steps} "
+                               f"[{request.method} {request.path}]: {entry.sql}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{request.method} {request.path}: {len(trace.entries)} 条语句, "
+                         f"{trace.total_duration * 1000:.2f}ms")
+            for entry in trace.entries:
+                logger.debug(f"  {entry.duration * 1000:8.3f}ms rows={entry.rows} {entry.sql}")
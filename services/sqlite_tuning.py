@@ -0,0 +1,30 @@
+"""
+SQLite 连接调优 - 把配置类中的 SQLITE_PRAGMAS 应用到每个新连接
+"""
+import sqlite3
+from typing import Dict, Any
+
+from sqlalchemy import event
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Any]):
+    """在新连接上依次执行 PRAGMA（按配置中的顺序，busy_timeout 应放在最前）"""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def read_pragmas(conn: sqlite3.Connection, names) -> Dict[str, Any]:
+    """读取连接上实际生效的 PRAGMA 值"""
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+
+def install_sqlalchemy_pragmas(engine, pragmas: Dict[str, Any]):
+    """让 SQLAlchemy 引擎新建的每个连接也使用同样的调优参数"""
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def format_pragmas(settings: Dict[str, Any]) -> str:
+    """格式化为一行日志"""
+    return ', '.join(f"{name}={value}" for name, value in settings.items())
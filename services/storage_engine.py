@@ -0,0 +1,580 @@
+"""
+Todo 存储引擎
+
+- per_day: 每天（每个复制标识符）一个 todo_xxx 表，原有设计
+- single_table: 所有列表存放在一个 todos 表中，用带索引的 list_id 区分
+
+per_day 每个列表在 sqlite_master 中有 5 项（表、排序索引、3 个触发器），
+每个新连接都要解析全部 schema，新建列表时 schema 也整体重写。
+约 2000 个列表时有 1 万项，新建一个列表约 19ms（100 个列表时约 2ms），
+新连接第一次查询约 0.5s；single_table 的 schema 大小固定，同样数量下约 3ms、10ms。
+列表超过 PER_DAY_MAX_LISTS 时建议用 migrate_storage.py 迁移到 single_table。
+
+DailyTodoManager 只通过这里的方法拼装 SQL，所以两种引擎下路由行为一致。
+计数、搜索索引、版本号等派生数据由行级触发器在同一事务内维护（见 LIST_TRIGGERS）。
+"""
+import re
+import uuid
+from datetime import datetime
+
+# 每日表名前缀；LIKE 中的 "_" 是通配符，必须转义，否则 todos 等表也会匹配
+LEGACY_TABLE_PATTERN = r"todo\_%"
+
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS table_registry (
+    id INTEGER PRIMARY KEY,
+    table_id VARCHAR(36) NOT NULL UNIQUE,
+    display_name VARCHAR(100) NOT NULL,
+    table_type VARCHAR(20),
+    source_date VARCHAR(10),
+    source_table_id VARCHAR(36),
+    created_at DATETIME,
+    is_active BOOLEAN
+)
+"""
+
+# list_versions 中全局版本号所在的行
+GLOBAL_VERSION_KEY = '*'
+# 列表目录（创建/删除列表）的版本号，用于校验各进程内存中的目录
+CATALOG_VERSION_KEY = '#catalog'
+
+# 派生数据结构的版本；新增派生数据时加一，已有数据库启动时会整体重建一次
+DERIVED_VERSION = 3
+
+# 由触发器维护的派生数据
+DERIVED_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS storage_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS list_counters (
+        list_id TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # 每次修改时全局版本号加一，并把被修改列表的版本号设为新的全局值，
+    # 所以版本号单调递增，列表删除后重建也不会与旧的版本号重复
+    """
+    CREATE TABLE IF NOT EXISTS list_versions (
+        list_id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # 跨列表的搜索文档：doc_id 同时作为 search_index 的 rowid
+    """
+    CREATE TABLE IF NOT EXISTS search_docs (
+        doc_id INTEGER PRIMARY KEY,
+        list_id TEXT NOT NULL,
+        todo_id INTEGER NOT NULL,
+        completed INTEGER NOT NULL DEFAULT 0,
+        order_num INTEGER,
+        created_at DATETIME,
+        completed_at DATETIME,
+        UNIQUE (list_id, todo_id)
+    )
+    """,
+    # 跨列表的未完成视图：部分索引只包含未完成的文档，按 (列表, 顺序) 有序
+    """
+    CREATE INDEX IF NOT EXISTS idx_search_docs_pending
+    ON search_docs (list_id, order_num, todo_id) WHERE completed = 0
+    """,
+    # trigram 分词支持中文子串匹配（不少于3个字符）
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        content, tokenize = 'trigram'
+    )
+    """,
+]
+
+_DOC_ID_SQL = "(SELECT doc_id FROM search_docs WHERE list_id = {list} AND todo_id = {row}.id)"
+
+_BUMP_VERSION_SQL = """
+        UPDATE list_versions SET version = version + 1 WHERE list_id = '*';
+        INSERT INTO list_versions (list_id, version)
+        VALUES ({list}, (SELECT version FROM list_versions WHERE list_id = '*'))
+        ON CONFLICT (list_id) DO UPDATE SET version = excluded.version;
+"""
+
+# 只有单表引擎下行会换到另一个列表，此时新列表也要变更版本（每日表中条件恒为假）
+_BUMP_MOVED_VERSION_SQL = """
+        UPDATE list_versions SET version = version + 1
+        WHERE list_id = '*' AND {old_list} IS NOT {new_list};
+        INSERT INTO list_versions (list_id, version)
+        SELECT {new_list}, (SELECT version FROM list_versions WHERE list_id = '*')
+        WHERE {old_list} IS NOT {new_list}
+        ON CONFLICT (list_id) DO UPDATE SET version = excluded.version;
+"""
+
+_COUNT_INS_SQL = """
+        INSERT INTO list_counters (list_id, total, completed)
+        VALUES ({new_list}, 1, NEW.completed != 0)
+        ON CONFLICT (list_id) DO UPDATE SET
+            total = total + 1,
+            completed = completed + excluded.completed;
+"""
+
+_SEARCH_INS_SQL = """
+        INSERT INTO search_docs (list_id, todo_id, completed, order_num, created_at, completed_at)
+        VALUES ({new_list}, NEW.id, NEW.completed != 0, NEW.order_num, NEW.created_at, NEW.completed_at);
+        INSERT INTO search_index (rowid, content)
+        VALUES (""" + _DOC_ID_SQL.format(list='{new_list}', row='NEW') + """, NEW.content);
+"""
+
+# 每个列表的行级触发器: (名称后缀, 时机, 语句体)，每种事件一个触发器，
+# 同时维护计数、搜索文档和版本号（每日表引擎下每个表都有一组，触发器越少 sqlite_master 越小）
+# {new_list}/{old_list} 由引擎替换为列表标识符：每日表是字面量，单表是 NEW.list_id/OLD.list_id
+LIST_TRIGGERS = [
+    ('derived_ins', 'AFTER INSERT',
+     _COUNT_INS_SQL + _SEARCH_INS_SQL + _BUMP_VERSION_SQL.format(list='{new_list}')),
+    ('derived_del', 'AFTER DELETE', """
+        UPDATE list_counters SET
+            total = total - 1,
+            completed = completed - (OLD.completed != 0)
+        WHERE list_id = {old_list};
+        DELETE FROM search_index WHERE rowid = """ + _DOC_ID_SQL.format(list='{old_list}', row='OLD') + """;
+        DELETE FROM search_docs WHERE list_id = {old_list} AND todo_id = OLD.id;
+    """ + _BUMP_VERSION_SQL.format(list='{old_list}')),
+    # 计数只在完成状态或所属列表变化时更新：先从旧列表减去再加到新列表；
+    # 搜索文档先用旧的 (list_id, id) 定位更新内容，再更新文档本身
+    ('derived_upd', 'AFTER UPDATE', """
+        UPDATE list_counters SET
+            total = total - 1,
+            completed = completed - (OLD.completed != 0)
+        WHERE list_id = {old_list}
+          AND ((OLD.completed != 0) IS NOT (NEW.completed != 0) OR {old_list} IS NOT {new_list});
+        INSERT INTO list_counters (list_id, total, completed)
+        SELECT {new_list}, 1, NEW.completed != 0
+        WHERE (OLD.completed != 0) IS NOT (NEW.completed != 0) OR {old_list} IS NOT {new_list}
+        ON CONFLICT (list_id) DO UPDATE SET
+            total = total + 1,
+            completed = completed + excluded.completed;
+        UPDATE search_index SET content = NEW.content
+        WHERE rowid = """ + _DOC_ID_SQL.format(list='{old_list}', row='OLD') + """
+          AND OLD.content IS NOT NEW.content;
+        UPDATE search_docs SET
+            list_id = {new_list},
+            todo_id = NEW.id,
+            completed = NEW.completed != 0,
+            order_num = NEW.order_num,
+            created_at = NEW.created_at,
+            completed_at = NEW.completed_at
+        WHERE list_id = {old_list} AND todo_id = OLD.id;
+    """ + _BUMP_VERSION_SQL.format(list='{old_list}') + _BUMP_MOVED_VERSION_SQL),
+]
+
+# 旧版本按用途拆成多个触发器，升级时删除
+OBSOLETE_TRIGGER_SUFFIXES = [
+    'count_ins', 'count_del', 'count_upd', 'search_ins', 'search_del', 'search_upd',
+    'version_ins', 'version_del', 'version_upd', 'version_move',
+]
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# 一个复合 SELECT 最多包含的 UNION ALL 子句数（SQLite 默认上限为500）
+MAX_UNION_TERMS = 400
+
+# per_day 引擎建议的列表数上限，超过时启动时提示迁移（见模块说明）
+PER_DAY_MAX_LISTS = 1000
+
+
+def ensure_registry(conn):
+    """确保 table_registry 存在（与 models.TableRegistry 结构一致）"""
+    conn.execute(REGISTRY_SCHEMA)
+
+
+def ensure_common_schema(conn):
+    """创建两种引擎共用的 table_registry 和派生数据表"""
+    ensure_registry(conn)
+    for ddl in DERIVED_SCHEMA:
+        conn.execute(ddl)
+    conn.executemany(
+        "INSERT OR IGNORE INTO list_versions (list_id, version) VALUES (?, 0)",
+        [(GLOBAL_VERSION_KEY,), (CATALOG_VERSION_KEY,)]
+    )
+    # 数据库实例标识，写入 ETag，重建数据库后旧的 ETag 不会误匹配
+    conn.execute(
+        "INSERT OR IGNORE INTO storage_meta (key, value) VALUES ('instance_id', ?)",
+        (uuid.uuid4().hex[:12],)
+    )
+
+
+def bump_version(conn, list_id):
+    """列表被创建、删除或重建派生数据时更新版本号（行的修改由触发器处理）"""
+    conn.execute(
+        "UPDATE list_versions SET version = version + 1 WHERE list_id = ?",
+        (GLOBAL_VERSION_KEY,)
+    )
+    conn.execute("""
+    INSERT INTO list_versions (list_id, version)
+    VALUES (?, (SELECT version FROM list_versions WHERE list_id = ?))
+    ON CONFLICT (list_id) DO UPDATE SET version = excluded.version
+    """, (list_id, GLOBAL_VERSION_KEY))
+
+
+def register_list(conn, list_id, display_name=None, source_table_id=None):
+    """在 table_registry 中登记列表，已存在时不做任何事"""
+    is_date = bool(_DATE_RE.match(list_id))
+    cursor = conn.execute("""
+    INSERT OR IGNORE INTO table_registry
+        (table_id, display_name, table_type, source_date, source_table_id, created_at, is_active)
+    VALUES (?, ?, ?, ?, ?, ?, 1)
+    """, (
+        list_id,
+        display_name or list_id,
+        'daily' if is_date else 'copy',
+        list_id if is_date else None,
+        source_table_id,
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'),
+    ))
+    conn.execute("INSERT OR IGNORE INTO list_counters (list_id) VALUES (?)", (list_id,))
+    if cursor.rowcount:
+        bump_version(conn, list_id)
+        bump_catalog_version(conn)
+
+
+def unregister_list(conn, list_id):
+    """从 table_registry 中删除列表及其派生数据（DROP TABLE 不会触发删除触发器）
+
+    版本号保留不删，列表重建后仍从更大的值继续。
+    """
+    conn.execute("DELETE FROM table_registry WHERE table_id = ?", (list_id,))
+    conn.execute("DELETE FROM list_counters WHERE list_id = ?", (list_id,))
+    conn.execute("""
+    DELETE FROM search_index WHERE rowid IN (SELECT doc_id FROM search_docs WHERE list_id = ?)
+    """, (list_id,))
+    conn.execute("DELETE FROM search_docs WHERE list_id = ?", (list_id,))
+    bump_version(conn, list_id)
+    bump_catalog_version(conn)
+
+
+def drop_obsolete_triggers(conn):
+    """删除旧版本拆分的触发器（新的合并触发器随后安装）"""
+    names = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+             if any(name.endswith(f"_{suffix}") for suffix in OBSOLETE_TRIGGER_SUFFIXES)]
+    for name in names:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def bump_catalog_version(conn):
+    """列表目录发生变化"""
+    conn.execute(
+        "UPDATE list_versions SET version = version + 1 WHERE list_id = ?",
+        (CATALOG_VERSION_KEY,)
+    )
+
+
+def registered_list_ids(conn):
+    """所有已登记的列表标识符"""
+    rows = conn.execute("""
+    SELECT table_id FROM table_registry WHERE is_active
+    ORDER BY table_id DESC
+    """).fetchall()
+    return [table_id for (table_id,) in rows]
+
+
+def is_registered(conn, list_id):
+    """列表是否已登记"""
+    return conn.execute(
+        "SELECT 1 FROM table_registry WHERE table_id = ? AND is_active", (list_id,)
+    ).fetchone() is not None
+
+
+def sql_literal(value):
+    """把字符串转成 SQL 字面量（只用于无法绑定参数的触发器定义）"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+class StorageEngine:
+    """存储引擎基类 - 子类决定表结构，这里负责派生数据和触发器"""
+
+    name = None
+
+    def table_name(self, list_id):
+        raise NotImplementedError
+
+    def scope(self, list_id):
+        """返回 (表名, 过滤条件列表, 参数列表)"""
+        raise NotImplementedError
+
+    def trigger_target(self, list_id):
+        """返回 (表名, NEW 行的列表表达式, OLD 行的列表表达式)"""
+        raise NotImplementedError
+
+    def select_lists(self, list_ids, columns):
+        """返回读取多个列表的查询 [(SQL, 参数), ...]，每行为 list_id 加上 columns"""
+        raise NotImplementedError
+
+    def scoped(self, list_id, *conditions):
+        """返回 (表名, WHERE子句, 参数)，WHERE子句已包含引擎的列表过滤条件
+
+        额外条件的参数由调用方追加在返回的参数之后。
+        """
+        table, where, params = self.scope(list_id)
+        where = list(where) + list(conditions)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        return table, clause, list(params)
+
+    def ensure_schema(self, conn):
+        """创建公共结构和引擎自己的表，必要时重建派生数据"""
+        ensure_common_schema(conn)
+        self.create_tables(conn)
+
+        # 派生数据只由一个引擎的触发器维护；切换引擎或派生数据结构升级后整体重建一次
+        derived_owner = f"{self.name}:{DERIVED_VERSION}"
+        row = conn.execute(
+            "SELECT value FROM storage_meta WHERE key = 'derived_engine'"
+        ).fetchone()
+        if row is None or row[0] != derived_owner:
+            drop_obsolete_triggers(conn)
+            self.rebuild_derived(conn)
+            conn.execute("""
+            INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('derived_engine', ?)
+            """, (derived_owner,))
+
+        self.install_all_list_objects(conn)
+
+    def create_tables(self, conn):
+        """创建引擎自己的表"""
+
+    def install_all_list_objects(self, conn):
+        """为所有列表安装触发器和索引"""
+
+    def rebuild_derived(self, conn):
+        """根据实际数据重建所有派生数据"""
+        conn.execute("DELETE FROM list_counters")
+        conn.execute("DELETE FROM search_index")
+        conn.execute("DELETE FROM search_docs")
+        for list_id in registered_list_ids(conn):
+            self.refresh_derived(conn, list_id)
+            # 重建期间数据可能已被另一个引擎修改，版本号不清空，只往前推进
+            bump_version(conn, list_id)
+
+    def refresh_derived(self, conn, list_id):
+        """重建一个列表的计数和搜索文档（调用前该列表不应有搜索文档）"""
+        self.refresh_counters(conn, list_id)
+        self.index_list(conn, list_id)
+
+    def index_list(self, conn, list_id):
+        """把一个列表的所有行写入 search_docs 和 search_index"""
+        table, where, params = self.scoped(list_id)
+        conn.execute(f"""
+        INSERT INTO search_docs (list_id, todo_id, completed, order_num, created_at, completed_at)
+        SELECT ?, id, completed != 0, order_num, created_at, completed_at FROM {table} {where}
+        """, [list_id] + params)
+        conn.execute(f"""
+        INSERT INTO search_index (rowid, content)
+        SELECT d.doc_id, t.content FROM (SELECT id, content FROM {table} {where}) AS t
+        JOIN search_docs AS d ON d.list_id = ? AND d.todo_id = t.id
+        """, params + [list_id])
+
+    def refresh_counters(self, conn, list_id):
+        """重新统计一个列表的计数"""
+        table, where, params = self.scoped(list_id)
+        conn.execute(f"""
+        INSERT OR REPLACE INTO list_counters (list_id, total, completed)
+        SELECT ?, COUNT(*), COALESCE(SUM(completed != 0), 0) FROM {table} {where}
+        """, [list_id] + params)
+
+    def install_triggers(self, conn, list_id=None, existing=()):
+        """安装 LIST_TRIGGERS；existing 为已存在的触发器名，用于跳过"""
+        table, new_list, old_list = self.trigger_target(list_id)
+        for suffix, timing, body in LIST_TRIGGERS:
+            name = f"{table}_{suffix}"
+            if name in existing:
+                continue
+            conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {timing} ON {table}
+            FOR EACH ROW
+            BEGIN
+                {body.format(new_list=new_list, old_list=old_list)}
+            END
+            """)
+
+
+class PerDayTableEngine(StorageEngine):
+    """每个列表一个物理表，table_registry 作为列表目录
+
+    schema 大小与列表数成正比，列表很多时用 single_table，见模块说明。
+    """
+
+    name = 'per_day'
+
+    def table_name(self, list_id):
+        """根据日期或唯一标识符生成表名"""
+        return f"todo_{list_id.replace('-', '_')}"
+
+    def create_tables(self, conn):
+        """让 table_registry 与现有的物理表对齐
+
+        旧版本创建的表没有登记，这里补登记；登记了但表已不存在的记录删除。
+        只在启动时扫描一次 sqlite_master。
+        """
+        tables = set(self.scan_tables(conn))
+        registered = set(registered_list_ids(conn))
+        for list_id in tables - registered:
+            register_list(conn, list_id)
+            self.refresh_derived(conn, list_id)
+        for list_id in registered - tables:
+            unregister_list(conn, list_id)
+
+    def install_all_list_objects(self, conn):
+        """为每个每日表补装缺少的触发器和索引"""
+        existing = {name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('trigger', 'index')"
+        )}
+        for list_id in registered_list_ids(conn):
+            self.install_list_objects(conn, list_id, existing)
+
+    def install_list_objects(self, conn, list_id, existing=()):
+        """安装一个每日表的排序索引和触发器"""
+        table = self.table_name(list_id)
+        # (order_num, id) 与读取时的 ORDER BY 一致，查询无需排序，MAX(order_num) 也只读一个索引项
+        index = f"idx_{table}_order"
+        if index not in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table} (order_num, id)")
+        self.install_triggers(conn, list_id, existing)
+
+    def scope(self, list_id):
+        """返回 (表名, 过滤条件列表, 参数列表)"""
+        return self.table_name(list_id), [], []
+
+    def trigger_target(self, list_id):
+        """每个表的触发器里列表标识符是固定的字面量"""
+        literal = sql_literal(list_id)
+        return self.table_name(list_id), literal, literal
+
+    def insert_target(self, list_id):
+        """返回 (表名, 额外列, 额外值)"""
+        return self.table_name(list_id), [], []
+
+    def select_lists(self, list_ids, columns):
+        """把各列表的表用 UNION ALL 合成一个查询，列表过多时分成几个查询"""
+        queries = []
+        for start in range(0, len(list_ids), MAX_UNION_TERMS):
+            chunk = list_ids[start:start + MAX_UNION_TERMS]
+            sql = ' UNION ALL '.join(
+                f"SELECT ? AS list_id, {columns} FROM {self.table_name(list_id)}" for list_id in chunk
+            )
+            queries.append((sql, list(chunk)))
+        return queries
+
+    def create_list(self, conn, list_id, **registry_fields):
+        """创建列表对应的物理表并登记"""
+        register_list(conn, list_id, **registry_fields)
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name(list_id)} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT NOT NULL,
+            completed BOOLEAN DEFAULT 0,
+            order_num INTEGER DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            completed_at DATETIME NULL
+        )
+        """)
+        self.install_list_objects(conn, list_id)
+
+    def drop_list(self, conn, list_id):
+        """删除列表对应的物理表（连同触发器）及其登记"""
+        conn.execute(f"DROP TABLE IF EXISTS {self.table_name(list_id)}")
+        unregister_list(conn, list_id)
+
+    def list_ids(self, conn):
+        """所有已登记的列表标识符"""
+        return registered_list_ids(conn)
+
+    def scan_tables(self, conn):
+        """扫描 sqlite_master，从表名恢复列表标识符（仅用于补登记和迁移）"""
+        tables = conn.execute(f"""
+        SELECT name FROM sqlite_master
+        WHERE type='table' AND name LIKE '{LEGACY_TABLE_PATTERN}' ESCAPE '\\'
+        ORDER BY name DESC
+        """).fetchall()
+        return [name[len('todo_'):].replace('_', '-') for (name,) in tables]
+
+
+class SingleTableEngine(StorageEngine):
+    """所有列表共用一个 todos 表"""
+
+    name = 'single_table'
+    TABLE = 'todos'
+
+    def table_name(self, list_id):
+        """所有列表都在同一个表中"""
+        return self.TABLE
+
+    def create_tables(self, conn):
+        """创建 todos 表和索引（不含触发器，迁移工具也用它建表）"""
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            list_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            completed BOOLEAN DEFAULT 0,
+            order_num INTEGER DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            completed_at DATETIME NULL,
+            source_id INTEGER NULL
+        )
+        """)
+        conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_list
+        ON {self.TABLE} (list_id, order_num, id)
+        """)
+        # 迁移工具用 (list_id, source_id) 做幂等 upsert；NULL 之间互不冲突
+        conn.execute(f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_{self.TABLE}_source
+        ON {self.TABLE} (list_id, source_id)
+        """)
+
+    def install_all_list_objects(self, conn):
+        """todos 表上只需要一组触发器，索引在 create_tables 中创建"""
+        self.install_triggers(conn)
+
+    def scope(self, list_id):
+        """返回 (表名, 过滤条件列表, 参数列表)"""
+        return self.TABLE, ['list_id = ?'], [list_id]
+
+    def trigger_target(self, list_id):
+        """触发器里的列表标识符取自行本身"""
+        return self.TABLE, 'NEW.list_id', 'OLD.list_id'
+
+    def insert_target(self, list_id):
+        """返回 (表名, 额外列, 额外值)"""
+        return self.TABLE, ['list_id'], [list_id]
+
+    def select_lists(self, list_ids, columns):
+        """一个 IN 查询，按 (list_id, order_num, id) 索引读取"""
+        placeholders = ', '.join('?' * len(list_ids))
+        sql = f"SELECT list_id, {columns} FROM {self.TABLE} WHERE list_id IN ({placeholders})"
+        return [(sql, list(list_ids))]
+
+    def create_list(self, conn, list_id, **registry_fields):
+        """登记列表；空列表也需要存在，所以不能只靠 todos 中的行"""
+        register_list(conn, list_id, **registry_fields)
+
+    def drop_list(self, conn, list_id):
+        """删除列表的所有行及其登记"""
+        conn.execute(f"DELETE FROM {self.TABLE} WHERE list_id = ?", (list_id,))
+        unregister_list(conn, list_id)
+
+    def list_ids(self, conn):
+        """所有已登记的列表标识符"""
+        return registered_list_ids(conn)
+
+
+ENGINES = {
+    PerDayTableEngine.name: PerDayTableEngine,
+    SingleTableEngine.name: SingleTableEngine,
+}
+
+
+def get_engine(name):
+    """根据配置名称创建存储引擎"""
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"未知的存储引擎: {name}（可选: {', '.join(ENGINES)}）")
@@ -5,6 +5,8 @@ const CONFIG = {
   API_BASE: "/api/todos",
   DATE_FORMAT: "YYYY-MM-DD",
   LOCALE: "zh-CN",
+  SEARCH_PAGE_SIZE: 200, // 服务端每页上限
+  SEARCH_MAX_RESULTS: 1000, // 搜索最多加载的结果数，超过时提示还有更多
 };
 
 // 获取当前日期
@@ -14,5 +16,6 @@ let currentDate = today.toISOString().split("T")[0]; // 当前选中的日期 YY
 // 全局变量
 let allTodos = []; // 存储所有日期的todos
 let isSearchMode = false; // 是否处于搜索模式
+let searchHasMore = false; // 搜索结果是否超过了 SEARCH_MAX_RESULTS
 let rightClickedDate = null; // 存储右键点击的日期
 let pinnedDates = new Set(); // 存储置顶的日期
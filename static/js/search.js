@@ -12,13 +12,9 @@ function searchTodos() {
   isSearchMode = true;
   document.getElementById("clear-search-btn").style.display = "inline-block";
 
-  // 获取所有日期的todos进行搜索
-  fetchAllTodos().then(() => {
-    const filteredTodos = allTodos.filter((todo) =>
-      todo.content.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
-    displaySearchResults(filteredTodos, searchTerm);
+  // 由服务端全文索引完成搜索
+  fetchSearchResults(searchTerm).then(() => {
+    displaySearchResults(allTodos, searchTerm);
   });
 }
 
@@ -34,26 +30,42 @@ function clearSearch() {
   fetchTodos();
 }
 
-function fetchAllTodos() {
-  // 获取所有日期的todos
-  return fetch(CONFIG.API_BASE + "/counts")
-    .then((r) => r.json())
-    .then((counts) => {
-      const promises = Object.keys(counts).map((date) =>
-        fetch(CONFIG.API_BASE + "?date=" + date).then((r) => r.json())
-      );
-
-      return Promise.all(promises).then((results) => {
-        allTodos = results.flat();
+function fetchSearchResults(searchTerm) {
+  // 搜索所有日期的todos，按 next_cursor 逐页加载，最多 SEARCH_MAX_RESULTS 条
+  allTodos = [];
+  searchHasMore = false;
+
+  function fetchPage(cursor) {
+    let url =
+      "/api/search?limit=" +
+      CONFIG.SEARCH_PAGE_SIZE +
+      "&q=" +
+      encodeURIComponent(searchTerm);
+    if (cursor) url += "&cursor=" + encodeURIComponent(cursor);
+    return fetch(url)
+      .then((r) => r.json())
+      .then((data) => {
+        allTodos = allTodos.concat(data.results || []);
+        if (!data.next_cursor) return;
+        if (allTodos.length >= CONFIG.SEARCH_MAX_RESULTS) {
+          searchHasMore = true;
+          return;
+        }
+        return fetchPage(data.next_cursor);
       });
-    });
+  }
+
+  return fetchPage(null);
 }
 
 function displaySearchResults(filteredTodos, searchTerm) {
   const list = document.getElementById("todo-list");
   const title = document.getElementById("current-date-title");
 
-  title.textContent = `搜索结果: "${searchTerm}" (${filteredTodos.length}条)`;
+  const count = searchHasMore
+    ? `前${filteredTodos.length}条，还有更多结果，请缩小搜索范围`
+    : `${filteredTodos.length}条`;
+  title.textContent = `搜索结果: "${searchTerm}" (${count})`;
 
   list.innerHTML = "";
 
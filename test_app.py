@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+测试应用工厂：app.py 和 app.pyw 得到同样配置的应用
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def test_create_app_uses_selected_config(api_manager):
+    app = create_app('production')
+    assert app.config['SQLITE_PRAGMAS']['cache_size'] == -64000
+    assert app.config['SQLALCHEMY_DATABASE_URI'].endswith('todos_new.db')
+
+    # 同一进程中可以创建多个应用（蓝图上的钩子只挂一次）
+    testing = create_app('testing')
+    assert testing.config['TESTING']
+    assert testing.test_client().get('/api/todos/counts').status_code == 200
+
+
+def test_metrics_count_api_requests(api_manager):
+    client = create_app('testing').test_client()
+    client.get('/api/todos/counts')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'todo_http_request_duration_seconds_count{endpoint="/api/todos/counts",method="GET",status="200"}' in text
+    assert 'todo_db_queries_total' in text
+
+
+def test_sql_trace_follows_config(api_manager):
+    app = create_app('testing')
+    client = app.test_client()
+    assert 'Server-Timing' not in client.get('/api/todos/counts').headers
+
+    app.config['SQL_TRACE'] = True
+    assert client.get('/api/todos/counts').headers['Server-Timing'].startswith('db;dur=')
+    app.config['SQL_TRACE_SERVER_TIMING'] = False
+    assert 'Server-Timing' not in client.get('/api/todos/counts').headers
+
+
+def test_profiler_follows_config_and_token(api_manager, tmp_path):
+    app = create_app('testing')
+    app.config['PROFILE_DIR'] = str(tmp_path / 'profiles')
+    client = app.test_client()
+    assert 'X-Profile-Id' not in client.get('/api/todos/counts?profile=1').headers
+    assert client.get('/api/admin/profiles').status_code == 404
+
+    app.config.update(PROFILE_REQUESTS=True, PROFILE_TOKEN='secret')
+    assert 'X-Profile-Id' not in client.get('/api/todos/counts?profile=wrong').headers
+    profile_id = client.get('/api/todos/counts?profile=secret').headers['X-Profile-Id']
+    assert client.get('/api/admin/profiles').status_code == 404
+    profiles = client.get('/api/admin/profiles', headers={'X-Profile-Token': 'secret'}).get_json()
+    assert [profile['id'] for profile in profiles] == [profile_id]
+    assert profiles[0]['path'] == '/api/todos/counts'
+
+
+def test_rollover_scheduler_starts_once(api_manager, monkeypatch):
+    import app as app_module
+    from config import TestingConfig
+
+    started = []
+    monkeypatch.setattr(TestingConfig, 'ROLLOVER_AT_MIDNIGHT', True)
+    monkeypatch.setattr(app_module, '_rollover_thread', None)
+    monkeypatch.setattr(app_module, 'start_rollover_scheduler', lambda *args: started.append(args) or object())
+    create_app('testing')
+    create_app('testing')
+    assert len(started) == 1
+
+
+def test_copy_date_requires_only_source_date(api_manager):
+    client = create_app('testing').test_client()
+    response = client.post('/api/todos/copy-date', json={})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Source date is required'
+
+    api_manager.add_todo('2025-07-28', "任务")
+    response = client.post('/api/todos/copy-date', json={'source_date': '2025-07-28'})
+    assert response.status_code == 200
+    assert response.get_json()['target_date'].startswith('copy-')
+
+
+def test_pool_connections_use_selected_config(api_manager):
+    create_app('production')
+    with api_manager._connect():
+        pass
+    pragmas = api_manager.pool.active_pragmas()
+    assert pragmas['cache_size'] == -64000
+    assert api_manager.pool.size == 10
+
+    create_app('testing')
+    with api_manager._connect():
+        pass
+    pragmas = api_manager.pool.active_pragmas()
+    assert pragmas['cache_size'] == -16000
+    assert pragmas['synchronous'] == 0
+
+
+def test_slow_query_log_follows_app_config(api_manager, caplog):
+    api_manager.import_todos('2025-07-28', [{'content': f"任务{i}"} for i in range(200)])
+    app = create_app('testing')
+    client = app.test_client()
+    client.get('/api/todos?date=2025-07-28')
+    assert '慢查询' not in caplog.text
+
+    app.config.update(SQL_TRACE=True, SQL_SLOW_MS=0)
+    api_manager._read_cache.clear()
+    with caplog.at_level('WARNING', logger='services.sql_trace'):
+        client.get('/api/todos?date=2025-07-28')
+    slow = [record.getMessage() for record in caplog.records if '慢查询' in record.getMessage()]
+    assert slow and all('[GET /api/todos]' in message for message in slow)
+    # 进度回调随应用配置安装：读取 200 行的语句记录到了指令数
+    assert any('steps~0 ' not in message for message in slow)
+
+    caplog.clear()
+    app.config['SQL_SLOW_MS'] = 60000
+    client.get('/api/todos?date=2025-07-28')
+    assert '慢查询' not in caplog.text
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+测试批量修改：原子模式整体回滚，非原子模式只撤销失败的操作，错误输入返回400
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.batch_service import apply_batch
+
+
+def test_atomic_batch_rolls_back_everything(manager):
+    todo_id = manager.add_todo('2025-07-28', "原有")
+    committed, results = apply_batch(manager, [
+        {'op': 'create', 'date': '2025-07-29', 'content': "新列表中的任务"},
+        {'op': 'update', 'date': '2025-07-28', 'id': todo_id, 'completed': True},
+        {'op': 'delete', 'date': '2025-07-28', 'id': 999},
+    ])
+    assert not committed
+    assert [result['status'] for result in results] == [201, 200, 404]
+    assert manager.get_available_dates() == ['2025-07-28']
+    assert manager.get_todo('2025-07-28', todo_id)['completed'] is False
+    assert manager.get_todo_stats() == {'2025-07-28': {'total': 1, 'completed': 0}}
+
+
+def test_non_atomic_batch_skips_failed_operations(manager):
+    first = manager.add_todo('2025-07-28', "第一")
+    second = manager.add_todo('2025-07-28', "第二")
+    committed, results = apply_batch(manager, [
+        {'op': 'create', 'date': '2025-07-29', 'content': "保留"},
+        ['not', 'an', 'object'],
+        {'op': 'create', 'date': '2025-07-30', 'content': None},
+        {'op': 'create', 'date': '2025-07-30', 'content': "坏的顺序", 'order': "abc"},
+        {'op': 'reorder', 'date': '2025-07-28', 'ids': [[1]]},
+        {'op': 'update', 'date': '2025-07-28', 'id': first, 'order': "abc"},
+        {'op': 'move', 'date': '2025-07-28', 'id': first, 'prev_id': second},
+    ], atomic=False)
+    assert committed
+    assert [result['status'] for result in results] == [201, 400, 400, 400, 400, 400, 200]
+    assert results[1]['op'] is None
+    assert manager.get_available_dates() == ['2025-07-29', '2025-07-28']
+    assert [todo['id'] for todo in manager.get_todos_for_date('2025-07-28')] == [second, first]
+
+
+def test_failed_operation_inside_savepoint_is_undone(manager, monkeypatch):
+    """操作写了一部分后出错，只撤销这个操作（包括它创建的列表）"""
+    import sqlite3
+    original = manager.add_todo_returning
+
+    def add_then_fail(date, content, order_num=None):
+        original(date, content, order_num)
+        if content == "失败":
+            raise sqlite3.IntegrityError("模拟失败")
+        return original(date, content, order_num)
+
+    monkeypatch.setattr(manager, 'add_todo_returning', add_then_fail)
+    committed, results = apply_batch(manager, [
+        {'op': 'create', 'date': '2025-07-28', 'content': "成功"},
+        {'op': 'create', 'date': '2025-07-29', 'content': "失败"},
+    ], atomic=False)
+    assert committed
+    assert [result['status'] for result in results] == [201, 500]
+    assert manager.get_available_dates() == ['2025-07-28']
+    assert manager.get_todo_counts() == {'2025-07-28': 2}
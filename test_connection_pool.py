@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试连接池：命中/新建/等待/超时统计、池满超时、损坏连接的丢弃
+"""
+import threading
+import time
+
+import pytest
+
+from services.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2, timeout=0.2)
+    yield pool
+    pool.close_all()
+
+
+def test_hits_and_misses(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        # 后进先出：复用刚归还的连接
+        assert again is first
+    stats = pool.stats()
+    assert (stats['misses'], stats['hits'], stats['opened'], stats['idle'], stats['in_use']) == (1, 1, 1, 1, 0)
+
+
+def test_timeout_when_all_connections_are_checked_out(pool):
+    held = [pool.acquire(), pool.acquire()]
+    assert pool.stats()['in_use'] == 2
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats['timeouts'], stats['waits'], stats['opened']) == (1, 0, 2)
+
+    for conn in held:
+        pool.release(conn)
+    assert pool.stats()['idle'] == 2
+
+
+def test_wait_for_a_released_connection(pool):
+    held = [pool.acquire(), pool.acquire()]
+    releaser = threading.Timer(0.05, pool.release, (held[0],))
+    releaser.start()
+    start = time.perf_counter()
+    conn = pool.acquire()
+    releaser.join()
+    assert conn is held[0]
+    stats = pool.stats()
+    assert (stats['waits'], stats['timeouts'], stats['opened']) == (1, 0, 2)
+    assert 0 < stats['wait_time_max_ms'] <= (time.perf_counter() - start) * 1000
+    assert stats['wait_time_total_ms'] == stats['wait_time_max_ms']
+    pool.release(conn)
+    pool.release(held[1])
+
+
+def test_open_transaction_is_rolled_back_on_release(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x)")
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.connection() as again:
+        assert again is conn and not again.in_transaction
+        assert again.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+
+
+def test_broken_connection_is_dropped(pool):
+    conn = pool.acquire()
+    conn.execute("BEGIN")
+    conn.close()  # 归还时回滚失败
+    pool.release(conn)
+    stats = pool.stats()
+    assert (stats['opened'], stats['idle']) == (0, 0)
+
+    # 名额已释放，下次新建连接而不是取回损坏的连接
+    with pool.connection() as fresh:
+        assert fresh is not conn
+        assert fresh.execute("SELECT 1").fetchone() == (1,)
+    assert pool.stats()['misses'] == 2
+
+
+def test_configure_replaces_connections(pool):
+    held = pool.acquire()
+    with pool.connection():
+        pass
+    pool.configure(size=3, timeout=1, pragmas={'cache_size': -1000})
+    stats = pool.stats()
+    assert (stats['size'], stats['opened'], stats['idle']) == (3, 1, 0)
+
+    # 按旧参数打开的连接归还时关闭
+    pool.release(held)
+    assert pool.stats()['opened'] == 0
+    assert pool.active_pragmas()['cache_size'] == -1000
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+测试整表复制：完成状态、顺序、复制列表的显示名称
+"""
+import pytest
+
+import routes
+from models import ORDER_GAP
+
+SOURCE = '2025-07-28'
+
+
+@pytest.fixture
+def manager(manager):
+    """源列表：顺序有间隔，第二个任务已完成"""
+    for i, order in enumerate((5, 40, 100)):
+        todo_id = manager.add_todo(SOURCE, f"任务{i}", order_num=order)
+        if i == 1:
+            manager.update_todo(SOURCE, todo_id, completed=True)
+    return manager
+
+
+def _registry(manager, list_id):
+    with manager._connect() as conn:
+        return conn.execute(
+            "SELECT display_name, table_type, source_table_id FROM table_registry WHERE table_id = ?",
+            (list_id,)
+        ).fetchone()
+
+
+def test_default_copy_resets_completion_and_renumbers(manager):
+    assert manager.copy_list(SOURCE, 'copy-1') == 3
+    todos = manager.get_todos_for_date('copy-1')
+    assert [todo['content'] for todo in todos] == ["任务0", "任务1", "任务2"]
+    assert [todo['order'] for todo in todos] == [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+    assert not any(todo['completed'] or todo['completed_at'] for todo in todos)
+    # 源列表不变
+    assert [todo['completed'] for todo in manager.get_todos_for_date(SOURCE)] == [False, True, False]
+
+
+def test_preserve_completed(manager):
+    manager.copy_list(SOURCE, 'copy-1', preserve_completed=True)
+    source = manager.get_todos_for_date(SOURCE)
+    copied = manager.get_todos_for_date('copy-1')
+    assert [todo['completed'] for todo in copied] == [False, True, False]
+    assert copied[1]['completed_at'] == source[1]['completed_at']
+    assert manager.get_todo_stats()['copy-1'] == {'total': 3, 'completed': 1}
+
+
+def test_preserve_order_shifts_after_existing_todos(manager):
+    manager.copy_list(SOURCE, 'copy-1', preserve_order=True)
+    assert [todo['order'] for todo in manager.get_todos_for_date('copy-1')] == [5, 40, 100]
+
+    # 目标已有任务时整体平移到最后，保留原间隔
+    manager.copy_list(SOURCE, 'copy-1', preserve_order=True)
+    orders = [todo['order'] for todo in manager.get_todos_for_date('copy-1')]
+    assert orders == [5, 40, 100, 105, 140, 200]
+
+    manager.copy_list(SOURCE, 'copy-1')
+    assert [todo['order'] for todo in manager.get_todos_for_date('copy-1')][6:] == [
+        200 + ORDER_GAP, 200 + 2 * ORDER_GAP, 200 + 3 * ORDER_GAP]
+
+
+def test_display_name_is_registered_for_new_lists(manager):
+    manager.copy_list(SOURCE, 'copy-1', display_name="周会备份")
+    assert _registry(manager, 'copy-1') == ("周会备份", 'copy', SOURCE)
+
+    # 已存在的列表保留原来的显示名称
+    manager.copy_list(SOURCE, 'copy-1', display_name="另一个名字")
+    assert _registry(manager, 'copy-1')[0] == "周会备份"
+
+    # 不传时使用列表标识符
+    manager.copy_list(SOURCE, 'copy-2')
+    assert _registry(manager, 'copy-2') == ('copy-2', 'copy', SOURCE)
+
+
+def test_copy_route_passes_options(manager, client, monkeypatch):
+    monkeypatch.setattr(routes, 'todo_manager', manager)
+    response = client.post('/api/todos/copy-date', json={
+        'source_date': SOURCE, 'preserve_completed': True, 'preserve_order': True,
+        'display_name': "周会备份",
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 3
+    copied = manager.get_todos_for_date(body['target_date'])
+    assert [(todo['order'], todo['completed']) for todo in copied] == [(5, False), (40, True), (100, False)]
+    assert _registry(manager, body['target_date'])[0] == "周会备份"
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试触发器维护的派生数据：计数、搜索文档、版本号
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import DailyTodoManager
+from services.storage_engine import PerDayTableEngine, SingleTableEngine
+
+
+@pytest.mark.parametrize('engine', [PerDayTableEngine(), SingleTableEngine()], ids=lambda e: e.name)
+def test_counts_follow_inserts_updates_and_deletes(tmp_path, engine):
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'), engine=engine)
+    ids = [manager.add_todo('2025-07-28', f"任务{i}") for i in range(3)]
+    manager.add_todo('2025-07-29', "另一天")
+
+    manager.update_todo('2025-07-28', ids[0], completed=True)
+    manager.update_todo('2025-07-28', ids[0], content="只改内容")
+    manager.delete_todo('2025-07-28', ids[1])
+
+    assert manager.get_todo_stats() == {
+        '2025-07-29': {'total': 1, 'completed': 0},
+        '2025-07-28': {'total': 2, 'completed': 1},
+    }
+    results, _ = manager.search_todos("只改内容")
+    assert [todo['id'] for todo in results] == [ids[0]]
+    assert manager.search_todos("任务1")[0] == []
+
+
+def test_moving_rows_between_lists_updates_both(tmp_path):
+    db_path = str(tmp_path / 'todos.db')
+    manager = DailyTodoManager(db_path, engine=SingleTableEngine())
+    todo_id = manager.add_todo('2025-07-28', "移动的任务")
+    manager.update_todo('2025-07-28', todo_id, completed=True)
+    manager.add_todo('2025-07-29', "留下")
+    old_tag = manager.get_version_tag('2025-07-29')
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE todos SET list_id = '2025-07-29' WHERE id = ?", (todo_id,))
+    conn.close()
+    manager._read_cache.clear()
+
+    assert manager.get_todo_stats() == {
+        '2025-07-29': {'total': 2, 'completed': 1},
+        '2025-07-28': {'total': 0, 'completed': 0},
+    }
+    assert manager.get_version_tag('2025-07-29') != old_tag
+    results, _ = manager.search_todos("移动的任务")
+    assert [todo['date'] for todo in results] == ['2025-07-29']
+
+
+def test_one_trigger_per_event_and_old_triggers_are_replaced(tmp_path):
+    db_path = str(tmp_path / 'todos.db')
+    manager = DailyTodoManager(db_path, engine=PerDayTableEngine())
+    manager.add_todo('2025-07-28', "任务")
+    manager.pool.close_all()
+
+    # 模拟旧版本：按用途拆分的触发器，派生数据版本较旧
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("""
+        CREATE TRIGGER todo_2025_07_28_count_ins AFTER INSERT ON todo_2025_07_28
+        BEGIN UPDATE list_counters SET total = total + 100; END
+        """)
+        conn.execute("UPDATE storage_meta SET value = 'per_day:2' WHERE key = 'derived_engine'")
+    conn.close()
+
+    manager = DailyTodoManager(db_path, engine=PerDayTableEngine())
+    manager.add_todo('2025-07-28', "升级后")
+    assert manager.get_todo_counts() == {'2025-07-28': 2}
+
+    with manager._connect() as conn:
+        triggers = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'todo_2025_07_28' ORDER BY name"
+        )]
+    assert triggers == ['todo_2025_07_28_derived_del', 'todo_2025_07_28_derived_ins',
+                        'todo_2025_07_28_derived_upd']
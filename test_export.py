@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+测试单个列表的 markdown 导出：文件名、复制列表、导出缓存，以及流式读取
+"""
+from urllib.parse import unquote
+
+
+def _content_disposition(response):
+    value = response.headers['Content-Disposition']
+    value.encode('latin-1')  # 响应头必须能按 latin-1 发送
+    return value
+
+
+def test_non_ascii_list_id_is_encoded_in_filename(api_manager, client):
+    api_manager.add_todo('工作清单', "任务")
+    response = client.get('/api/todos/export/工作清单')
+    assert response.status_code == 200
+    value = _content_disposition(response)
+    assert value.startswith('attachment; filename="-todo.md"; ')
+    assert unquote(value.split("filename*=UTF-8''", 1)[1]) == '工作清单-todo.md'
+    assert "- [ ] 任务" in response.get_data(as_text=True)
+
+
+def test_copy_list_export(api_manager, client):
+    api_manager.add_todo('2025-07-28', "原任务")
+    copy_id = api_manager.new_copy_list_id()
+    api_manager.copy_list('2025-07-28', copy_id)
+    response = client.get(f'/api/todos/export/{copy_id}')
+    assert _content_disposition(response) == f'attachment; filename="{copy_id}-todo.md"'
+    text = response.get_data(as_text=True)
+    assert text.startswith(f"# {copy_id} Todo")
+    assert "- [ ] 原任务" in text
+
+    date_response = client.get('/api/todos/export/2025-07-28')
+    assert _content_disposition(date_response) == 'attachment; filename="07.28-todo.md"'
+
+
+def test_repeated_export_is_served_from_cache(api_manager, client, monkeypatch):
+    api_manager.add_todo('2025-07-28', "任务")
+    reads = []
+    iter_list_rows = api_manager.iter_list_rows
+    monkeypatch.setattr(api_manager, 'iter_list_rows', lambda *args: reads.append(args) or iter_list_rows(*args))
+
+    first = client.get('/api/todos/export/2025-07-28').get_data(as_text=True)
+    assert client.get('/api/todos/export/2025-07-28').get_data(as_text=True) == first
+    assert len(reads) == 1
+
+    api_manager.add_todo('2025-07-28', "新任务")
+    assert "新任务" in client.get('/api/todos/export/2025-07-28').get_data(as_text=True)
+    assert len(reads) == 2
+
+
+def test_dump_filename_header(client):
+    value = _content_disposition(client.get('/api/export/all?format=csv&gzip=1'))
+    assert value.startswith('attachment; filename="todos-') and value.endswith('.csv.gz"')
+
+
+def test_streaming_reads_on_fresh_database(manager):
+    # 新数据库上第一次调用就是流式读取：公共表还没建好
+    assert list(manager.iter_all_todos()) == []
+    assert list(manager.iter_list_rows('2025-07-28')) == []
+
+
+def test_streaming_missing_list_yields_nothing(manager):
+    manager.add_todo('2025-07-28', "任务")
+    assert list(manager.iter_list_rows('2025-07-29')) == []
+    assert [row[1] for row in manager.iter_list_rows('2025-07-28')] == ["任务"]
+    assert [todo['content'] for todo in manager.iter_all_todos()] == ["任务"]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+测试 ETag / 304：列表和计数接口的版本标记随修改变化
+"""
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/api/todos?date=2025-07-28', '/api/todos/counts',
+                                  '/api/todos/export/2025-07-28'])
+def test_unchanged_resources_return_304(api_manager, client, path):
+    api_manager.add_todo('2025-07-28', "任务")
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    response = client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    api_manager.add_todo('2025-07-28', "新任务")
+    response = client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_list_etag_only_changes_with_that_list(api_manager, client):
+    api_manager.add_todo('2025-07-28', "任务")
+    etag = client.get('/api/todos?date=2025-07-28').headers['ETag']
+    api_manager.add_todo('2025-07-29', "另一天")
+    assert client.get('/api/todos?date=2025-07-28', headers={'If-None-Match': etag}).status_code == 304
+    # 全局计数随任何列表变化
+    counts_etag = client.get('/api/todos/counts').headers['ETag']
+    api_manager.add_todo('2025-07-29', "再加一个")
+    assert client.get('/api/todos/counts', headers={'If-None-Match': counts_etag}).status_code == 200
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+测试全库导出/导入的往返，以及导入错误输入时返回带行号的400
+"""
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import routes
+from models import DailyTodoManager
+
+
+def _strip(todos):
+    return [(todo['content'], todo['completed'], todo['order']) for todo in todos]
+
+
+def test_dump_and_import_round_trip(tmp_path, monkeypatch, api_manager, client):
+    api_manager.add_todo('2025-07-28', "第一")
+    done = api_manager.add_todo('2025-07-28', "完成的")
+    api_manager.update_todo('2025-07-28', done, completed=True)
+    api_manager.add_todo('2025-07-29', "第二天")
+
+    dump = client.get('/api/export/all?gzip=1').data
+    markdown = client.get('/api/todos/export/2025-07-28').data
+
+    restored = DailyTodoManager(str(tmp_path / 'restored.db'))
+    monkeypatch.setattr(routes, 'todo_manager', restored)
+    response = client.post('/api/todos/import?format=jsonl&gzip=1', data=dump)
+    assert response.status_code == 201
+    assert response.get_json()['imported'] == {'2025-07-28': 2, '2025-07-29': 1}
+    for list_id in ('2025-07-28', '2025-07-29'):
+        assert _strip(restored.get_todos_for_date(list_id)) == _strip(api_manager.get_todos_for_date(list_id))
+
+    response = client.post('/api/todos/import?date=copy-restored', data=markdown)
+    assert response.status_code == 201
+    assert [(todo['content'], todo['completed']) for todo in restored.get_todos_for_date('copy-restored')] == [
+        ("第一", False), ("完成的", True)]
+
+
+@pytest.mark.parametrize('body, query, message', [
+    ('{"date": "2025-07-28", "content": "好"}\n[1, 2]\n', 'format=jsonl', '第 2 行: 不是 JSON 对象'),
+    ('{"date": "2025-07-28", "content": "好", "order": "abc"}\n', 'format=jsonl', '第 1 行: order 必须是整数'),
+    ('{"date": "2025-07-28", "content": null}\n', 'format=jsonl', '第 1 行: content 必须是字符串'),
+    ('{"date": 5, "content": "好"}\n', 'format=jsonl', '第 1 行: 无效的列表标识符'),
+    ('{"date": "2025-07-28", "content": "好"}\n{oops\n', 'format=jsonl', '第 2 行'),
+    ('not gzip at all', 'format=jsonl&gzip=1', '第 1 行'),
+])
+def test_invalid_import_returns_400_with_line(api_manager, client, body, query, message):
+    response = client.post(f'/api/todos/import?{query}', data=body.encode('utf-8'))
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+    # 出错的列表整体回滚
+    assert api_manager.get_available_dates() == []
+
+
+def test_string_order_is_coerced(api_manager, client):
+    body = json.dumps({'date': '2025-07-28', 'content': "任务", 'order': "5"}) + '\n'
+    response = client.post('/api/todos/import?format=jsonl&gzip=1', data=gzip.compress(body.encode('utf-8')))
+    assert response.status_code == 201
+    assert api_manager.get_todos_for_date('2025-07-28')[0]['order'] == 5
+
+
+def test_dump_reads_one_snapshot(tmp_path):
+    db_path = str(tmp_path / 'todos.db')
+    api_manager = DailyTodoManager(db_path)
+    api_manager.add_todo('2025-07-28', "第一天")
+    api_manager.add_todo('2025-07-29', "第二天")
+
+    todos = api_manager.iter_all_todos()
+    assert next(todos)['date'] == '2025-07-28'
+    # 导出进行中，另一个进程删除和新建列表
+    other = DailyTodoManager(db_path)
+    other.delete_all_todos_for_date('2025-07-29')
+    other.add_todo('2025-07-30', "新列表")
+    assert [todo['date'] for todo in todos] == ['2025-07-29']
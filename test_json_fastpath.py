@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试 JSON1 快速路径与逐行构造字典的输出一致
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import ORDER_GAP, DailyTodoManager
+from services.storage_engine import PerDayTableEngine, SingleTableEngine
+
+
+@pytest.mark.parametrize('engine', [PerDayTableEngine(), SingleTableEngine()], ids=lambda e: e.name)
+def test_sql_json_matches_python_output(tmp_path, engine):
+    """各种内容、完成状态和排序下两条路径返回相同的数据"""
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'), engine=engine)
+    date = '2025-07-28'
+
+    assert json.loads(manager.get_todos_json(date)) == manager.get_todos_for_date(date) == []
+
+    contents = ['普通任务', 'quote " and \\ backslash', '换行\n和\t制表符', 'emoji 🎉', "单引号 ' 也要转义"]
+    ids = [manager.add_todo(date, content) for content in contents]
+    manager.update_todo(date, ids[1], completed=True)
+    manager.reorder_todos(date, list(reversed(ids)))
+    manager.create_table_for_date('2025-07-29')
+
+    for day in (date, '2025-07-29'):
+        assert json.loads(manager.get_todos_json(day)) == manager.get_todos_for_date(day)
+
+
+@pytest.mark.parametrize('engine', [PerDayTableEngine(), SingleTableEngine()], ids=lambda e: e.name)
+def test_sql_json_pages_match_python_pages(tmp_path, engine):
+    """分页、完成状态过滤和字段投影下两条路径的数据和游标一致"""
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'), engine=engine)
+    date = '2025-07-28'
+    ids = [manager.add_todo(date, f"任务{i}") for i in range(7)]
+    manager.update_todo(date, ids[2], completed=True)
+
+    for page in ({'limit': 3}, {'limit': 3, 'completed': False}, {'fields': ['id', 'order']}):
+        after = None
+        while True:
+            todos, next_after = manager.get_todos_page(date, after=after, **page)
+            text, json_next_after = manager.get_todos_page(date, after=after, as_json=True, **page)
+            assert json.loads(text) == todos
+            assert json_next_after == next_after
+            if next_after is None:
+                break
+            after = next_after
+
+
+def test_route_output_matches_jsonify(api_manager, client):
+    """开关 SQL_JSON_RESPONSES 时 GET /api/todos 返回相同的数据和游标"""
+    date = '2025-07-28'
+    ids = [api_manager.add_todo(date, content) for content in ('普通任务', '换行\n"引号"', 'emoji 🎉')]
+    api_manager.update_todo(date, ids[0], completed=True)
+    paths = [f'/api/todos?date={date}', f'/api/todos?date={date}&limit=2',
+             f'/api/todos?date={date}&limit=2&after={ORDER_GAP * 2},{ids[1]}',
+             f'/api/todos?date={date}&completed=false&fields=id,content', '/api/todos?date=2025-01-01']
+    responses = {}
+    for as_json in (False, True):
+        client.application.config['SQL_JSON_RESPONSES'] = as_json
+        responses[as_json] = [client.get(path) for path in paths]
+    for plain, fast in zip(responses[False], responses[True]):
+        assert plain.status_code == fast.status_code == 200
+        assert plain.mimetype == fast.mimetype == 'application/json'
+        assert plain.get_json() == fast.get_json()
+        assert plain.headers.get('X-Next-After') == fast.headers.get('X-Next-After')
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+测试内存中的列表目录：未提交的建表不对其他线程可见，回滚后不残留
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import DailyTodoManager
+from services.storage_engine import PerDayTableEngine, SingleTableEngine
+
+
+@pytest.mark.parametrize('engine', [PerDayTableEngine(), SingleTableEngine()], ids=lambda e: e.name)
+def test_uncommitted_lists_are_not_published(tmp_path, engine):
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'), engine=engine)
+    manager.add_todo('2025-07-28', "已有")
+    created = threading.Event()
+    checked = threading.Event()
+
+    def writer():
+        with pytest.raises(RuntimeError):
+            with manager.transaction():
+                manager.add_todo('2025-07-29', "未提交")
+                created.set()
+                checked.wait(5)
+                raise RuntimeError("回滚")
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    created.wait(5)
+    try:
+        assert not manager.table_exists('2025-07-29')
+        assert manager.get_todos_for_date('2025-07-29') == []
+    finally:
+        checked.set()
+        thread.join()
+
+    assert manager.get_available_dates() == ['2025-07-28']
+
+
+def test_transaction_sees_its_own_lists(tmp_path):
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'), engine=PerDayTableEngine())
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.add_todo('2025-07-29', "未提交")
+            assert manager.table_exists('2025-07-29')
+            assert manager.get_available_dates() == ['2025-07-29']
+            raise RuntimeError("回滚")
+    assert not manager.table_exists('2025-07-29')
+
+
+def test_committed_lists_are_published_once(tmp_path):
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'), engine=PerDayTableEngine())
+    with manager.transaction():
+        for i in range(3):
+            manager.import_todos(f"copy-{i}", [{'content': "任务"}])
+    assert manager.get_available_dates() == ['copy-2', 'copy-1', 'copy-0']
+    manager.delete_all_todos_for_date('copy-1')
+    assert manager.get_available_dates() == ['copy-2', 'copy-0']
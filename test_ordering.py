@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+测试任务排序：整表重排、按邻居移动、间隔用完时重新编号，以及更新接口的顺序校验
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import ORDER_GAP
+
+DATE = '2025-07-28'
+
+
+def _ids(manager):
+    return [todo['id'] for todo in manager.get_todos_for_date(DATE)]
+
+
+def test_reorder_assigns_gapped_orders(manager):
+    a, b, c = (manager.add_todo(DATE, name) for name in "abc")
+    assert manager.reorder_todos(DATE, [c, a, b]) == 3
+    assert _ids(manager) == [c, a, b]
+    assert [todo['order'] for todo in manager.get_todos_for_date(DATE)] == [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+
+
+def test_move_between_neighbours_and_to_edges(manager):
+    a, b, c = (manager.add_todo(DATE, name) for name in "abc")
+    assert manager.move_todo(DATE, c, prev_id=a, next_id=b)['id'] == c
+    assert _ids(manager) == [a, c, b]
+    manager.move_todo(DATE, b, next_id=a)
+    assert _ids(manager) == [b, a, c]
+    manager.move_todo(DATE, b, prev_id=c)
+    assert _ids(manager) == [a, c, b]
+    assert manager.move_todo(DATE, a, prev_id=999) is None
+    assert manager.move_todo('2025-01-01', a, prev_id=b) is None
+
+
+def test_move_renumbers_when_gap_is_used_up(manager):
+    a, b = manager.add_todo(DATE, "a"), manager.add_todo(DATE, "b")
+    movers = [manager.add_todo(DATE, f"m{i}") for i in range(12)]
+    # 每次都插到 a 和它的下一个之间，2**10 的间隔约 10 次后用完
+    for mover in movers:
+        following = _ids(manager)[1]
+        manager.move_todo(DATE, mover, prev_id=a, next_id=following)
+    assert _ids(manager) == [a] + movers[::-1] + [b]
+    orders = [todo['order'] for todo in manager.get_todos_for_date(DATE)]
+    assert len(set(orders)) == len(orders)
+
+
+def test_update_route_rejects_non_integer_order(api_manager, client):
+    todo_id = api_manager.add_todo(DATE, "任务")
+    for order in (True, "5", 1.5, None):
+        response = client.put(f'/api/todos/{todo_id}', json={'date': DATE, 'order': order})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'order must be an integer'
+    assert api_manager.get_todo(DATE, todo_id)['order'] == ORDER_GAP
+
+    response = client.put(f'/api/todos/{todo_id}', json={'date': DATE, 'order': 7})
+    assert response.status_code == 200
+    assert response.get_json()['order'] == 7
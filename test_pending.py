@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试跨列表的未完成任务：过滤、按游标分页、无效参数返回400
+"""
+import pytest
+
+import routes
+
+
+@pytest.fixture
+def manager(manager):
+    """三个列表，每个列表中有已完成和未完成的任务"""
+    for list_id in ('2025-07-29', '2025-07-28', 'copy-1'):
+        for i in range(3):
+            todo_id = manager.add_todo(list_id, f"{list_id} 任务{i}")
+            if i == 1:
+                manager.update_todo(list_id, todo_id, completed=True)
+    return manager
+
+
+def _contents(todos):
+    return [todo['content'] for todo in todos]
+
+
+EXPECTED = ["2025-07-28 任务0", "2025-07-28 任务2", "2025-07-29 任务0", "2025-07-29 任务2",
+            "copy-1 任务0", "copy-1 任务2"]
+
+
+def test_pending_across_lists(manager):
+    todos, next_after = manager.get_pending_todos()
+    assert _contents(todos) == EXPECTED
+    assert next_after is None
+    assert not any(todo['completed'] for todo in todos)
+    assert todos[0] == manager.get_todo('2025-07-28', todos[0]['id'])
+
+    # 完成、删除和重新打开后结果跟着变
+    manager.update_todo('2025-07-28', todos[0]['id'], completed=True)
+    manager.delete_all_todos_for_date('copy-1')
+    reopened = [todo for todo in manager.get_todos_for_date('2025-07-29') if todo['completed']][0]
+    manager.update_todo('2025-07-29', reopened['id'], completed=False)
+    assert _contents(manager.get_pending_todos()[0]) == [
+        "2025-07-28 任务2", "2025-07-29 任务0", "2025-07-29 任务1", "2025-07-29 任务2"]
+
+
+def test_pending_cursor_pages(manager):
+    pages = []
+    after = None
+    while True:
+        todos, after = manager.get_pending_todos(limit=4, after=after)
+        pages.append(_contents(todos))
+        if after is None:
+            break
+    assert pages == [EXPECTED[:4], EXPECTED[4:]]
+
+
+def test_pending_route_pages(manager, client, monkeypatch):
+    monkeypatch.setattr(routes, 'todo_manager', manager)
+    first = client.get('/api/todos/pending?limit=5').get_json()
+    assert _contents(first['todos']) == EXPECTED[:5]
+    second = client.get(f"/api/todos/pending?limit=5&cursor={first['next_cursor']}").get_json()
+    assert _contents(second['todos']) == EXPECTED[5:]
+    assert second['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', ['limit=abc', 'cursor=abc', 'cursor=2025-07-28,x,1', 'cursor=,,',
+                                   'cursor=2025-07-28,1,99999999999999999999',
+                                   'cursor=2025-07-28,-99999999999999999999,1'])
+def test_pending_route_rejects_bad_parameters(client, query):
+    response = client.get(f'/api/todos/pending?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid limit or cursor'
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+测试日期范围读取：超过 UNION ALL 上限时分批查询、366天限制、日期校验和 ETag
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from services.storage_engine import MAX_UNION_TERMS, PerDayTableEngine
+
+
+def _dates(start, count):
+    first = date.fromisoformat(start)
+    return [(first + timedelta(days=i)).isoformat() for i in range(count)]
+
+
+def test_range_over_union_limit(manager, engine):
+    dates = _dates('2024-01-01', MAX_UNION_TERMS + 5)
+    with manager.transaction():
+        for i, list_id in enumerate(dates):
+            manager.add_todo(list_id, f"任务{i}")
+        manager.add_todo(dates[0], "第二个")
+    manager.copy_list(dates[0], manager.new_copy_list_id())
+
+    queries = engine.select_lists(dates, 'id')
+    assert len(queries) == (2 if isinstance(engine, PerDayTableEngine) else 1)
+
+    result = manager.get_todos_range(dates[0], dates[-1])
+    # 复制列表不属于任何日期
+    assert list(result) == dates
+    assert [todo['content'] for todo in result[dates[0]]] == ["任务0", "第二个"]
+    assert all([todo['content'] for todo in result[list_id]] == [f"任务{i}"]
+               for i, list_id in enumerate(dates) if i)
+    assert list(manager.get_todos_range(dates[3], dates[5])) == dates[3:6]
+
+
+def test_range_limit_is_366_days(api_manager, client):
+    api_manager.add_todo('2024-01-01', "元旦")
+    api_manager.add_todo('2024-12-31', "年末")
+    response = client.get('/api/todos/range?from=2024-01-01&to=2024-12-31')
+    assert response.status_code == 200
+    assert list(response.get_json()) == ['2024-01-01', '2024-12-31']
+    assert client.get('/api/todos/range?from=2024-01-01&to=2024-01-01').status_code == 200
+
+    for query in ('from=2024-01-01&to=2025-01-01', 'from=2024-01-02&to=2024-01-01'):
+        response = client.get(f'/api/todos/range?{query}')
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Invalid date range (max 366 days)'
+
+
+@pytest.mark.parametrize('query', ['', 'from=2024-01-01', 'from=2024-01-01&to=2024-02-30',
+                                   'from=2024-1-1&to=2024-01-02', 'from=copy-1&to=2024-01-02'])
+def test_range_rejects_bad_dates(client, query):
+    response = client.get(f'/api/todos/range?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'from and to must be YYYY-MM-DD'
+
+
+def test_range_etag(api_manager, client):
+    api_manager.add_todo('2024-01-01', "任务")
+    path = '/api/todos/range?from=2024-01-01&to=2024-01-31'
+    etag = client.get(path).headers['ETag']
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    # 范围外的修改也改变全局版本号
+    api_manager.add_todo('2024-03-01', "范围外")
+    response = client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+测试读缓存：按版本号失效，其他进程的修改也能看到，事务中不读写缓存
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import DailyTodoManager
+from services.read_cache import VersionedLRUCache
+
+
+def test_lru_drops_stale_and_least_recently_used():
+    cache = VersionedLRUCache(2)
+    cache.put('a', 1, "A")
+    cache.put('b', 1, "B")
+    assert cache.get('a', 1) == "A"
+    cache.put('c', 1, "C")  # 淘汰最久未使用的 b
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 2) is None  # 版本不一致即失效
+    assert cache.get('a', 1) is None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['stale'] == 1
+
+
+def test_writes_from_another_process_invalidate(tmp_path):
+    db_path = str(tmp_path / 'todos.db')
+    manager = DailyTodoManager(db_path)
+    manager.add_todo('2025-07-28', "任务")
+    assert len(manager.get_todos_for_date('2025-07-28')) == 1
+    assert len(manager.get_todos_for_date('2025-07-28')) == 1
+    assert manager.cache_stats()['hits'] >= 1
+
+    other = DailyTodoManager(db_path)  # 另一个进程：各自的缓存和列表目录
+    other.add_todo('2025-07-28', "另一个进程")
+    assert [todo['content'] for todo in manager.get_todos_for_date('2025-07-28')] == ["任务", "另一个进程"]
+    assert manager.get_todo_counts() == {'2025-07-28': 2}
+
+
+def test_uncommitted_reads_are_not_cached(tmp_path):
+    manager = DailyTodoManager(str(tmp_path / 'todos.db'))
+    manager.add_todo('2025-07-28', "任务")
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.add_todo('2025-07-28', "回滚")
+            assert len(manager.get_todos_for_date('2025-07-28')) == 2
+            raise RuntimeError("回滚")
+    assert [todo['content'] for todo in manager.get_todos_for_date('2025-07-28')] == ["任务"]
+
+
+def test_deleting_a_list_drops_its_cache_entries(manager):
+    manager.add_todo('2025-07-28', "任务")
+    manager.add_todo('2025-07-29', "另一天")
+    manager.get_todos_for_date('2025-07-28')
+    manager.get_todos_page('2025-07-28', limit=1, as_json=True)
+    ''.join(manager.export_markdown('2025-07-28'))
+    manager.get_todos_for_date('2025-07-29')
+
+    manager.delete_all_todos_for_date('2025-07-28')
+    keys = list(manager._read_cache._entries)
+    assert not [key for key in keys if '2025-07-28' in key]
+    assert any('2025-07-29' in key for key in keys)
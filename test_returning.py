@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+测试通过 RETURNING 返回整行的读写：get_todo / add_todo_returning / update_todo_returning 及对应接口
+"""
+import pytest
+
+import routes
+from app import create_app
+from models import ORDER_GAP
+
+DATE = '2025-07-28'
+
+
+@pytest.fixture
+def engine_client(manager, monkeypatch):
+    """接口使用参数化引擎的管理器"""
+    monkeypatch.setattr(routes, 'todo_manager', manager)
+    return create_app('testing').test_client()
+
+
+def test_add_returning_gives_the_stored_row(manager):
+    first = manager.add_todo_returning(DATE, "第一个")
+    second = manager.add_todo_returning(DATE, "第二个")
+    assert first['content'] == "第一个" and first['date'] == DATE
+    assert (first['completed'], first['completed_at']) == (False, None)
+    assert first['created_at']
+    assert (first['order'], second['order']) == (ORDER_GAP, 2 * ORDER_GAP)
+    assert manager.get_todo(DATE, first['id']) == first
+
+    placed = manager.add_todo_returning(DATE, "指定顺序", order_num=5)
+    assert placed['order'] == 5
+
+
+def test_update_returning_gives_the_updated_row(manager):
+    todo = manager.add_todo_returning(DATE, "原内容")
+    done = manager.update_todo_returning(DATE, todo['id'], content="新内容", completed=True)
+    assert (done['content'], done['completed']) == ("新内容", True)
+    assert done['completed_at'] and done['created_at'] == todo['created_at']
+    assert manager.get_todo(DATE, todo['id']) == done
+
+    undone = manager.update_todo_returning(DATE, todo['id'], completed=False, order_num=3)
+    assert (undone['completed'], undone['completed_at'], undone['order']) == (False, None, 3)
+
+
+def test_missing_rows_return_none(manager):
+    todo = manager.add_todo_returning(DATE, "任务")
+    manager.add_todo('2025-07-29', "另一天")
+    assert manager.get_todo(DATE, todo['id'] + 100) is None
+    assert manager.get_todo('2025-01-01', todo['id']) is None
+    assert manager.update_todo_returning(DATE, todo['id'] + 100, content="x") is None
+    assert manager.update_todo_returning('2025-01-01', todo['id'], content="x") is None
+    # 没有可更新的字段
+    assert manager.update_todo_returning(DATE, todo['id']) is None
+    # 通过另一个列表更新不会改到这一行（单表引擎中所有列表共用一张表）
+    manager.update_todo_returning('2025-07-29', todo['id'], content="x")
+    assert manager.get_todo(DATE, todo['id'])['content'] == "任务"
+
+
+def test_routes_return_the_row(manager, engine_client):
+    response = engine_client.post('/api/todos', json={'date': DATE, 'content': "接口任务"})
+    assert response.status_code == 201
+    created = response.get_json()
+    assert created == manager.get_todo(DATE, created['id'])
+
+    response = engine_client.get(f"/api/todos/{created['id']}?date={DATE}")
+    assert response.status_code == 200 and response.get_json() == created
+
+    response = engine_client.put(f"/api/todos/{created['id']}", json={'date': DATE, 'completed': True})
+    assert response.status_code == 200
+    updated = response.get_json()
+    assert updated['completed'] and updated['completed_at']
+    assert updated == manager.get_todo(DATE, created['id'])
+
+
+def test_routes_404_when_row_is_missing(manager, engine_client):
+    todo_id = manager.add_todo(DATE, "任务")
+    assert engine_client.get(f"/api/todos/{todo_id + 100}?date={DATE}").status_code == 404
+    assert engine_client.get(f"/api/todos/{todo_id}?date=2025-01-01").status_code == 404
+    response = engine_client.put(f"/api/todos/{todo_id + 100}", json={'date': DATE, 'content': "x"})
+    assert response.status_code == 404
+    response = engine_client.put(f"/api/todos/{todo_id}", json={'date': '2025-01-01', 'content': "x"})
+    assert response.status_code == 404
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+测试未完成任务结转：按内容去重、重复执行不产生重复任务、移动模式删除来源
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.rollover_scheduler import seconds_until_midnight
+
+
+@pytest.fixture
+def manager(manager):
+    manager.add_todo('2025-07-26', "写周报")
+    manager.add_todo('2025-07-26', "修复登录")
+    done = manager.add_todo('2025-07-27', "已完成")
+    manager.update_todo('2025-07-27', done, completed=True)
+    manager.add_todo('2025-07-27', "写周报")  # 与前一天重复
+    manager.add_todo('2025-07-27', "代码评审")
+    manager.add_todo('2025-07-28', "修复登录")  # 目标日期已有
+    manager.add_todo('2025-07-10', "太早了")
+    return manager
+
+
+def _contents(manager, date):
+    return [todo['content'] for todo in manager.get_todos_for_date(date)]
+
+
+def test_rollover_dedupes_and_is_idempotent(manager):
+    result = manager.rollover_pending('2025-07-28', days=7)
+    assert result['sources'] == ['2025-07-26', '2025-07-27']
+    assert result['copied'] == 2
+    assert _contents(manager, '2025-07-28') == ["修复登录", "写周报", "代码评审"]
+
+    assert manager.rollover_pending('2025-07-28', days=7)['copied'] == 0
+    assert _contents(manager, '2025-07-28') == ["修复登录", "写周报", "代码评审"]
+    assert manager.get_todo_counts()['2025-07-26'] == 2
+
+
+def test_rollover_move_removes_pending_sources(manager):
+    result = manager.rollover_pending('2025-07-28', days=7, move=True)
+    assert result['removed'] == 4
+    assert _contents(manager, '2025-07-26') == []
+    assert _contents(manager, '2025-07-27') == ["已完成"]
+    assert _contents(manager, '2025-07-10') == ["太早了"]
+
+
+def test_rollover_into_new_day_creates_list(manager):
+    result = manager.rollover_pending('2025-07-29', days=2)
+    assert result['sources'] == ['2025-07-27', '2025-07-28']
+    assert _contents(manager, '2025-07-29') == ["写周报", "代码评审", "修复登录"]
+
+
+def test_seconds_until_midnight():
+    assert seconds_until_midnight(datetime(2025, 7, 28, 23, 59, 0)) == 61
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+测试全文搜索：FTS5 和子串匹配两条路径的结果形式一致，片段已转义
+"""
+import pytest
+
+
+@pytest.fixture
+def manager(manager):
+    manager.add_todo('2025-07-28', "修复 <script>alert(1)</script> 的问题")
+    manager.add_todo('2025-07-28', "写周报")
+    done = manager.add_todo('2025-07-29', "修复登录问题")
+    manager.update_todo('2025-07-29', done, completed=True)
+    return manager
+
+
+def test_fts_snippet_is_escaped(manager):
+    results, _ = manager.search_todos("script")
+    assert len(results) == 1
+    assert results[0]['content'] == "修复 <script>alert(1)</script> 的问题"
+    snippet = results[0]['snippet']
+    assert '<script>' not in snippet
+    assert '&lt;<mark>script</mark>&gt;' in snippet
+
+
+def test_short_terms_fall_back_to_substring_match(manager):
+    results, _ = manager.search_todos("修复")
+    assert sorted(todo['date'] for todo in results) == ['2025-07-28', '2025-07-29']
+    assert set(results[0]) == set(manager.search_todos("script")[0][0])
+    snippet = next(todo['snippet'] for todo in results if todo['date'] == '2025-07-28')
+    assert snippet.startswith('<mark>修复</mark> &lt;script&gt;')
+    assert snippet.endswith('…')
+    assert '<script>' not in snippet
+
+
+def test_search_filters_and_cursor(manager):
+    assert [todo['date'] for todo in manager.search_todos("修复", completed=True)[0]] == ['2025-07-29']
+    assert [todo['date'] for todo in manager.search_todos("修复", date='2025-07-28')[0]] == ['2025-07-28']
+
+    first, cursor = manager.search_todos("问题", limit=1)
+    assert cursor is not None
+    second, cursor = manager.search_todos("问题", limit=1, cursor=cursor)
+    assert cursor is None
+    assert (first[0]['date'], first[0]['id']) != (second[0]['date'], second[0]['id'])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+测试每日表 -> 单表存储引擎的迁移
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import DailyTodoManager
+from migrate_storage import MigrationError, migrate
+from services.storage_engine import PerDayTableEngine, SingleTableEngine
+
+
+def test_migration_is_resumable_and_syncs_changes(tmp_path):
+    """分批迁移后两种引擎看到的数据一致，迁移期间的修改在 finalize 时同步"""
+    db_path = str(tmp_path / 'todos.db')
+    legacy = DailyTodoManager(db_path, engine=PerDayTableEngine())
+
+    for i in range(5):
+        legacy.add_todo('2025-07-28', f"任务{i}")
+    legacy.add_todo('copy-20250728-1', "复制任务")
+    legacy.create_table_for_date('2025-07-29')  # 空列表也要迁移
+
+    migrate(db_path, batch_size=2)
+
+    # 迁移期间应用仍在写旧表
+    legacy.update_todo('2025-07-28', 1, completed=True)
+    legacy.delete_todo('2025-07-28', 2)
+    legacy.add_todo('2025-07-28', "迁移期间新增")
+
+    migrate(db_path, batch_size=2, finalize=True)
+
+    single = DailyTodoManager(db_path, engine=SingleTableEngine())
+    assert sorted(single.get_available_dates()) == sorted(legacy.get_available_dates())
+    assert single.get_todo_counts() == legacy.get_todo_counts()
+
+    def strip_ids(todos):
+        return [(t['content'], t['completed'], t['order']) for t in todos]
+
+    for date in legacy.get_available_dates():
+        assert strip_ids(single.get_todos_for_date(date)) == strip_ids(legacy.get_todos_for_date(date))
+
+
+def test_lists_dropped_during_migration_do_not_come_back(tmp_path):
+    """迁移期间删除的列表在 todos 中不留下已复制的行"""
+    db_path = str(tmp_path / 'todos.db')
+    legacy = DailyTodoManager(db_path, engine=PerDayTableEngine())
+    legacy.add_todo('2025-07-30', "gone")
+
+    migrate(db_path)
+    legacy.delete_all_todos_for_date('2025-07-30')
+    migrate(db_path, finalize=True)
+
+    single = DailyTodoManager(db_path, engine=SingleTableEngine())
+    single.add_todo('2025-07-30', "new")
+    assert [t['content'] for t in single.get_todos_for_date('2025-07-30')] == ["new"]
+    assert single.get_todo_counts()['2025-07-30'] == 1
+
+
+def test_sync_is_refused_after_switching_engines(tmp_path):
+    """单表引擎接管后再同步会覆盖新数据，必须拒绝；删除旧表仍然可以"""
+    db_path = str(tmp_path / 'todos.db')
+    legacy = DailyTodoManager(db_path, engine=PerDayTableEngine())
+    legacy.add_todo('2025-07-28', "任务")
+    migrate(db_path, finalize=True)
+
+    single = DailyTodoManager(db_path, engine=SingleTableEngine())
+    todo_id = single.get_todos_for_date('2025-07-28')[0]['id']
+    single.delete_todo('2025-07-28', todo_id)
+
+    with pytest.raises(MigrationError):
+        migrate(db_path, finalize=True)
+    migrate(db_path, drop_legacy=True)
+
+    assert single.get_todos_for_date('2025-07-28') == []
+    with single.pool.connection() as conn:
+        assert PerDayTableEngine().scan_tables(conn) == []